@@ -0,0 +1,4 @@
+"""Benchmarks for bgp_ls_vis
+
+Each module is runnable on its own, e.g. `python -m benchmarks.bench_decode` from the repo root.
+"""
@@ -0,0 +1,63 @@
+"""Benchmark: protobuf Any decoding (proto.decode) vs binary TLV decoding (proto.binary)
+
+Each table dump is converted to what GoBGP returns with enable_nlri_binary and
+enable_attribute_binary set (the protobuf NLRI and attributes plus their wire encoding), then
+replayed through GoBGPQueryWrapper.get_lsdb in both modes. Both must give the same LSDB, also
+once the binary NLRI of every Link LSA carries a malformed TLV, which the binary mode must fall
+back to proto.decode for.
+"""
+# Standard Imports
+import copy
+import os
+import struct
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.binary import NLRI_LINK, add_binary_fields
+
+from .common import StaticStub, best_of, dump_files, dump_responses, scale_responses
+
+
+def malformed(response):
+    """Copy of a binary response whose Link NLRIs end in a 5 byte IPv4 Interface Address TLV"""
+    response = copy.deepcopy(response)
+    for path in response.destination.paths:
+        nlri_type, length = struct.unpack_from(">HH", path.nlri_binary)
+        if nlri_type == NLRI_LINK:
+            body = path.nlri_binary[4:] + struct.pack(">HH", 259, 5) + bytes(5)
+            path.nlri_binary = struct.pack(">HH", nlri_type, length + 9) + body
+    return response
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(f"{'dump':40} {'lsas':>6} {'protobuf':>10} {'binary':>10} {'speedup':>8}")
+    for filename in dump_files():
+        for copies in (1, 100):
+            responses = [
+                add_binary_fields(response)
+                for response in scale_responses(dump_responses(filename), copies)
+            ]
+            direct = GoBGPQueryWrapper(connect=False)
+            binary = GoBGPQueryWrapper(connect=False, binary=True)
+            direct.stub = StaticStub(responses)
+            binary.raw_stub = StaticStub(responses, raw=True)
+
+            lsdb = binary.get_lsdb()
+            assert lsdb == direct.get_lsdb(), f"decoders disagree on {filename}"
+            if copies == 1:
+                binary.raw_stub = StaticStub(list(map(malformed, responses)), raw=True)
+                assert binary.get_lsdb() == lsdb, f"no fallback on {filename}"
+                binary.raw_stub = StaticStub(responses, raw=True)
+
+            t_direct = best_of(direct.get_lsdb, repeat=3)
+            t_binary = best_of(binary.get_lsdb, repeat=3)
+            print(
+                f"{os.path.basename(filename) + f' x{copies}':40} {len(lsdb):>6}"
+                f" {t_direct * 1e3:>8.1f}ms {t_binary * 1e3:>8.1f}ms"
+                f" {t_direct / t_binary:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
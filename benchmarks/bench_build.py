@@ -0,0 +1,79 @@
+"""Benchmark: build_nx_from_lsdb vs the previous relabel_nodes based graph construction
+
+The previous implementation inserted nodes and edges keyed by IGP RID, then renamed every node
+with a TLV137 hostname through nx.relabel_nodes(copy=False), which rewrites each adjacency of
+every renamed node. It is kept here as the reference. Synthetic LSDBs of about 5k, 20k and 50k
+nodes are built from copies of the 18 node IS-IS dump; both must give the same graph.
+"""
+# Standard Imports
+import os
+
+import networkx as nx
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb, link_edge_attrs, lsa_pseudonode
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+
+from .common import DUMPS_DIR, best_of, scale_isis_lsdb
+
+
+def build_nx_relabel(lsdb) -> nx.MultiDiGraph:
+    """build_nx_from_lsdb as it was before single-pass construction"""
+    graph = nx.MultiDiGraph()
+    new_name_map = {}
+    node_lsa_attrs = {}
+    for lsa in lsdb:
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        if lsa["type"] == "Link":
+            graph.add_edge(
+                igp_rid, lsa["remoteNode"]["igpRouterId"], **link_edge_attrs(lsa)
+            )
+        if lsa["type"] == "Node":
+            graph.add_node(igp_rid)
+            node_attrs = node_lsa_attrs.setdefault(
+                igp_rid, {"lsa": None, "prefixes": []}
+            )
+            node_attrs["lsa"] = lsa
+            if lsa["lsattribute"]["node"]:
+                if "name" in list(lsa["lsattribute"]["node"].keys()):
+                    new_name_map[igp_rid] = lsa["lsattribute"]["node"]["name"]
+                node_attrs["pseudonode"] = lsa_pseudonode(lsa)
+        if lsa["type"] == "Prefix":
+            node_attrs = node_lsa_attrs.setdefault(
+                igp_rid, {"lsa": None, "prefixes": []}
+            )
+            node_attrs["prefixes"].append(lsa)
+    nx.set_node_attributes(graph, node_lsa_attrs)
+    nx.relabel_nodes(graph, new_name_map, copy=False)
+    return graph
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(
+        os.path.join(DUMPS_DIR, "18-node-isis-w-bcast-segment.yaml")
+    )
+    nodes_per_copy = len(build_nx_from_lsdb(lsdb))
+
+    print(f"{'nodes':>8} {'lsas':>8} {'relabel':>10} {'single':>10} {'speedup':>8}")
+    for nodes in (5000, 20000, 50000):
+        scaled = [
+            lsa_from_dict(lsa) for lsa in scale_isis_lsdb(lsdb, nodes // nodes_per_copy)
+        ]
+        graph = build_nx_from_lsdb(scaled)
+        reference = build_nx_relabel(scaled)
+        assert set(graph.nodes) == set(reference.nodes)
+        assert sorted(graph.edges) == sorted(reference.edges)
+
+        t_relabel = best_of(lambda: build_nx_relabel(scaled), repeat=3)
+        t_single = best_of(lambda: build_nx_from_lsdb(scaled), repeat=3)
+        print(
+            f"{len(graph):>8} {len(scaled):>8} {t_relabel * 1e3:>8.1f}ms"
+            f" {t_single * 1e3:>8.1f}ms {t_relabel / t_single:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: refreshing a graph with graphing.cache.GraphCache vs get_lsdb and rebuild
+
+A local gRPC server serves a table (copies of the 18 node IS-IS dump). Each refresh either
+fetches and rebuilds the graph, as a dashboard loop has done so far, or calls GraphCache.get(),
+which on an unchanged table costs a GetTable call (ttl > 0) or a GetTable call plus a hashed,
+undecoded ListPath stream (ttl = 0). A metric change, which keeps the table counts, must be
+picked up by the content hash.
+"""
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.graphing.cache import GraphCache
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.binary import decode_raw_response
+from bgp_ls_vis.proto.channel import POOL
+
+from .bench_channel import TableServicer, serve
+from .common import DUMPS_DIR, best_of, binary_responses, scale_isis_lsdb
+
+
+def changed_metric(response):
+    """Copy of a Link LSA's response with its IGP metric changed"""
+    lsa = decode_raw_response(response.SerializeToString())
+    lsa["lsattribute"]["link"]["igpMetric"] = (
+        lsa["lsattribute"]["link"].get("igpMetric", 0) + 1
+    )
+    return binary_responses([lsa])[0]
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml")
+    print(
+        f"{'lsas':>6} {'rebuild':>10} {'ttl=0 hit':>10} {'ttl>0 hit':>10}"
+        f" {'change':>10} {'ttl=0 gain':>11} {'ttl>0 gain':>11}"
+    )
+    for copies in (10, 100):
+        responses = binary_responses(scale_isis_lsdb(lsdb, copies))
+        servicer = TableServicer(responses)
+        server, port = serve(servicer)
+        rpc = GoBGPQueryWrapper("127.0.0.1", port, binary=True)
+
+        t_rebuild = best_of(lambda: build_nx_from_lsdb(rpc.get_lsdb()), repeat=3)
+        strict = GraphCache(rpc, ttl=0)
+        relaxed = GraphCache(rpc, ttl=60)
+        graph = strict.get()
+        relaxed.get()
+        t_strict = best_of(strict.get, repeat=5)
+        t_relaxed = best_of(relaxed.get, repeat=5)
+        assert strict.get() is graph and strict.misses == 1
+
+        link = next(
+            position
+            for position, lsa in enumerate(strict.lsdb)
+            if lsa["type"] == "Link"
+        )
+        original = responses[link]
+
+        def change():
+            servicer.responses[link] = changed_metric(servicer.responses[link])
+            strict.get()
+
+        t_change = best_of(change, repeat=3)
+        assert strict.misses == 4, "metric change not detected"
+        servicer.responses[link] = original
+        assert strict.get() is not graph
+        assert sorted(strict.graph.edges(data="cost")) == sorted(
+            build_nx_from_lsdb(rpc.get_lsdb()).edges(data="cost")
+        )
+
+        POOL.close(f"127.0.0.1:{port}")
+        server.stop(None)
+        print(
+            f"{len(responses):>6} {t_rebuild * 1e3:>8.1f}ms {t_strict * 1e3:>8.1f}ms"
+            f" {t_relaxed * 1e3:>8.1f}ms {t_change * 1e3:>8.1f}ms"
+            f" {t_rebuild / t_strict:>10.1f}x {t_rebuild / t_relaxed:>10.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
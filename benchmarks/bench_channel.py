@@ -0,0 +1,107 @@
+"""Benchmark: gzip channel compression (proto.channel) on the BGP-LS table
+
+A local gRPC server streams a table (copies of the 18 node IS-IS dump, with binary fields as a
+binary mode query returns them) to GoBGPQueryWrapper, with and without gzip. gRPC compresses
+each message on its own, so what is saved depends on the size of single ListPath responses, not
+of the table. Loopback has no bandwidth limit, so the time over a WAN link is estimated as the
+measured loopback time plus the bytes on the wire at the link rate.
+"""
+# Standard Imports
+import gzip
+from concurrent import futures
+
+import grpc
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper, gobgp_pb2_grpc
+from bgp_ls_vis.proto import gobgp_pb2 as gobgp
+from bgp_ls_vis.proto.binary import add_binary_fields
+from bgp_ls_vis.proto.channel import POOL, ChannelOptions
+
+from .common import DUMPS_DIR, best_of, dump_responses, scale_responses
+
+# Link rates to estimate transfer times for, in Mbit/s
+LINK_RATES = (10, 100, 1000)
+# gRPC frames each message with a 5 byte header
+FRAME_BYTES = 5
+
+
+class TableServicer(gobgp_pb2_grpc.GobgpApiServicer):
+    """GobgpApi serving a table on ListPath and its counts on GetTable"""
+
+    def __init__(self, responses: list):
+        self.responses = responses
+
+    def ListPath(self, request, context):  # pylint: disable=invalid-name
+        yield from self.responses
+
+    def GetTable(self, request, context):  # pylint: disable=invalid-name
+        return gobgp.GetTableResponse(
+            num_destination=len(self.responses),
+            num_path=len(self.responses),
+            num_accepted=len(self.responses),
+        )
+
+
+def serve(responses: list, compression=None) -> tuple:
+    """Starts a local server for a table, returning (server, port)
+
+    Args:
+        responses: List of ListPath responses, or a TableServicer serving them
+        compression: grpc.Compression of the responses
+    """
+    servicer = (
+        responses if isinstance(responses, TableServicer) else TableServicer(responses)
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(2), compression=compression)
+    gobgp_pb2_grpc.add_GobgpApiServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, str(port)
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    filename = f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml"
+    print(
+        f"{'lsas':>6} {'gzip':>5} {'wire':>9} {'ratio':>6} {'loopback':>10}"
+        + "".join(f" {f'{rate}Mbit/s':>10}" for rate in LINK_RATES)
+    )
+    for copies in (10, 100):
+        responses = [
+            add_binary_fields(response)
+            for response in scale_responses(dump_responses(filename), copies)
+        ]
+        messages = [response.SerializeToString() for response in responses]
+        plain = sum(len(message) + FRAME_BYTES for message in messages)
+        compressed = sum(
+            len(gzip.compress(message)) + FRAME_BYTES for message in messages
+        )
+
+        for use_gzip, wire in ((False, plain), (True, compressed)):
+            server, port = serve(
+                responses,
+                grpc.Compression.Gzip if use_gzip else grpc.Compression.NoCompression,
+            )
+            rpc = GoBGPQueryWrapper(
+                "127.0.0.1",
+                port,
+                binary=True,
+                channel_options=ChannelOptions(compression=use_gzip),
+            )
+            t_loopback = best_of(rpc.get_lsdb, repeat=3)
+            POOL.close(f"127.0.0.1:{port}")
+            server.stop(None)
+            print(
+                f"{len(responses):>6} {'yes' if use_gzip else 'no':>5}"
+                f" {wire / 1024:>7.0f}KB {plain / wire:>5.2f}x"
+                f" {t_loopback * 1e3:>8.1f}ms"
+                + "".join(
+                    f" {(t_loopback + wire * 8 / (rate * 1e6)) * 1e3:>8.1f}ms"
+                    for rate in LINK_RATES
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
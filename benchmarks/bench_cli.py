@@ -0,0 +1,70 @@
+"""Benchmark: bgp-ls-vis build and render over many snapshot files, by number of workers
+
+Writes a batch of synthetic snapshot files, like hourly snapshots of several domains, then times
+`bgp-ls-vis build` and `bgp-ls-vis render` (bgp_ls_vis.cli) over the whole batch with 1 worker
+and with more, up to one per CPU. Throughput should grow with workers until the CPUs run out.
+"""
+# Standard Imports
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+# Project internal imports
+from bgp_ls_vis.cli import main as cli
+from bgp_ls_vis.proto.synthetic import generate_lsdb, random_topology, write_table
+
+# command -> (files, routers per file, extra arguments)
+BATCHES = {
+    "build": (32, 2000, []),
+    "render": (8, 60, ["-o"]),
+}
+
+
+def worker_counts() -> list:
+    """1, 2, 4 ... workers up to the CPU count, and the CPU count itself"""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+    return sorted(set(counts + [cpus]))
+
+
+def run(arguments: list) -> float:
+    """Runs the command line with its output discarded, returning the seconds taken"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        status = cli(arguments)
+    assert status == 0, f"{arguments[0]} failed"
+    return time.perf_counter() - start
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'command':>8} {'files':>6} {'workers':>8} {'time':>10} {'files/s':>8} {'speedup':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for command, (count, routers, extra) in BATCHES.items():
+            files = []
+            for number in range(count):
+                filename = os.path.join(tmpdir, f"{command}-{number}.bgpls")
+                write_table(
+                    filename, generate_lsdb(random_topology(routers, seed=number))
+                )
+                files.append(filename)
+            if extra:
+                extra = extra + [os.path.join(tmpdir, "images")]
+            baseline = None
+            for workers in worker_counts():
+                seconds = run([command, *files, *extra, "-j", str(workers)])
+                baseline = baseline or seconds
+                print(
+                    f"{command:>8} {count:>6} {workers:>8} {seconds:>9.2f}s"
+                    f" {count / seconds:>8.1f} {baseline / seconds:>7.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
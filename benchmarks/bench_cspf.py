@@ -0,0 +1,134 @@
+"""Benchmark: CSPF placements per second (graphing.cspf) vs networkx on a pruned graph
+
+A synthetic topology (random routers plus LAN pseudonodes) gets mixed link bandwidths and admin
+groups. A batch of LSP requests between a set of PEs, with random bandwidth, priority and admin
+group constraints, is placed: one at a time with CspfEngine.path, as a batch with place() (which
+shares shortest path trees), and in order with bandwidth reservation. The baseline prunes the
+build_nx_from_lsdb graph per request by reading the Link LSAs, then runs networkx Dijkstra; it
+is timed on a sample. Paths must cost the same either way.
+"""
+# Standard Imports
+import random
+import time
+
+import networkx as nx
+
+# Project internal imports
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.graphing.cspf import CspfEngine, CspfRequest
+from bgp_ls_vis.proto.synthetic import (
+    BANDWIDTH,
+    generate_lsdb,
+    random_topology,
+    with_segments,
+)
+
+REQUESTS = 5000
+PES = 50
+BASELINE_SAMPLE = 50
+
+
+def te_topology(routers: int, seed: int = 0) -> CsrTopology:
+    """Random topology with 1/10/40 Gbit/s links in 4 admin groups"""
+    rng = random.Random(seed)
+    topology = with_segments(random_topology(routers, seed=seed), routers // 20)
+    links = [
+        link._replace(
+            bandwidth=BANDWIDTH * rng.choice((1, 10, 10, 40)),
+            admin_group=1 << rng.randrange(4),
+            metric=rng.choice((10, 10, 20, 50)),
+        )
+        for link in topology.links
+    ]
+    return CsrTopology.from_lsdb(generate_lsdb(topology._replace(links=links)))
+
+
+def requests(topology: CsrTopology, seed: int = 0) -> list:
+    """REQUESTS random LSPs between PES routers"""
+    rng = random.Random(seed)
+    routers = [name for name, pn in zip(topology.names, topology.pseudonode) if not pn]
+    pes = rng.sample(routers, PES)
+    return [
+        CspfRequest(
+            *rng.sample(pes, 2),
+            bandwidth=BANDWIDTH * rng.choice((0.1, 0.5, 2, 5)),
+            priority=rng.randrange(8),
+            exclude_any=rng.choice((0, 0, 1)),
+            include_any=rng.choice((0, 0, 0, 6)),
+        )
+        for _ in range(REQUESTS)
+    ]
+
+
+def networkx_path(graph: nx.MultiDiGraph, request: CspfRequest):
+    """Cost of a request's path, pruning the graph by its edges' Link LSAs; None if no path"""
+
+    def usable(local, remote, key):
+        data = graph[local][remote][key]
+        if graph.nodes[local].get("pseudonode"):
+            return True
+        link = data["lsa"]["lsattribute"]["link"]
+        groups = link.get("adminGroup") or 0
+        # LAN links carry no TE bandwidth (See: CspfEngine)
+        unreserved = link.get("unreservedBandwidth") or [0.0] * 8
+        return (
+            unreserved[request.priority] >= request.bandwidth
+            and not groups & request.exclude_any
+            and (not request.include_any or groups & request.include_any)
+        )
+
+    pruned = nx.subgraph_view(graph, filter_edge=usable)
+    try:
+        return nx.dijkstra_path_length(
+            pruned,
+            request.source,
+            request.destination,
+            weight=lambda u, v, edges: min(
+                edge["lsa"]["lsattribute"]["link"].get("defaultTeMetric", edge["cost"])
+                for edge in edges.values()
+            ),
+        )
+    except nx.NetworkXNoPath:
+        return None
+
+
+def rate(func) -> float:
+    """Requests per second placed by func, which places all of them"""
+    start = time.perf_counter()
+    func()
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'routers':>8} {'networkx':>10} {'path':>10} {'place':>10}"
+        f" {'reserve':>10} {'placed':>7}   (requests/s)"
+    )
+    for routers in (300, 1000, 3000):
+        topology = te_topology(routers)
+        batch = requests(topology)
+        engine = CspfEngine(topology)
+
+        graph = topology.to_networkx()
+        sample = batch[:BASELINE_SAMPLE]
+        start = time.perf_counter()
+        expected = [networkx_path(graph, request) for request in sample]
+        r_nx = BASELINE_SAMPLE / (time.perf_counter() - start)
+        for request, cost in zip(sample, expected):
+            path = engine.path(request)
+            assert (path and path.cost) == cost, request
+
+        r_path = rate(lambda: [engine.path(request) for request in batch])
+        r_place = rate(lambda: engine.place(batch))
+        paths = []
+        r_reserve = rate(lambda: paths.extend(engine.place(batch, reserve=True)))
+        placed = sum(path is not None for path in paths)
+        print(
+            f"{routers:>8} {r_nx:>10.0f} {r_path:>10.0f} {r_place:>10.0f}"
+            f" {r_reserve:>10.0f} {placed:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark: networkx graph vs array-backed CsrTopology (graphing.csr), build time and memory
+
+Builds both from synthetic LSDBs (copies of the 18 node IS-IS dump), and measures with
+tracemalloc the memory each retains on top of the LSDB itself, which both reference.
+"""
+# Standard Imports
+import os
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+
+from .bench_lsa_memory import retained_bytes
+from .common import DUMPS_DIR, best_of, scale_isis_lsdb
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(
+        os.path.join(DUMPS_DIR, "18-node-isis-w-bcast-segment.yaml")
+    )
+    print(
+        f"{'nodes':>8} {'edges':>8} {'nx build':>10} {'csr build':>10}"
+        f" {'nx memory':>10} {'csr memory':>11} {'ratio':>6}"
+    )
+    for copies in (50, 500, 2500):
+        scaled = [lsa_from_dict(lsa) for lsa in scale_isis_lsdb(lsdb, copies)]
+        topology = CsrTopology.from_lsdb(scaled, keep_lsas=False)
+
+        t_nx = best_of(lambda: build_nx_from_lsdb(scaled), repeat=3)
+        t_csr = best_of(
+            lambda: CsrTopology.from_lsdb(scaled, keep_lsas=False), repeat=3
+        )
+        m_nx = retained_bytes(lambda: build_nx_from_lsdb(scaled))
+        m_csr = retained_bytes(lambda: CsrTopology.from_lsdb(scaled, keep_lsas=False))
+        print(
+            f"{topology.node_count:>8} {topology.edge_count:>8}"
+            f" {t_nx * 1e3:>8.1f}ms {t_csr * 1e3:>8.1f}ms"
+            f" {m_nx / 2**20:>8.1f}MB {m_csr / 2**20:>9.1f}MB {m_nx / m_csr:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Benchmark: MessageToDict + filtering vs direct protobuf decoding (proto.decode)
+
+Replays each table dump under tests/bgp-ls_table_dumps through GoBGPQueryWrapper.get_lsdb as if
+it had been streamed over ListPath, once per decode path, and checks both give the same LSDB.
+"""
+# Standard Imports
+import os
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+
+from .common import StaticStub, best_of, dump_files, dump_responses
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'dump':40} {'lsas':>6} {'MessageToDict':>14} {'direct':>10} {'speedup':>8}"
+    )
+    for filename in dump_files():
+        stub = StaticStub(dump_responses(filename))
+        legacy = GoBGPQueryWrapper(connect=False, direct_decode=False)
+        direct = GoBGPQueryWrapper(connect=False, direct_decode=True)
+        legacy.stub = direct.stub = stub
+
+        lsdb = direct.get_lsdb()
+        assert lsdb == legacy.get_lsdb(), f"decoders disagree on {filename}"
+
+        t_legacy = best_of(legacy.get_lsdb)
+        t_direct = best_of(direct.get_lsdb)
+        print(
+            f"{os.path.basename(filename):40} {len(lsdb):>6} {t_legacy * 1e3:>12.2f}ms"
+            f" {t_direct * 1e3:>8.2f}ms {t_legacy / t_direct:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
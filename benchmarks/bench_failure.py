@@ -0,0 +1,75 @@
+"""Benchmark: failure impact simulation (graphing.failure) vs networkx SPF per failure
+
+For every single link and node failure of a synthetic topology (random routers plus LAN
+pseudonodes), the impact on every router to router path. The baseline removes the failed edges
+from a copy of the build_nx_from_lsdb graph and reruns networkx all-pairs Dijkstra; it is timed
+on a few failures and extrapolated. simulate_failures is timed on an evenly spread sample of
+SAMPLE failures, in one process and in one per CPU, and extrapolated to all of them (plus the
+failure-free SPF run each simulation starts with).
+"""
+# Standard Imports
+import os
+import time
+
+import networkx as nx
+
+# Project internal imports
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.graphing.failure import enumerate_failures, simulate_failures
+from bgp_ls_vis.proto.synthetic import generate_lsdb, random_topology, with_segments
+
+SAMPLE = 200
+BASELINE_SAMPLE = 3
+
+
+def networkx_failure(graph: nx.MultiDiGraph, topology: CsrTopology, failure) -> dict:
+    """All-pairs costs with a failure, the networkx way"""
+    failed = graph.copy()
+    local = topology.edge_sources()
+    for edge in failure.edges:
+        failed.remove_edge(
+            topology.names[local[edge]], topology.names[topology.indices[edge]]
+        )
+    return dict(nx.all_pairs_dijkstra_path_length(failed, weight="cost"))
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    cpus = os.cpu_count() or 1
+    print(
+        f"{'routers':>8} {'failures':>9} {'networkx':>10} {'1 process':>10}"
+        f" {f'{cpus} processes':>12} {'speedup':>8} {'changed pairs':>14}"
+    )
+    for routers in (100, 300, 1000):
+        lsdb = list(
+            generate_lsdb(with_segments(random_topology(routers), routers // 20))
+        )
+        topology = CsrTopology.from_lsdb(lsdb)
+        failures = enumerate_failures(topology)
+        sample = failures[:: max(1, len(failures) // SAMPLE)]
+        scale = len(failures) / len(sample)
+
+        graph = topology.to_networkx()
+        start = time.perf_counter()
+        for failure in sample[:BASELINE_SAMPLE]:
+            networkx_failure(graph, topology, failure)
+        t_nx = (time.perf_counter() - start) / BASELINE_SAMPLE * len(failures)
+
+        # The failure-free SPF run is paid once, however many failures there are
+        start = time.perf_counter()
+        simulate_failures(topology, [], processes=1)
+        fixed = time.perf_counter() - start
+        times = []
+        for processes in sorted({1, cpus}):
+            start = time.perf_counter()
+            impact = simulate_failures(topology, sample, processes=processes)
+            times.append(fixed + (time.perf_counter() - start - fixed) * scale)
+        print(
+            f"{routers:>8} {len(failures):>9} {t_nx:>9.0f}s {times[0]:>9.1f}s"
+            f" {times[-1]:>11.1f}s {t_nx / times[-1]:>7.0f}x"
+            f" {len(impact.costs) * scale:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
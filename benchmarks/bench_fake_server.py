@@ -0,0 +1,116 @@
+"""Benchmark: GoBGPQueryWrapper against a local fake GoBGP (proto.fake_server)
+
+Serves tables of increasing size (copies of the 18 node IS-IS dump) from FakeGobgpServicer and
+times a full get_lsdb in each decode mode: MessageToDict, direct decode and binary. Then, with
+the table churning, measures how long MonitorTable deltas take from the change on the server to
+watch_lsdb yielding them, and the highest churn rate a watcher keeps up with. Server and client
+share this process (and its GIL), so for the client's own ceiling, run the server stand-alone.
+"""
+# Standard Imports
+import itertools
+import statistics
+import threading
+import time
+
+# Project internal imports
+from bgp_ls_vis.proto import POOL, GoBGPQueryWrapper, LsdbDelta
+from bgp_ls_vis.proto.fake_server import FakeGobgpServicer, serve
+
+from .common import DUMPS_DIR, best_of
+
+MODES = {
+    "MessageToDict": {"direct_decode": False},
+    "direct": {},
+    "binary": {"binary": True},
+}
+DUMP = f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml"
+
+
+def bench_list_path(copies: int):
+    """Prints get_lsdb throughput for each mode on a static table"""
+    servicer = FakeGobgpServicer.from_file(DUMP, copies=copies)
+    server, port = serve(servicer)
+    size = len(servicer.lsdb)
+    timings = {}
+    for mode, kwargs in MODES.items():
+        wrapper = GoBGPQueryWrapper("127.0.0.1", port, **kwargs)
+        assert len(wrapper.get_lsdb()) == size, f"{mode} lost LSAs"
+        timings[mode] = best_of(wrapper.get_lsdb, repeat=3)
+    POOL.close()
+    server.stop(None)
+    for mode, t_get in timings.items():
+        print(
+            f"{size:>6} {mode:>14} {t_get * 1e3:>9.1f}ms {size / t_get:>10.0f}/s"
+            f" {timings['MessageToDict'] / t_get:>6.2f}x"
+        )
+
+
+def bench_monitor(copies: int, changes: int = 200):
+    """Prints the delay from a change on the server to watch_lsdb yielding it
+
+    Changes are made one at a time, each once the previous one has been received.
+    """
+    servicer = FakeGobgpServicer.from_file(DUMP, copies=copies)
+    server, port = serve(servicer)
+    wrapper = GoBGPQueryWrapper("127.0.0.1", port)
+    links = [lsa for lsa in servicer.lsdb if lsa["type"] == "Link"]
+    received = threading.Semaphore(0)
+    delays = []
+
+    def change():
+        time.sleep(0.2)  # let the watcher subscribe
+        for number, lsa in enumerate(itertools.islice(itertools.cycle(links), changes)):
+            start = time.perf_counter()
+            servicer.change(LsdbDelta(number % 2 == 0, lsa))
+            received.acquire()  # pylint: disable=consider-using-with
+            delays.append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=change)
+    thread.start()
+    for _ in itertools.islice(wrapper.watch_lsdb(False), changes):
+        received.release()
+    thread.join()
+    POOL.close()
+    server.stop(None)
+    delays.sort()
+    print(
+        f"{len(links):>6} links  median {statistics.median(delays) * 1e3:>6.2f}ms"
+        f"  p99 {delays[int(len(delays) * 0.99)] * 1e3:>6.2f}ms"
+    )
+
+
+def bench_churn(rates=(100, 1000, 5000), seconds: float = 1.0):
+    """Prints the deltas a watcher receives per second, against the server's churn rate"""
+    for rate in rates:
+        servicer = FakeGobgpServicer.from_file(DUMP, copies=10, churn_rate=rate)
+        server, port = serve(servicer)
+        wrapper = GoBGPQueryWrapper("127.0.0.1", port)
+        received = 0
+        start = time.perf_counter()
+        for _ in wrapper.watch_lsdb(False):
+            received += 1
+            if time.perf_counter() - start >= seconds:
+                break
+        elapsed = time.perf_counter() - start
+        POOL.close()
+        server.stop(None)
+        print(
+            f"churn {rate:>6}/s  made {servicer.changes / elapsed:>7.0f}/s"
+            f"  received {received / elapsed:>7.0f}/s"
+        )
+
+
+def main():
+    """Runs the benchmark and prints tables of results"""
+    print(f"{'lsas':>6} {'mode':>14} {'get_lsdb':>11} {'lsas/s':>11} {'speedup':>7}")
+    for copies in (10, 100):
+        bench_list_path(copies)
+    print()
+    for copies in (1, 100):
+        bench_monitor(copies)
+    print()
+    bench_churn()
+
+
+if __name__ == "__main__":
+    main()
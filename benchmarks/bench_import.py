@@ -0,0 +1,97 @@
+"""Benchmark: import time of each entry point, and the heavy modules it loads
+
+Each case runs in a fresh interpreter, which times its statements (imports included) and lists
+which of HEAVY_MODULES ended up loaded. "offline" loads a snapshot file with connect=False, which
+needs neither gRPC, the generated GoBGP modules, PyYAML nor matplotlib (See: bgp_ls_vis.lazy);
+"connect" builds a wrapper for a GoBGP instance, which loads gRPC and the GoBGP stubs.
+"""
+# Standard Imports
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Project internal imports
+from bgp_ls_vis.proto.snapshot import convert_yaml_dump
+
+from .common import DUMPS_DIR, REPO_ROOT
+
+HEAVY_MODULES = (
+    "grpc",
+    "yaml",
+    "google.protobuf.json_format",
+    "bgp_ls_vis.proto.gobgp_pb2",
+    "bgp_ls_vis.proto.attribute_pb2",
+    "networkx",
+    "numpy",
+    "matplotlib",
+    "matplotlib.pyplot",
+    "dash",
+    "plotly",
+)
+
+CASES = {
+    "proto": "import bgp_ls_vis.proto",
+    "proto.lsa": "import bgp_ls_vis.proto.lsa",
+    "graphing": "import bgp_ls_vis.graphing",
+    "dashboard": "import bgp_ls_vis.dashboard",
+    "offline": (
+        "from bgp_ls_vis.proto import GoBGPQueryWrapper\n"
+        "from bgp_ls_vis.graphing import build_nx_from_lsdb\n"
+        "build_nx_from_lsdb(GoBGPQueryWrapper(connect=False).get_lsdb(SNAPSHOT))"
+    ),
+    "connect": (
+        "from bgp_ls_vis.proto import GoBGPQueryWrapper\n"
+        "GoBGPQueryWrapper('127.0.0.1', '50051')"
+    ),
+}
+
+# Run in the child: times the case, then prints the time and the heavy modules loaded
+CHILD = """
+import sys, time
+SNAPSHOT = sys.argv[1]
+start = time.perf_counter()
+exec(sys.argv[2])
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(" ".join(name for name in sys.argv[3:] if name in sys.modules))
+"""
+
+
+def run_case(code: str, snapshot: str) -> tuple:
+    """Runs one case in a fresh interpreter
+
+    Returns:
+        Tuple of (seconds taken by the case, whole process wall seconds, heavy modules loaded)
+    """
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, snapshot, code, *HEAVY_MODULES],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    wall = time.perf_counter() - start
+    return float(output[0]), wall, output[1].split()
+
+
+def main(repeat: int = 5):
+    """Runs each case `repeat` times and prints their median times"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapshot = os.path.join(tmpdir, "table.bgpls")
+        convert_yaml_dump(f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml", snapshot)
+        print(f"{'case':>10} {'import':>10} {'process':>10}  heavy modules loaded")
+        for name, code in CASES.items():
+            runs = [run_case(code, snapshot) for _ in range(repeat)]
+            print(
+                f"{name:>10} {statistics.median(run[0] for run in runs) * 1e3:>8.1f}ms"
+                f" {statistics.median(run[1] for run in runs) * 1e3:>8.1f}ms"
+                f"  {' '.join(runs[0][2]) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: incremental SPF (graphing.ispf) vs full SPF recomputation, by churn rate
+
+A synthetic topology (random routers plus LAN pseudonodes) churns with link metric changes and
+flaps. Each round applies a batch of deltas, then needs current costs: IncrementalSpf repairs the
+trees after each delta, while the full recomputation applies the batch with a GraphUpdater and
+reruns AllPairsSpf. The more deltas per round, the more the full run amortizes; both must agree on
+every router to router cost at the end. One topology also has a second, equal or dearer link
+alongside one link in ten.
+"""
+# Standard Imports
+import random
+import time
+
+import numpy as np
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.graphing.incremental import GraphUpdater
+from bgp_ls_vis.graphing.ispf import IncrementalSpf
+from bgp_ls_vis.graphing.spf import AllPairsSpf
+from bgp_ls_vis.proto import LsdbDelta
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+from bgp_ls_vis.proto.synthetic import generate_lsdb, random_topology, with_segments
+
+ROUNDS = 5
+
+
+def topology_lsdb(routers: int, parallel: bool = False, seed: int = 0) -> list:
+    """LSDB of a random topology with LANs, optionally with parallel links"""
+    topology = with_segments(random_topology(routers, seed=seed), routers // 20)
+    if parallel:
+        rng = random.Random(seed)
+        twins = [
+            link._replace(metric=link.metric * rng.choice((1, 2, 5)))
+            for link in rng.sample(topology.links, len(topology.links) // 10)
+        ]
+        topology = topology._replace(links=topology.links + twins)
+    return list(generate_lsdb(topology))
+
+
+def churn(lsdb: list, count: int, rng: random.Random) -> list:
+    """count LsdbDeltas of random metric changes and link flaps on an LSDB"""
+    links = [lsa for lsa in lsdb if lsa["type"] == "Link"]
+    down = []
+    deltas = []
+    for _ in range(count):
+        if down and rng.random() < 0.3:
+            deltas.append(LsdbDelta(False, down.pop()))
+        elif rng.random() < 0.3:
+            down.append(rng.choice(links))
+            deltas.append(LsdbDelta(True, down[-1]))
+        else:
+            lsa = lsa_from_dict(rng.choice(links).to_dict())
+            lsa["lsattribute"]["link"]["igpMetric"] = rng.choice((10, 10, 20, 50, 100))
+            deltas.append(LsdbDelta(False, lsa))
+    return deltas
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'topology':>9} {'routers':>8} {'deltas/round':>13} {'full':>10} {'ispf':>10}"
+        f" {'per delta':>10} {'trees/delta':>12} {'speedup':>8}"
+    )
+    cases = [("random", 300, False), ("random", 1000, False), ("parallel", 300, True)]
+    for kind, routers, parallel in cases:
+        lsdb = topology_lsdb(routers, parallel)
+        for rate in (1, 10, 100, 1000):
+            rng = random.Random(rate)
+            rounds = [churn(lsdb, rate, rng) for _ in range(ROUNDS)]
+
+            graph = build_nx_from_lsdb(lsdb)
+            updater = GraphUpdater(graph, lsdb)
+            start = time.perf_counter()
+            for deltas in rounds:
+                updater.apply_all(deltas)
+                spf = AllPairsSpf(CsrTopology.from_networkx(graph))
+            t_full = (time.perf_counter() - start) / ROUNDS
+
+            ispf = IncrementalSpf(build_nx_from_lsdb(lsdb), lsdb)
+            trees = 0
+            start = time.perf_counter()
+            for deltas in rounds:
+                for delta in deltas:
+                    trees += ispf.apply(delta)
+            t_ispf = (time.perf_counter() - start) / ROUNDS
+
+            positions = [ispf.index[name] for name in spf.names]
+            assert np.array_equal(ispf.costs[np.ix_(positions, positions)], spf.costs)
+            print(
+                f"{kind:>9} {routers:>8} {rate:>13} {t_full * 1e3:>8.1f}ms {t_ispf * 1e3:>8.1f}ms"
+                f" {t_ispf / rate * 1e6:>8.0f}us {trees / rate / ROUNDS:>12.1f}"
+                f" {t_full / t_ispf:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
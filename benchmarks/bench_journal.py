@@ -0,0 +1,96 @@
+"""Benchmark: delta journal (proto.journal) vs a full snapshot of the table every minute
+
+Simulates a day of a network (copies of the 18 node IS-IS dump) with a few link metric changes
+and flaps a minute, journaled as MonitorTable deltas with hourly checkpoints. Compares its size
+with one snapshot file per minute, and the time to rebuild the LSDB at a random minute with the
+time to load that minute's snapshot. Also times diffing a full table pull (record_table).
+"""
+# Standard Imports
+import os
+import random
+import tempfile
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper, LsdbDelta, nlri_key
+from bgp_ls_vis.proto.journal import JournalReader, JournalWriter
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+from bgp_ls_vis.proto.snapshot import write_snapshot
+
+from .common import DUMPS_DIR, best_of, binary_responses, scale_isis_lsdb
+
+MINUTES = 24 * 60
+CHANGES_PER_MINUTE = 5
+
+
+def churn(lsdb: list, rng: random.Random):
+    """Yields (minute, LsdbDelta) of random metric changes and link flaps on an LSDB"""
+    links = [lsa for lsa in lsdb if lsa["type"] == "Link"]
+    down = []
+    for minute in range(1, MINUTES):
+        for _ in range(CHANGES_PER_MINUTE):
+            if down and rng.random() < 0.3:
+                yield minute, LsdbDelta(False, down.pop())
+            elif rng.random() < 0.3:
+                down.append(rng.choice(links))
+                yield minute, LsdbDelta(True, down[-1])
+            else:
+                lsa = lsa_from_dict(rng.choice(links).to_dict())
+                lsa["lsattribute"]["link"]["igpMetric"] = rng.randint(1, 1000)
+                yield minute, LsdbDelta(False, lsa)
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml")
+    print(
+        f"{'lsas':>6} {'snapshots/day':>14} {'journal/day':>12} {'ratio':>6}"
+        f" {'load snapshot':>14} {'lsdb_at':>10} {'record_table':>13}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        journal_path = os.path.join(tmpdir, "lsdb.journal")
+        snapshot_path = os.path.join(tmpdir, "table.bgpls")
+        for copies in (10, 100):
+            scaled = [lsa_from_dict(lsa) for lsa in scale_isis_lsdb(lsdb, copies)]
+            rng = random.Random(copies)
+            state = {nlri_key(lsa): lsa for lsa in scaled}
+            minute = rng.randrange(1, MINUTES)
+
+            with JournalWriter(journal_path, checkpoint_interval=60) as journal:
+                journal.record_table(scaled, timestamp=0)
+                for timestamp, delta in churn(scaled, rng):
+                    journal.record(delta, timestamp=timestamp)
+                    if delta.withdraw:
+                        state.pop(nlri_key(delta.lsa), None)
+                    else:
+                        state[nlri_key(delta.lsa)] = delta.lsa
+                    if timestamp == minute:
+                        expected = list(state.values())
+
+                pull = [lsa_from_dict(lsa.to_dict()) for lsa in journal.lsdb]
+                t_diff = best_of(
+                    lambda: journal.record_table(pull, timestamp=MINUTES), repeat=3
+                )
+
+            write_snapshot(snapshot_path, binary_responses(expected))
+            with JournalReader(journal_path) as reader:
+                assert sorted(map(repr, reader.lsdb_at(minute))) == sorted(
+                    map(repr, expected)
+                ), "journal replay disagrees"
+                t_replay = best_of(lambda: reader.lsdb_at(minute), repeat=3)
+            t_snapshot = best_of(lambda: wrapper.get_lsdb(snapshot_path), repeat=3)
+
+            snapshots = os.path.getsize(snapshot_path) * MINUTES
+            journal_size = os.path.getsize(journal_path)
+            print(
+                f"{len(scaled):>6} {snapshots / 2**20:>12.0f}MB"
+                f" {journal_size / 2**20:>10.1f}MB {snapshots / journal_size:>5.0f}x"
+                f" {t_snapshot * 1e3:>12.1f}ms {t_replay * 1e3:>8.1f}ms"
+                f" {t_diff * 1e3:>11.1f}ms"
+            )
+            os.remove(journal_path)
+            os.remove(journal_path + ".idx")
+
+
+if __name__ == "__main__":
+    main()
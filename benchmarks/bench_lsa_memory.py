@@ -0,0 +1,52 @@
+"""Benchmark: memory per LSA for nested dicts vs slotted LSA records (proto.lsa)
+
+Scales the 18-node dump up synthetically (disjoint renamed copies) and measures, with
+tracemalloc, the memory retained by the LSDB in each representation.
+"""
+# Standard Imports
+import gc
+import json
+import os
+import tracemalloc
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+
+from .common import DUMPS_DIR, scale_lsdb
+
+DUMP = os.path.join(DUMPS_DIR, "18-node-isis-w-bcast-segment.yaml")
+
+
+def retained_bytes(build) -> int:
+    """Bytes still allocated after build() returns, with its return value kept alive"""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()  # pylint: disable=unused-variable
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    lsdb = GoBGPQueryWrapper(connect=False).get_lsdb(filename=DUMP)
+    print(
+        f"{'copies':>6} {'lsas':>8} {'dict B/LSA':>11} {'record B/LSA':>13} {'ratio':>6}"
+    )
+    for copies in (1, 10, 100, 500):
+        text = json.dumps(scale_lsdb(lsdb, copies))
+        count = copies * len(lsdb)
+        as_dicts = retained_bytes(lambda: json.loads(text))
+        as_records = retained_bytes(
+            lambda: [lsa_from_dict(lsa) for lsa in json.loads(text)]
+        )
+        print(
+            f"{copies:>6} {count:>8} {as_dicts / count:>11.0f} {as_records / count:>13.0f}"
+            f" {as_dicts / as_records:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: merging the LSDBs of many collectors (proto.merge)
+
+Simulates 12 collectors peering with the same network (copies of the 18 node IS-IS dump), each
+reporting a random 90% of its LSAs in its own order. merge_lsdbs is timed against deduplicating
+on a JSON rendering of each LSA's NLRI fields, and the graph of the merged LSDB is compared with
+the graph of the feeds concatenated, which repeats each link once per collector.
+"""
+# Standard Imports
+import json
+import os
+import random
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.proto import GoBGPQueryWrapper, merge_lsdbs
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+
+from .common import DUMPS_DIR, best_of, scale_isis_lsdb
+
+COLLECTORS = 12
+
+
+def json_dedup(feeds: dict) -> list:
+    """Reference merge: one LSA per JSON rendering of its fields other than lsattribute"""
+    merged = {}
+    for feed in feeds.values():
+        for lsa in feed:
+            fields = {key: lsa[key] for key in lsa.keys() if key != "lsattribute"}
+            merged.setdefault(json.dumps(fields, sort_keys=True, default=dict), lsa)
+    return list(merged.values())
+
+
+def collector_feeds(lsdb: list, seed: int = 0) -> dict:
+    """Overlapping feeds of COLLECTORS collectors, each missing a random 10% of the LSDB"""
+    rng = random.Random(seed)
+    feeds = {}
+    for collector in range(COLLECTORS):
+        feed = [lsa for lsa in lsdb if rng.random() < 0.9]
+        rng.shuffle(feed)
+        feeds[f"collector-{collector}"] = feed
+    return feeds
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(
+        os.path.join(DUMPS_DIR, "18-node-isis-w-bcast-segment.yaml")
+    )
+    print(
+        f"{'lsas':>7} {'fed':>8} {'merged':>7} {'json dedup':>11} {'merge':>10}"
+        f" {'speedup':>8} {'concat edges':>13} {'merged edges':>13}"
+    )
+    for copies in (10, 100, 500):
+        scaled = [lsa_from_dict(lsa) for lsa in scale_isis_lsdb(lsdb, copies)]
+        feeds = collector_feeds(scaled)
+        fed = sum(len(feed) for feed in feeds.values())
+
+        merged = merge_lsdbs(feeds)
+        assert len(merged.lsdb) == len(json_dedup(feeds)), "merges disagree"
+        assert all(len(seen_by) >= 1 for seen_by in merged.sources)
+
+        t_json = best_of(lambda: json_dedup(feeds), repeat=1)
+        t_merge = best_of(lambda: merge_lsdbs(feeds), repeat=3)
+        concat = build_nx_from_lsdb(
+            [lsa for feed in feeds.values() for lsa in feed]
+        ).number_of_edges()
+        print(
+            f"{len(scaled):>7} {fed:>8} {len(merged.lsdb):>7}"
+            f" {t_json * 1e3:>9.1f}ms {t_merge * 1e3:>8.1f}ms {t_json / t_merge:>7.1f}x"
+            f" {concat:>13} {build_nx_from_lsdb(merged.lsdb).number_of_edges():>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: ingesting MRT files (proto.mrt) vs snapshot files
+
+A scaled table (copies of the 18 node IS-IS dump) is written as an MRT TABLE_DUMP_V2 file, plain
+and gzip compressed, and as a BGP4MP update stream of the same LSAs, then read back with
+iter_mrt_lsdb. Load times are compared with the snapshot file of the same table (See:
+bench_snapshot.py for snapshot files vs YAML dumps).
+"""
+# Standard Imports
+import gzip
+import os
+import shutil
+import tempfile
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper, LsdbDelta
+from bgp_ls_vis.proto.lsa import lsa_from_dict
+from bgp_ls_vis.proto.mrt import (
+    iter_mrt_lsdb,
+    write_mrt_table_dump,
+    write_mrt_updates,
+)
+from bgp_ls_vis.proto.snapshot import write_snapshot
+
+from .common import DUMPS_DIR, best_of, binary_responses, scale_isis_lsdb
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(f"{DUMPS_DIR}/18-node-isis-w-bcast-segment.yaml")
+    print(f"{'lsas':>6} {'format':>14} {'size':>9} {'load':>10} {'vs snapshot':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = {
+            name: os.path.join(tmpdir, name)
+            for name in ("snapshot", "mrt table", "mrt table.gz", "mrt updates")
+        }
+        for copies in (10, 100):
+            scaled = [lsa_from_dict(lsa) for lsa in scale_isis_lsdb(lsdb, copies)]
+            write_snapshot(paths["snapshot"], binary_responses(scaled))
+            write_mrt_table_dump(paths["mrt table"], scaled, timestamp=1)
+            with open(paths["mrt table"], "rb") as plain, gzip.open(
+                paths["mrt table.gz"], "wb"
+            ) as compressed:
+                shutil.copyfileobj(plain, compressed)
+            write_mrt_updates(
+                paths["mrt updates"],
+                ((second, LsdbDelta(False, lsa)) for second, lsa in enumerate(scaled)),
+            )
+
+            loaders = {"snapshot": lambda: wrapper.get_lsdb(paths["snapshot"])}
+            for name in ("mrt table", "mrt table.gz", "mrt updates"):
+                loaders[name] = lambda path=paths[name]: list(iter_mrt_lsdb(path))
+                assert loaders[name]() == scaled, f"{name} disagrees"
+
+            timings = {name: best_of(load, repeat=3) for name, load in loaders.items()}
+            for name, t_load in timings.items():
+                print(
+                    f"{len(scaled):>6} {name:>14}"
+                    f" {os.path.getsize(paths[name]) / 1024:>7.0f}KB"
+                    f" {t_load * 1e3:>8.1f}ms {timings['snapshot'] / t_load:>11.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
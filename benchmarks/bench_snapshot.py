@@ -0,0 +1,76 @@
+"""Benchmark: YAML table dumps vs snapshot files (proto.snapshot), for saving and loading
+
+Each table dump (scaled up, to be representative of a larger network) is saved as YAML, the way
+GoBGPQueryWrapper.debug() output has been dumped so far, and as a snapshot file, the way
+GoBGPQueryWrapper.save_snapshot writes it. Both are then loaded with GoBGPQueryWrapper.get_lsdb,
+which must give the same LSDB.
+"""
+# Standard Imports
+import os
+import tempfile
+
+import yaml
+from google.protobuf.json_format import MessageToDict
+
+# Project internal imports
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.binary import add_binary_fields
+from bgp_ls_vis.proto.snapshot import write_snapshot
+
+from .common import best_of, dump_files, dump_responses, scale_responses
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'dump':40} {'lsas':>6} {'format':>8} {'size':>9}"
+        f" {'save':>10} {'load':>10} {'speedup':>8}"
+    )
+    wrapper = GoBGPQueryWrapper(connect=False)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yaml_path = os.path.join(tmpdir, "table.yaml")
+        snapshot_path = os.path.join(tmpdir, "table.bgpls")
+        for filename in dump_files():
+            for copies in (1, 20):
+                responses = [
+                    add_binary_fields(response)
+                    for response in scale_responses(dump_responses(filename), copies)
+                ]
+                wire = [response.SerializeToString() for response in responses]
+                table = [MessageToDict(response) for response in responses]
+
+                def save_yaml():
+                    with open(yaml_path, "w") as dump:
+                        yaml.dump(table, dump)
+
+                def save_snapshot():
+                    write_snapshot(snapshot_path, wire)
+
+                t_save_yaml = best_of(save_yaml, repeat=1)
+                t_save_snapshot = best_of(save_snapshot, repeat=3)
+
+                lsdb = wrapper.get_lsdb(snapshot_path)
+                assert lsdb == wrapper.get_lsdb(
+                    yaml_path
+                ), f"formats disagree on {filename}"
+
+                t_load_yaml = best_of(lambda: wrapper.get_lsdb(yaml_path), repeat=1)
+                t_load_snapshot = best_of(
+                    lambda: wrapper.get_lsdb(snapshot_path), repeat=3
+                )
+
+                name = os.path.basename(filename) + f" x{copies}"
+                for fmt, path, t_save, t_load in (
+                    ("yaml", yaml_path, t_save_yaml, t_load_yaml),
+                    ("snapshot", snapshot_path, t_save_snapshot, t_load_snapshot),
+                ):
+                    print(
+                        f"{name:40} {len(lsdb):>6} {fmt:>8}"
+                        f" {os.path.getsize(path) / 1024:>7.0f}KB"
+                        f" {t_save * 1e3:>8.1f}ms {t_load * 1e3:>8.1f}ms"
+                        f" {t_load_yaml / t_load:>7.1f}x"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: all-pairs SPF (graphing.spf) vs networkx Dijkstra from every node
+
+Synthetic IGP-like topologies (small-world graphs with random metrics, plus LAN pseudonodes) are
+built as graphs with the `cost` and `pseudonode` edge attributes set by build_nx_from_lsdb, along
+with rings of routers (proto.synthetic.ring_topology), whose shortest paths run over up to half the
+routers. Both must agree on every router to router cost.
+"""
+# Standard Imports
+import random
+
+import networkx as nx
+import numpy as np
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.graphing.spf import AllPairsSpf
+from bgp_ls_vis.proto.synthetic import generate_lsdb, ring_topology
+
+from .common import best_of
+
+
+def synthetic_graph(routers: int, lans: int, seed: int = 0) -> nx.MultiDiGraph:
+    """Small-world topology of point to point links, plus LANs of 3-6 routers on a pseudonode"""
+    rand = random.Random(seed)
+    graph = nx.MultiDiGraph()
+    base = nx.connected_watts_strogatz_graph(routers, 4, 0.2, seed=seed)
+    for local, remote in base.edges:
+        cost = rand.choice((10, 10, 20, 50, 100))
+        graph.add_edge(local, remote, cost=cost, pseudonode=False)
+        graph.add_edge(remote, local, cost=cost, pseudonode=False)
+    for lan in range(lans):
+        pseudonode = f"{lan}-pn"
+        for member in rand.sample(range(routers), rand.randint(3, 6)):
+            graph.add_edge(member, pseudonode, cost=10, pseudonode=True)
+            graph.add_edge(pseudonode, member, cost=0, pseudonode=False)
+    return graph
+
+
+def ring_graph(routers: int) -> nx.MultiDiGraph:
+    """Ring of routers, the highest diameter topology for its size"""
+    return build_nx_from_lsdb(generate_lsdb(ring_topology(routers)))
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    print(
+        f"{'topology':>12} {'routers':>8} {'edges':>8} {'networkx':>10} {'spf':>10}"
+        f" {'speedup':>8}"
+    )
+    cases = [
+        ("small-world", routers, synthetic_graph(routers, routers // 20))
+        for routers in (100, 300, 1000, 2000)
+    ] + [("ring", routers, ring_graph(routers)) for routers in (100, 500, 1000, 2000)]
+    for kind, routers, graph in cases:
+        topology = CsrTopology.from_networkx(graph)
+        spf = AllPairsSpf(topology)
+
+        def baseline():
+            return dict(nx.all_pairs_dijkstra_path_length(graph, weight="cost"))
+
+        lengths = baseline()
+        for source in spf.names[:20]:
+            expected = [lengths[source].get(target, np.inf) for target in spf.names]
+            assert (spf.costs[spf.index[source]] == expected).all()
+
+        t_nx = best_of(baseline, repeat=1)
+        t_spf = best_of(lambda: AllPairsSpf(topology), repeat=3)
+        print(
+            f"{kind:>12} {routers:>8} {graph.number_of_edges():>8} {t_nx * 1e3:>8.1f}ms"
+            f" {t_spf * 1e3:>8.1f}ms {t_nx / t_spf:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: reading one router's LSAs from a snapshot file vs an indexed store (proto.store)
+
+The 18 node IS-IS dump is scaled up to a few thousand routers and written both as a snapshot
+file, which has to be loaded whole before any router can be looked at, and as a store file. It
+then times looking up one router's links and prefixes, and building the 2-hop subgraph around it
+(which, from the snapshot file, costs as much as building the whole graph).
+"""
+# Standard Imports
+import os
+import tempfile
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto.snapshot import write_snapshot
+from bgp_ls_vis.proto.store import SnapshotStore, write_store
+
+from .common import DUMPS_DIR, best_of, binary_responses, load_dump, scale_isis_lsdb
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    lsdb = wrapper.get_lsdb(
+        os.path.join(DUMPS_DIR, "18-node-isis-w-bcast-segment.yaml")
+    )
+    print(f"{'lsas':>8} {'task':>10} {'snapshot':>10} {'store':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapshot_path = os.path.join(tmpdir, "table.bgpls")
+        store_path = os.path.join(tmpdir, "table.idx")
+        for copies in (10, 100, 1000):
+            responses = binary_responses(scale_isis_lsdb(lsdb, copies))
+            write_snapshot(snapshot_path, responses)
+            write_store(store_path, responses)
+            igp_rid = f"{copies // 2:04x}.9000.0001"
+
+            def snapshot_lookup():
+                return [
+                    lsa
+                    for lsa in wrapper.iter_lsdb(snapshot_path)
+                    if lsa["localNode"]["igpRouterId"] == igp_rid
+                    and lsa["type"] != "Node"
+                ]
+
+            def store_lookup():
+                with SnapshotStore(store_path) as store:
+                    return store.links(igp_rid) + store.prefixes(igp_rid)
+
+            def snapshot_subgraph():
+                return build_nx_from_lsdb(wrapper.iter_lsdb(snapshot_path))
+
+            def store_subgraph():
+                with SnapshotStore(store_path) as store:
+                    return build_nx_from_lsdb(store.neighbourhood([igp_rid], depth=2))
+
+            assert sorted(map(repr, snapshot_lookup())) == sorted(
+                map(repr, store_lookup())
+            )
+            for task, t_snapshot, t_store in (
+                ("lookup", best_of(snapshot_lookup, 3), best_of(store_lookup, 3)),
+                ("subgraph", best_of(snapshot_subgraph, 3), best_of(store_subgraph, 3)),
+            ):
+                print(
+                    f"{len(responses):>8} {task:>10} {t_snapshot * 1e3:>8.1f}ms"
+                    f" {t_store * 1e3:>8.1f}ms {t_snapshot / t_store:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Shared helpers for the benchmark scripts"""
+# Standard Imports
+import glob
+import json
+import os
+import re
+import time
+
+import yaml
+
+# Project internal imports
+from bgp_ls_vis.proto import gobgp_pb2 as gobgp
+from bgp_ls_vis.proto.fake_server import replicate_isis_lsdb
+from bgp_ls_vis.proto.snapshot import responses_from_dump
+from bgp_ls_vis.proto.synthetic import list_path_responses
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DUMPS_DIR = os.path.join(REPO_ROOT, "tests", "bgp-ls_table_dumps")
+
+
+def dump_files() -> list:
+    """Paths of the captured BGP-LS table dumps under tests/"""
+    return sorted(glob.glob(os.path.join(DUMPS_DIR, "*.y*ml")))
+
+
+def load_dump(filename: str) -> list:
+    """Loads a YAML BGP-LS table dump, as written from GoBGPQueryWrapper.debug()"""
+    with open(filename, "r") as dump:
+        return yaml.load(dump, Loader=yaml.Loader)
+
+
+def dump_responses(filename: str) -> list:
+    """Loads a YAML BGP-LS table dump back into ListPathResponse protobufs
+
+    Returns:
+        List of gobgp.ListPathResponse, as the ListPath RPC would have streamed them
+    """
+    return responses_from_dump(load_dump(filename))
+
+
+class StaticStub:
+    """Stand-in for GobgpApiStub which replays a fixed list of ListPath responses
+
+    With raw set, it stands in for proto.binary.RawGobgpApiStub instead, yielding wire bytes.
+    """
+
+    def __init__(self, responses: list, raw: bool = False):
+        self.wire = [response.SerializeToString() for response in responses]
+        self.raw = raw
+
+    def ListPath(
+        self, request, timeout=None
+    ):  # pylint: disable=invalid-name,unused-argument
+        """Replays the stored responses, parsing from wire bytes as a real channel would"""
+        if self.raw:
+            return iter(self.wire)
+        return (gobgp.ListPathResponse.FromString(wire) for wire in self.wire)
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best wall-clock time in seconds over `repeat` calls of func()"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scale_lsdb(lsdb: list, copies: int) -> list:
+    """Synthetically scales up an LSDB by repeating it with renamed routers
+
+    Each copy gets its own router IDs and hostnames (suffixed with the copy number), so the
+    result looks like `copies` disjoint instances of the original topology.
+
+    Args:
+        lsdb: LSDB from GoBGPQueryWrapper.get_lsdb
+        copies: Number of copies to make
+
+    Returns:
+        List of LSA dicts, freshly allocated (no strings shared between LSAs)
+    """
+    template = json.dumps(
+        [lsa.to_dict() if hasattr(lsa, "to_dict") else lsa for lsa in lsdb]
+    )
+    scaled = []
+    for copy in range(copies):
+        suffix = f"-{copy}"
+        text = re.sub(
+            r'"(igpRouterId|localRouterId|remoteRouterId|name)": "([^"]+)"',
+            lambda match: f'"{match.group(1)}": "{match.group(2)}{suffix}"',
+            template,
+        )
+        scaled.extend(json.loads(text))
+    return scaled
+
+
+def scale_responses(responses: list, copies: int) -> list:
+    """Repeats a list of ListPath responses, for timing decoders on larger tables"""
+    return list(responses) * copies
+
+
+def scale_isis_lsdb(lsdb: list, copies: int) -> list:
+    """Like scale_lsdb, but keeps IS-IS router IDs valid so the LSAs can be re-encoded
+
+    See: proto.fake_server.replicate_isis_lsdb
+    """
+    return replicate_isis_lsdb(lsdb, copies)
+
+
+def binary_responses(lsdb: list) -> list:
+    """Encodes LSAs as the ListPath responses of a binary mode query
+
+    See: proto.synthetic.list_path_responses
+    """
+    return list(list_path_responses(lsdb))
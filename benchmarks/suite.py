@@ -0,0 +1,295 @@
+"""End-to-end benchmark suite: every pipeline stage, on the dumps and synthetic tables
+
+Runs each stage of the pipeline on each table, and records its wall and CPU time, peak RSS and
+Python allocations as JSON:
+
+    ingest      GoBGPQueryWrapper.get_lsdb(filename): the YAML dump, or a snapshot file
+    filter      get_lsdb over a replayed ListPath stream, via MessageToDict and filtering
+    build       graphing.build_nx_from_lsdb
+    layout      nx.spring_layout
+    render      graphing.draw_pyplot_graph, to a PNG with the Agg backend
+    elements    dashboard.cytoscape_elements
+
+Tables are the dumps under tests/ and random synthetic topologies (proto.synthetic) of 1k, 10k
+and 50k routers. Synthetic tables are generated once and cached in the temp directory. Each table
+runs in its own process, so peak RSS is its own; layout and render, which scale quadratically, are
+skipped for graphs above --layout-limit nodes. Stages missing an optional dependency (scipy for
+layouts of 500 nodes or more) are recorded as skipped.
+
+    python -m benchmarks.suite run -o before.json
+    python -m benchmarks.suite run -o after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.1
+
+compare exits with status 1 if any wall time, peak RSS or allocation peak grew by more than the
+threshold (a fraction) between the runs, ignoring differences below a noise floor.
+"""
+# Standard Imports
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+# pylint: disable=wrong-import-position
+import networkx as nx
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb, draw_pyplot_graph
+from bgp_ls_vis.proto import GoBGPQueryWrapper
+from bgp_ls_vis.proto import gobgp_pb2 as gobgp
+from bgp_ls_vis.proto.snapshot import iter_snapshot, write_snapshot
+from bgp_ls_vis.proto.synthetic import (
+    generate_lsdb,
+    list_path_responses,
+    random_topology,
+    with_segments,
+)
+
+from .common import StaticStub, dump_files, dump_responses
+
+STAGES = ("ingest", "filter", "build", "layout", "render", "elements")
+SIZES = (1000, 10000, 50000)
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "bgp-ls-vis-bench")
+
+# Metrics compared, and the difference below which a change is noise
+NOISE_FLOORS = {"wall": 0.005, "peak_rss": 2**20, "alloc_peak": 2**20}
+
+
+def synthetic_table(routers: int) -> str:
+    """Path of a cached snapshot of a random topology, generating it if missing
+
+    Responses carry both protobuf and binary fields, as GoBGP returns them in binary mode, so
+    the same file serves the binary decoder (ingest) and MessageToDict (filter).
+    """
+    filename = os.path.join(CACHE_DIR, f"random-{routers}.bgpls")
+    if not os.path.exists(filename):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        topology = with_segments(random_topology(routers), routers // 100)
+        write_snapshot(
+            filename + ".tmp", list_path_responses(generate_lsdb(topology), full=True)
+        )
+        os.replace(filename + ".tmp", filename)
+    return filename
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the kernel's peak RSS of this process (Linux), returning whether it could"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss() -> int:
+    """Peak RSS of this process in bytes, since the last _reset_peak_rss where supported"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def measure(func, repeat: int) -> tuple:
+    """Runs func repeat times for time and RSS, then once more under tracemalloc
+
+    Returns:
+        Tuple of (result of func, dict of metrics)
+    """
+    walls, cpus = [], []
+    _reset_peak_rss()
+    for _ in range(repeat):
+        start_cpu, start = time.process_time(), time.perf_counter()
+        result = func()
+        walls.append(time.perf_counter() - start)
+        cpus.append(time.process_time() - start_cpu)
+        del result
+    peak_rss = _peak_rss()
+
+    tracemalloc.start()
+    result = func()
+    retained, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "wall": min(walls),
+        "wall_median": sorted(walls)[len(walls) // 2],
+        "cpu": min(cpus),
+        "peak_rss": peak_rss,
+        "alloc_peak": alloc_peak,
+        "alloc_retained": retained,
+    }
+
+
+def run_table(filename: str, stages: tuple, repeat: int, layout_limit: int) -> dict:
+    """Runs the stages on one table file, returning {stage: metrics}"""
+    results = {}
+    wrapper = GoBGPQueryWrapper(connect=False)
+
+    def record(stage, func, count=None):
+        if stage not in stages:
+            return func() if stage in ("ingest", "build") else None
+        try:
+            result, metrics = measure(func, repeat)
+        except ImportError as err:
+            # e.g. spring_layout needs scipy for graphs of 500 nodes or more
+            results[stage] = {"skipped": str(err)}
+            return None
+        metrics["count"] = len(result) if count is None else count(result)
+        results[stage] = metrics
+        return result
+
+    lsdb = record("ingest", lambda: wrapper.get_lsdb(filename))
+
+    if "filter" in stages:
+        if filename.endswith(".bgpls"):
+            responses = [
+                gobgp.ListPathResponse.FromString(raw)
+                for raw in iter_snapshot(filename)
+            ]
+        else:
+            responses = dump_responses(filename)
+        legacy = GoBGPQueryWrapper(connect=False, direct_decode=False)
+        legacy.stub = StaticStub(responses)
+        del responses
+        record("filter", legacy.get_lsdb)
+        del legacy
+
+    graph = record("build", lambda: build_nx_from_lsdb(lsdb), len)
+    del lsdb
+
+    if graph.number_of_nodes() > layout_limit:
+        for stage in ("layout", "render"):
+            if stage in stages:
+                results[stage] = {"skipped": f"over {layout_limit} nodes"}
+        pos = None
+    else:
+        pos = record("layout", lambda: nx.spring_layout(graph, seed=0))
+        if "render" in stages and pos is None:
+            results["render"] = {"skipped": "no layout"}
+        elif "render" in stages:
+            record(
+                "render",
+                lambda: draw_pyplot_graph(graph, pos, outfile=io.BytesIO()),
+                lambda _: graph.number_of_nodes(),
+            )
+
+    if "elements" in stages:
+        try:
+            # pylint: disable=import-outside-toplevel
+            from bgp_ls_vis.dashboard import cytoscape_elements
+        except ImportError as err:
+            results["elements"] = {"skipped": str(err)}
+        else:
+            record("elements", lambda: cytoscape_elements(graph))
+    return results
+
+
+def run(args) -> dict:
+    """Runs the suite and writes its results as JSON"""
+    tables = {os.path.basename(filename): filename for filename in dump_files()}
+    for routers in args.sizes:
+        tables[f"random-{routers}"] = synthetic_table(routers)
+
+    results = {}
+    for name, filename in tables.items():
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            stages = pool.submit(
+                run_table, filename, tuple(args.stages), args.repeat, args.layout_limit
+            ).result()
+        for stage, metrics in stages.items():
+            results[f"{name}:{stage}"] = metrics
+            if "skipped" in metrics:
+                print(f"{name:40} {stage:>8}  skipped: {metrics['skipped']}")
+            else:
+                print(
+                    f"{name:40} {stage:>8} {metrics['wall'] * 1e3:>10.1f}ms"
+                    f" {metrics['peak_rss'] / 2**20:>8.0f}MB rss"
+                    f" {metrics['alloc_peak'] / 2**20:>8.1f}MB alloc"
+                    f" {metrics['count']:>8}"
+                )
+
+    report = {
+        "meta": {
+            "time": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "networkx": nx.__version__,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=1)
+    return report
+
+
+def compare(args) -> int:
+    """Prints the change of each metric between two runs, returning 1 on any regression"""
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before = json.load(before_file)["results"]
+        after = json.load(after_file)["results"]
+
+    regressions = 0
+    print(f"{'case':50} {'metric':>10} {'before':>12} {'after':>12} {'change':>8}")
+    for case in sorted(set(before) & set(after)):
+        for metric, floor in NOISE_FLOORS.items():
+            old, new = before[case].get(metric), after[case].get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            regressed = change > args.threshold and new - old > floor
+            regressions += regressed
+            if regressed or args.verbose:
+                print(
+                    f"{case:50} {metric:>10} {old:>12.4g} {new:>12.4g} {change:>+7.0%}"
+                    f"{'  REGRESSION' if regressed else ''}"
+                )
+    for case in sorted(set(before) ^ set(after)):
+        print(f"{case:50} only in {'before' if case in before else 'after'}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    """Parses arguments and runs or compares the suite"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("-o", "--output", default="benchmark-results.json")
+    run_parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    run_parser.add_argument("--stages", nargs="*", choices=STAGES, default=STAGES)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--layout-limit", type=int, default=2000)
+
+    compare_parser = commands.add_parser("compare", help="Compare two runs")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.add_argument("-v", "--verbose", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
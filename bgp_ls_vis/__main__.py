@@ -0,0 +1,9 @@
+"""Runs the bgp-ls-vis command line: python -m bgp_ls_vis (See: bgp_ls_vis.cli)"""
+# Standard Imports
+import sys
+
+# Project internal imports
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
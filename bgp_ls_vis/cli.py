@@ -0,0 +1,401 @@
+"""Headless command line for fetching, building, rendering and comparing BGP-LS tables
+
+    bgp-ls-vis fetch 172.20.10.2:50051 table.yaml        # YAML dump, as from debug()
+    bgp-ls-vis snapshot 172.20.10.2:50051 table.bgpls    # snapshot file (See: proto.snapshot)
+    bgp-ls-vis build snapshots/*.bgpls -o graphs/        # node-link JSON graph per table
+    bgp-ls-vis render snapshots/*.bgpls -o images/ --format svg
+    bgp-ls-vis diff old.bgpls new.bgpls                  # exits 1 if the LSDBs differ
+
+build and render take any number of table files, in any format get_lsdb loads, and process them
+in a pool of worker processes (one per CPU by default), largest file first. Workers render with
+matplotlib's Agg backend, so no display is needed. Their memory is bounded by recycling each
+worker after --max-tasks-per-child files, and optionally by an address space
+limit (--memory-limit, in MB), past which a file fails with MemoryError rather than the worker
+growing unchecked. A file that fails is reported on stderr and the others carry on; the exit
+status is then 1.
+
+Outputs are written to a temporary file and renamed into place, so a job serving the latest
+images never sees a partial one.
+"""
+# Standard Imports
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import networkx as nx
+
+# Project internal imports
+from .graphing import build_nx_from_lsdb, draw_pyplot_graph
+from .lazy import lazy_import
+from .proto import GoBGPQueryWrapper, diff_lsdbs
+
+grpc = lazy_import("grpc")
+# Only workers rendering images need matplotlib
+matplotlib = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+yaml = lazy_import("yaml")
+
+DEFAULT_PORT = "50051"
+FORMATS = ("png", "svg")
+
+
+def load_graph(filename: str):
+    """Builds the graph of a table file, streaming its LSAs (See: GoBGPQueryWrapper.iter_lsdb)"""
+    return build_nx_from_lsdb(GoBGPQueryWrapper(connect=False).iter_lsdb(filename))
+
+
+def _json_default(value):
+    """JSON form of LSA records, which graphs keep as node and edge attributes"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+@contextlib.contextmanager
+def replacing(outfile: str):
+    """Context manager giving a temporary path to write, renamed to outfile on success"""
+    directory, name = os.path.split(outfile)
+    tmpfile = os.path.join(directory, f".{name}.tmp")
+    try:
+        yield tmpfile
+        os.replace(tmpfile, outfile)
+    finally:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+
+
+def write_graph(graph, outfile: str):
+    """Writes a graph as node-link JSON, in the layout of nx.node_link_data(graph, edges="links")
+
+    LSA records kept as attributes are written in their dict form.
+    """
+    data = {
+        "directed": graph.is_directed(),
+        "multigraph": graph.is_multigraph(),
+        "graph": dict(graph.graph),
+        "nodes": [{"id": node, **attrs} for node, attrs in graph.nodes(data=True)],
+        "links": [
+            {"source": source, "target": target, "key": key, **attrs}
+            for source, target, key, attrs in graph.edges(keys=True, data=True)
+        ],
+    }
+    with replacing(outfile) as path, open(path, "w") as out:
+        json.dump(data, out, default=_json_default)
+
+
+def build_file(filename: str, outfile: str = None) -> tuple:
+    """Worker task: builds the graph of a table file, writing it as JSON if outfile is set
+
+    Returns:
+        Tuple of (nodes, edges, seconds taken)
+    """
+    start = time.perf_counter()
+    graph = load_graph(filename)
+    if outfile is not None:
+        write_graph(graph, outfile)
+    return graph.number_of_nodes(), graph.number_of_edges(), time.perf_counter() - start
+
+
+def render_file(filename: str, outfile: str, seed: int = 0) -> tuple:
+    """Worker task: renders the graph of a table file to an image, in savefig.format
+
+    Returns:
+        Tuple of (nodes, edges, seconds taken)
+    """
+    start = time.perf_counter()
+    graph = load_graph(filename)
+    pos = nx.spring_layout(graph, seed=seed)
+    try:
+        with replacing(outfile) as path, open(path, "wb") as out:
+            draw_pyplot_graph(graph, pos, outfile=out)
+    finally:
+        # draw_pyplot_graph only closes its figure once saved
+        plt.close("all")
+    return graph.number_of_nodes(), graph.number_of_edges(), time.perf_counter() - start
+
+
+def _init_worker(memory_limit: int, rc_params: dict):
+    """Pool initializer: Agg backend and rc_params (unless None), then the address space limit"""
+    if rc_params is not None:
+        matplotlib.use("Agg")
+        matplotlib.rcParams.update(rc_params)
+    if memory_limit:
+        import resource  # pylint: disable=import-outside-toplevel
+
+        limit = memory_limit * 2**20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_job(job: tuple) -> tuple:
+    """Pool task: runs (task, *arguments), catching its error so the batch carries on
+
+    Returns:
+        Tuple of (job, result, None), or (job, None, error message) if the task raised
+    """
+    task, *arguments = job
+    try:
+        return job, task(*arguments), None
+    except Exception as err:  # pylint: disable=broad-except
+        return job, None, f"{type(err).__name__}: {err}"
+
+
+def run_batch(task, jobs: list, args, rc_params: dict = None) -> int:
+    """Runs a worker task over table files in a process pool, printing each result as it ends
+
+    Args:
+        task: build_file or render_file
+        jobs: List of argument tuples for task, each starting with the table filename and the
+            output filename (or None)
+        args: Parsed arguments, for --jobs, --max-tasks-per-child and --memory-limit
+        rc_params: matplotlib rcParams set in each worker, None for tasks that draw nothing
+            (matplotlib is then not imported)
+
+    Returns:
+        Number of files that failed
+    """
+    # Largest first, so that one big table does not start last and hold up the batch. Missing
+    # files are left to fail in their worker, and be reported with the rest.
+    jobs = sorted(
+        jobs,
+        key=lambda job: os.path.getsize(job[0]) if os.path.exists(job[0]) else 0,
+        reverse=True,
+    )
+    failures = 0
+    # multiprocessing.Pool rather than ProcessPoolExecutor, whose max_tasks_per_child (3.11+)
+    # can deadlock once workers start being replaced
+    with multiprocessing.Pool(
+        min(args.jobs, len(jobs)) or 1,
+        initializer=_init_worker,
+        initargs=(args.memory_limit, rc_params),
+        maxtasksperchild=args.max_tasks_per_child or None,
+    ) as pool:
+        results = pool.imap_unordered(_run_job, [(task, *job) for job in jobs])
+        for job, result, error in results:
+            filename, outfile = job[1:3]
+            if error is not None:
+                failures += 1
+                print(f"{filename}: {error}", file=sys.stderr)
+                continue
+            nodes, edges, seconds = result
+            print(
+                f"{filename}{f' -> {outfile}' if outfile else ''}:"
+                f" {nodes} nodes, {edges} edges, {seconds:.2f}s"
+            )
+    return failures
+
+
+def _output_files(parser, filenames: list, directory: str, extension: str) -> list:
+    """Output path in directory for each input file, named after it"""
+    os.makedirs(directory, exist_ok=True)
+    outfiles = [
+        os.path.join(
+            directory, os.path.splitext(os.path.basename(filename))[0] + extension
+        )
+        for filename in filenames
+    ]
+    if len(set(outfiles)) < len(outfiles):
+        parser.error(
+            "input files with the same name would overwrite each other's output"
+        )
+    return outfiles
+
+
+def _wrapper(target: str, timeout: float) -> GoBGPQueryWrapper:
+    """GoBGPQueryWrapper for an "address[:port]" target"""
+    address, _, port = target.rpartition(":")
+    if not address:
+        address, port = port, DEFAULT_PORT
+    return GoBGPQueryWrapper(address, port, timeout=timeout)
+
+
+def fetch(args) -> int:
+    """Writes the BGP-LS table of a GoBGP instance as a YAML dump"""
+    table = _wrapper(args.target, args.timeout).debug()
+    with replacing(args.output) as path, open(path, "w") as out:
+        yaml.dump(table, out)
+    print(f"{args.output}: {len(table)} NLRI")
+    return 0
+
+
+def snapshot(args) -> int:
+    """Writes the BGP-LS table of a GoBGP instance as a snapshot file"""
+    rpc = _wrapper(args.target, args.timeout)
+    with replacing(args.output) as path:
+        count = rpc.save_snapshot(path)
+    print(f"{args.output}: {count} NLRI")
+    return 0
+
+
+def build(args, parser) -> int:
+    """Builds the graph of each table file, writing node-link JSON if --output-dir is set"""
+    if args.output_dir:
+        outfiles = _output_files(parser, args.files, args.output_dir, ".json")
+    else:
+        outfiles = [None] * len(args.files)
+    return 1 if run_batch(build_file, list(zip(args.files, outfiles)), args) else 0
+
+
+def render(args, parser) -> int:
+    """Renders the graph of each table file to an image"""
+    outfiles = _output_files(parser, args.files, args.output_dir, "." + args.format)
+    rc_params = {
+        "savefig.format": args.format,
+        "savefig.dpi": args.dpi,
+        "figure.figsize": args.size,
+    }
+    jobs = [
+        (filename, outfile, args.seed)
+        for filename, outfile in zip(args.files, outfiles)
+    ]
+    return 1 if run_batch(render_file, jobs, args, rc_params) else 0
+
+
+def _describe(lsa, names: dict) -> str:
+    """One line naming an LSA, with nodes by hostname where known"""
+    local = lsa["localNode"]["igpRouterId"]
+    local = names.get(local, local)
+    if lsa["type"] == "Link":
+        remote = lsa["remoteNode"]["igpRouterId"]
+        descriptor = lsa["linkDescriptor"]
+        address = descriptor.get("interfaceAddrIpv4") or descriptor.get(
+            "interfaceAddrIpv6"
+        )
+        return f"Link {local} -> {names.get(remote, remote)}" + (
+            f" ({address})" if address else ""
+        )
+    if lsa["type"] == "Prefix":
+        prefixes = lsa["prefixDescriptor"].get("ipReachability") or ()
+        return f"Prefix {local} {','.join(prefixes)}"
+    return f"Node {local}"
+
+
+def _attribute_changes(old, new) -> list:
+    """Each LS attribute field that differs, as 'section.field old -> new'"""
+    old_attrs = old.to_dict().get("lsattribute") or {}
+    new_attrs = new.to_dict().get("lsattribute") or {}
+    changes = []
+    for section in ("node", "link", "prefix"):
+        before = old_attrs.get(section) or {}
+        after = new_attrs.get(section) or {}
+        for field in sorted(set(before) | set(after)):
+            if before.get(field) != after.get(field):
+                changes.append(
+                    f"{section}.{field} {before.get(field)} -> {after.get(field)}"
+                )
+    return changes
+
+
+def diff(args) -> int:
+    """Prints the LSAs added, removed and changed between two table files"""
+    wrapper = GoBGPQueryWrapper(connect=False)
+    old, new = wrapper.get_lsdb(args.old), wrapper.get_lsdb(args.new)
+    names = {}
+    for lsa in old + new:
+        if lsa["type"] == "Node" and lsa["lsattribute"]["node"]:
+            name = lsa["lsattribute"]["node"].get("name")
+            if name:
+                names[lsa["localNode"]["igpRouterId"]] = name
+
+    changes = diff_lsdbs(old, new)
+    for lsa in changes.added:
+        print(f"+ {_describe(lsa, names)}")
+    for lsa in changes.removed:
+        print(f"- {_describe(lsa, names)}")
+    for before, after in changes.changed:
+        print(
+            f"~ {_describe(after, names)}: "
+            + ", ".join(_attribute_changes(before, after) or ["attributes"])
+        )
+    print(
+        f"{len(changes.added)} added, {len(changes.removed)} removed,"
+        f" {len(changes.changed)} changed",
+        file=sys.stderr,
+    )
+    return 1 if any(changes) else 0
+
+
+def _add_pool_arguments(parser):
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--max-tasks-per-child",
+        type=int,
+        default=20,
+        help="Files each worker processes before it is replaced, 0 for no limit",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=None,
+        help="Address space limit of each worker in MB",
+    )
+
+
+def _figure_size(value: str) -> tuple:
+    width, _, height = value.partition("x")
+    return float(width), float(height)
+
+
+def main(argv: list = None) -> int:
+    """Parses arguments and runs a subcommand, returning the exit status"""
+    parser = argparse.ArgumentParser(
+        prog="bgp-ls-vis", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("fetch", "Write the BGP-LS table of a GoBGP instance as a YAML dump"),
+        ("snapshot", "Write the BGP-LS table of a GoBGP instance as a snapshot file"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("target", help=f"address[:port], port {DEFAULT_PORT}")
+        command.add_argument("output")
+        command.add_argument("--timeout", type=float, default=None)
+
+    build_parser = commands.add_parser("build", help="Build graphs of table files")
+    build_parser.add_argument("files", nargs="+")
+    build_parser.add_argument(
+        "-o", "--output-dir", help="Directory for node-link JSON graphs"
+    )
+    _add_pool_arguments(build_parser)
+
+    render_parser = commands.add_parser("render", help="Render table files to images")
+    render_parser.add_argument("files", nargs="+")
+    render_parser.add_argument("-o", "--output-dir", required=True)
+    render_parser.add_argument("--format", choices=FORMATS, default="png")
+    render_parser.add_argument("--dpi", type=float, default=100.0)
+    render_parser.add_argument(
+        "--size", type=_figure_size, default=(16.0, 12.0), help="WxH in inches"
+    )
+    render_parser.add_argument("--seed", type=int, default=0, help="Layout seed")
+    _add_pool_arguments(render_parser)
+
+    diff_parser = commands.add_parser("diff", help="Compare two table files")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command in ("fetch", "snapshot"):
+        try:
+            return fetch(args) if args.command == "fetch" else snapshot(args)
+        except grpc.RpcError as err:
+            print(f"{args.target}: {err.code().name}: {err.details()}", file=sys.stderr)
+            return 1
+    if args.command == "build":
+        return build(args, parser)
+    if args.command == "render":
+        return render(args, parser)
+    return diff(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,44 @@
 """Web-frontend dashboard for Dash/Flask graphing"""
-from pprint import pprint
-
 import networkx
-import yaml
-import dash
-import dash_core_components as dcc
-import dash_html_components as html
-import dash_cytoscape as cyto
-from dash.dependencies import Input, Output
-import plotly.express as px
-import plotly.graph_objects as go
 
 # Project internal imports
+from .. import instrument
 from ..proto import GoBGPQueryWrapper
 from ..graphing import *
 
 
+def cytoscape_elements(nx_graph: networkx.Graph) -> list:
+    """Builds the Cytoscape elements of a graph: one per node, and one per edge with its cost
+
+    Args:
+        nx_graph: NetworkX Graph object, given by graphing.build_nx_from_lsdb
+
+    Returns:
+        List of element dicts, for dash_cytoscape.Cytoscape(elements=...)
+    """
+    with instrument.span("dashboard.elements") as stage:
+        elements = []
+
+        for node in nx_graph.nodes():
+            elements.append(
+                {
+                    "data": {"id": node, "label": node},
+                },
+            )
+        for source_edge, target_edge in nx_graph.edges():
+            elements.append(
+                {
+                    "data": {
+                        "source": source_edge,
+                        "target": target_edge,
+                        "cost": nx_graph[source_edge][target_edge][0]["cost"],
+                    }
+                }
+            )
+        stage.count = len(elements)
+    return elements
+
+
 def main(
     rpc: GoBGPQueryWrapper = None,
     nx_graph: networkx.Graph = None,
@@ -30,24 +53,13 @@ def main(
         host: Local IPv4 address on which to serve the Dash service
         port: Local TCP port on which to serve the Dash service
     """
-    elements = []
+    # Dash is imported here, so that building elements needs neither it nor Flask
+    # pylint: disable=import-outside-toplevel
+    import dash
+    import dash_cytoscape as cyto
+    import dash_html_components as html
 
-    for node in nx_graph.nodes():
-        elements.append(
-            {
-                "data": {"id": node, "label": node},
-            },
-        )
-    for source_edge, target_edge in nx_graph.edges():
-        elements.append(
-            {
-                "data": {
-                    "source": source_edge,
-                    "target": target_edge,
-                    "cost": nx_graph[source_edge][target_edge][0]["cost"],
-                }
-            }
-        )
+    elements = cytoscape_elements(nx_graph)
 
     app = dash.Dash(__name__)
     app.layout = html.Div(
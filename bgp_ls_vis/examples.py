@@ -54,6 +54,7 @@ def example3():
     # Calling get_lsdb with param `filename` set will trigger loading from file instead of RPC
     # There are several sample topologies under /tests/
     # To dump a topology to yaml as we have done, yaml.dump(GoBGPQueryWrapper.dump())
+    # Snapshot files from GoBGPQueryWrapper.save_snapshot() are loaded the same way, much faster
     dumps_dir = "../tests/bgp-ls_table_dumps"
 
     lsdb = rpc.get_lsdb(filename=f"{dumps_dir}/18-node-isis-w-bcast-segment.yaml")
@@ -1,6 +1,12 @@
 """Graphing tools for bgp_ls_vis"""
 import networkx as nx
-import matplotlib.pyplot as plt
+
+# Project internal imports
+from .. import instrument
+from ..lazy import lazy_import
+
+# Only needed for drawing, and slow to import
+plt = lazy_import("matplotlib.pyplot")
 
 
 def lsa_cost(lsa: dict) -> int:
@@ -32,92 +38,133 @@ def lsa_pseudonode(lsa: dict) -> bool:
     return b_pseudonode
 
 
-def build_nx_from_lsdb(lsdb: list) -> nx.MultiDiGraph:
+def link_edge_attrs(lsa: dict) -> dict:
+    """Edge attributes for the graph edge representing a Link LSA
+
+    Args:
+        lsa: Link LSA from lsdb (See: GoBGPQueryWrapper.get_lsdb)
+
+    Returns:
+        Dict of edge attributes, as set by build_nx_from_lsdb
+    """
+    return {
+        "cost": lsa_cost(lsa),
+        "pseudonode": "pseudonode" in lsa["remoteNode"].keys(),
+        "color": "black",
+        "weight": 1,
+        "lsa": lsa,  # We store arbitrary data: the lsattrs of the NLRI
+    }
+
+
+def build_nx_from_lsdb(lsdb) -> nx.MultiDiGraph:
     """Given list of LSAs (LSDB), builds NetworkX Graph object
 
+    The LSDB is iterated exactly once, so a generator such as GoBGPQueryWrapper.iter_lsdb can be
+    given directly without first collecting it into a list. Nodes are keyed by their TLV137
+    hostname where known, else by IGP RID: Link LSAs are held back until every Node LSA has been
+    seen, so that each edge is inserted under its final node keys and nothing is relabelled.
+
     Args:
-        lsdb: List<Dict> pulled from GoBGPQueryWrapper.get_lsdb call
+        lsdb: Iterable of LSA dicts, from GoBGPQueryWrapper.get_lsdb or .iter_lsdb
 
     Returns:
         NetworkX MultiDiGraph object
     """
-    graph = nx.MultiDiGraph()
+    with instrument.span("graphing.build_nx_from_lsdb") as stage:
+        graph = _build_nx_from_lsdb(lsdb)
+        stage.count = graph.number_of_edges()
+    return graph
 
-    # First iteration over LSDB initialises all nodes to the nx.graph object
-    # Nodes are keyed by igpRouterId - this is renamed to TLV137 values if known later
-    for lsa in lsdb:
-        if lsa["type"] == "Node":
-            graph.add_node(lsa["localNode"]["igpRouterId"])
 
-    # new_name_map is a dict keyed by node (IGP RID) [oldname], where value is string for new-name
+def _build_nx_from_lsdb(lsdb) -> nx.MultiDiGraph:
+    """build_nx_from_lsdb, uninstrumented"""
+    graph = nx.MultiDiGraph()
+
+    # name_map is a dict keyed by node (IGP RID), where value is string for its final node key
     # - Value is pulled from TLV137 if present in Node LSA
-    new_name_map = {}
+    name_map = {}
     # node_lsa_attrs is a dict keyed by node (IGP RID) and value: a dict of arb. data
     # - node_lsa_attrs[node]['lsa'] is the raw LSA seen in the LSDB given from rpc.get_lsdb
     # - node_lsa_attrs[node]['prefixes'] is a list of all associated Prefix LSAs for this node (key)
-    node_lsa_attrs = {node: {"lsa": None, "prefixes": []} for node in graph.nodes}
+    node_lsa_attrs = {}
+    # Link LSAs, held until name_map is complete
+    links = []
 
     for lsa in lsdb:
         igp_rid = lsa["localNode"]["igpRouterId"]
 
         if lsa["type"] == "Link":  # If LSA is an Edge ...
-            graph.add_edge(
-                igp_rid,
-                lsa["remoteNode"]["igpRouterId"],
-                cost=lsa_cost(lsa),
-                pseudonode="pseudonode" in lsa["remoteNode"].keys(),
-                color="black",
-                weight=1,
-                lsa=lsa,  # We store arbitrary data: the lsattrs of the NLRI
-            )
+            links.append(lsa)
 
         # Node type LSAs might have the node's true name (TLV137) under lsattrs
-        # so we prep a rename map (Dict where key: old name, val: new name)
-        # and call nx.relabel_nodes for the current graph, where `copy=false` renames in-place
+        # so we add it to the name map (Dict where key: IGP RID, val: new name)
         if lsa["type"] == "Node":
+            node_attrs = node_lsa_attrs.setdefault(
+                igp_rid, {"lsa": None, "prefixes": []}
+            )
+            # The raw Node LSA is kept as arb. data on the nx.node, even when it carries no
+            # node lsattrs, so nodes known from a Node LSA are told apart from those only
+            # seen as the far end of a Link LSA
+            node_attrs["lsa"] = lsa
             if lsa["lsattribute"]["node"]:
                 # We check for existence of TLV137
                 if "name" in list(lsa["lsattribute"]["node"].keys()):
-                    # and prep the new-name dict which is keyed by old name (IGP RID)
-                    old_name = igp_rid
-                    new_name = lsa["lsattribute"]["node"]["name"]
-                    new_name_map[old_name] = new_name
+                    name_map[igp_rid] = lsa["lsattribute"]["node"]["name"]
 
                 # Node stores pseudonode state under key localNode
                 # We prep this as arb. data to node_lsa_attrs
-                node_lsa_attrs[igp_rid]["pseudonode"] = lsa_pseudonode(lsa)
-
-                # Node type LSAs come with lsattrs, and we want to add those as arb. data
-                # to the nx.node in the nx.graph. e.g. Bandwidth stuff from the TED is here
-                node_lsa_attrs[igp_rid]["lsa"] = lsa
+                node_attrs["pseudonode"] = lsa_pseudonode(lsa)
+            graph.add_node(name_map.get(igp_rid, igp_rid))
 
-        # Prefixes are associated with a node, which we initially build under IGP RID
-        # Whilst this will be renamed later (to the TLV137 value), it is currently still
-        # IGP RID until this initial loop ends. So, we can start assocaiting prefix LSAs
-        # to node objects.
+        # Prefixes are associated with a node by IGP RID, so we can start associating prefix
+        # LSAs to nodes, even if the Node LSA itself has not been seen yet.
         if lsa["type"] == "Prefix":
-            node_lsa_attrs[igp_rid]["prefixes"].append(lsa)
+            node_attrs = node_lsa_attrs.setdefault(
+                igp_rid, {"lsa": None, "prefixes": []}
+            )
+            node_attrs["prefixes"].append(lsa)
+
+    # Every Node LSA has been seen, so edges go straight in under their final node keys
+    graph.add_edges_from(
+        (
+            name_map.get(
+                lsa["localNode"]["igpRouterId"], lsa["localNode"]["igpRouterId"]
+            ),
+            name_map.get(
+                lsa["remoteNode"]["igpRouterId"], lsa["remoteNode"]["igpRouterId"]
+            ),
+            link_edge_attrs(lsa),
+        )
+        for lsa in links
+    )
 
     # node_lsa_attrs is prepped with key:node, value:arbitrary data (k/v pairs)
     # nx.set_node_attributes
     # """If you provide a dictionary of dictionaries as the second argument, the outer dictionary
     #    is assumed to be keyed by node to an inner dictionary of node attributes for that node:"""
     # https://networkx.org/documentation/stable/reference/generated/networkx.classes.function.set_node_attributes.html
-    nx.set_node_attributes(graph, node_lsa_attrs)
-
-    # Node relabel is called AFTER the networkx graph is built from the LSDB
-    nx.relabel_nodes(graph, new_name_map, copy=False)
+    # Prefixes for a node with no Node LSA are dropped here, as that node is not in the graph
+    nx.set_node_attributes(
+        graph,
+        {
+            name_map.get(igp_rid, igp_rid): node_attrs
+            for igp_rid, node_attrs in node_lsa_attrs.items()
+        },
+    )
 
     return graph
 
 
-def draw_pyplot_graph(graph: nx.Graph):
+def draw_pyplot_graph(graph: nx.Graph, pos: dict = None, outfile=None):
     """Will open a window with the NetworkX graph object drawn
 
     Given NetworkX graph object, calls matplotlib.pyplot to draw then show the graph object
 
     Args:
         graph: NetworkX Graph object, or derivative
+        pos: Node positions, as given by nx.spring_layout, which is run if None
+        outfile: When set, the figure is saved to this path or file object (format from the
+            extension, or PNG) and closed, rather than shown
 
     Requires:
         import matplotlib.pyplot as plt
@@ -143,20 +190,29 @@ def draw_pyplot_graph(graph: nx.Graph):
     # Edge weight
     edge_weight = nx.get_edge_attributes(graph, "weight").values()
 
-    pos = nx.spring_layout(graph)
-    nx.draw(
-        graph,
-        pos,
-        node_color=color_map,
-        edge_color=edge_color,
-        width=list(edge_weight),
-        with_labels=True,
-        font_size=7,
-    )
-    nx.draw_networkx_edge_labels(
-        graph, pos, edge_labels=edge_labels, label_pos=0.3, font_size=7
-    )
-    plt.show()
+    if pos is None:
+        with instrument.span("graphing.spring_layout") as stage:
+            pos = nx.spring_layout(graph)
+            stage.count = len(pos)
+    with instrument.span("graphing.draw") as stage:
+        nx.draw(
+            graph,
+            pos,
+            node_color=color_map,
+            edge_color=edge_color,
+            width=list(edge_weight),
+            with_labels=True,
+            font_size=7,
+        )
+        nx.draw_networkx_edge_labels(
+            graph, pos, edge_labels=edge_labels, label_pos=0.3, font_size=7
+        )
+        stage.count = graph.number_of_nodes()
+        if outfile is not None:
+            plt.savefig(outfile)
+            plt.close()
+    if outfile is None:
+        plt.show()
 
 
 def draw_graphviz_graph(graph: nx.Graph, outfile: str):
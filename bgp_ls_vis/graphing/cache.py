@@ -0,0 +1,108 @@
+"""Caching of the graph built from a GoBGP instance, rebuilt only when its LS table changes
+
+A refresh loop calling get_lsdb and build_nx_from_lsdb every interval spends most of its time
+decoding and rebuilding a table that has not changed. GraphCache checks for change first, at
+two levels of cost:
+
+1. GetTable (GoBGPQueryWrapper.table_counts), a single unary RPC giving the table's destination
+   and path counts. Any addition or withdrawal changes them.
+2. A content hash of the table, taken over the raw bytes of a binary ListPath stream
+   (GoBGPQueryWrapper.iter_raw_table) without decoding any of it. This catches changes that
+   keep the counts, such as a metric change.
+
+Within `ttl` seconds of the last content check, equal counts are trusted on their own. Only
+when the hash differs is the table decoded (from the responses already received, so it is not
+fetched twice) and the graph rebuilt.
+"""
+# Standard Imports
+import hashlib
+import time
+
+# Project internal imports
+from . import build_nx_from_lsdb
+from .. import instrument
+from ..proto.binary import decode_raw_response
+
+
+class GraphCache:
+    """Graph of a GoBGP instance's LSDB, rebuilt only when the table has changed
+
+    Attributes:
+        graph: Graph last built, or None before the first get()
+        lsdb: List of LSA records the graph was built from
+        counts: Table counts (See: GoBGPQueryWrapper.table_counts) when last checked
+        digest: Content hash of the table when last checked
+        hits: Number of get() calls served from the cache
+        misses: Number of get() calls that rebuilt the graph
+    """
+
+    def __init__(self, rpc, ttl: float = 0.0, build=build_nx_from_lsdb):
+        """Constructor, which does not query GoBGP until the first get()
+
+        Args:
+            rpc: proto.GoBGPQueryWrapper connected to the GoBGP instance
+            ttl: Seconds after a content check during which unchanged table counts are taken to
+                mean an unchanged table, skipping the ListPath call. 0 checks the content on
+                every get(); None trusts the counts indefinitely.
+            build: Function building the graph from an LSDB
+        """
+        self.rpc = rpc
+        self.ttl = ttl
+        self.build = build
+        self.graph = None
+        self.lsdb = None
+        self.counts = None
+        self.digest = None
+        self.hits = 0
+        self.misses = 0
+        self._checked_at = None
+
+    def invalidate(self):
+        """Drops the cached graph, so the next get() fetches and rebuilds it"""
+        self.graph = self.lsdb = self.counts = self.digest = None
+        self._checked_at = None
+
+    def _fresh(self) -> bool:
+        """Whether the last content check is recent enough to trust the counts alone"""
+        return self.ttl is None or time.monotonic() - self._checked_at < self.ttl
+
+    def get(self, force: bool = False):
+        """Returns the graph of the current table, rebuilding it only if the table changed
+
+        Args:
+            force: When set, the table is fetched and the graph rebuilt regardless
+
+        Returns:
+            Graph given by build (by default an nx.MultiDiGraph from build_nx_from_lsdb). The
+            same object is returned for as long as the table is unchanged, so callers must not
+            modify it.
+        """
+        counts = self.rpc.table_counts()
+        if self.graph is not None and not force and counts == self.counts:
+            if self._fresh():
+                self.hits += 1
+                return self.graph
+
+        digest = hashlib.blake2b(digest_size=16)
+        responses = []
+        for raw in self.rpc.iter_raw_table():
+            digest.update(len(raw).to_bytes(4, "little"))
+            digest.update(raw)
+            responses.append(raw)
+        digest = digest.digest()
+        self._checked_at = time.monotonic()
+
+        if self.graph is not None and not force and digest == self.digest:
+            self.counts = counts
+            self.hits += 1
+            return self.graph
+
+        lsas = instrument.iterate(
+            "proto.decode", (decode_raw_response(raw) for raw in responses)
+        )
+        self.lsdb = [lsa for lsa in lsas if lsa is not None]
+        self.graph = self.build(self.lsdb)
+        self.counts = counts
+        self.digest = digest
+        self.misses += 1
+        return self.graph
@@ -0,0 +1,272 @@
+"""Constrained shortest path first (CSPF) over the TE attributes of the Link LSAs
+
+The TE link attributes (unreservedBandwidth per priority, adminGroup, defaultTeMetric) sit in the
+Link LSA of each edge. CspfEngine reads them once into arrays indexed by CsrTopology edge ID: an
+edges x 8 matrix of unreserved bandwidth, and the admin group bitmask of each edge. A request's
+constraints then prune the topology with a few vectorized comparisons, before a shortest path
+search on the TE or IGP metric runs over the edges left.
+
+The search is A*, guided by the unconstrained cost from each node to the destination: pruning
+only removes edges, so that cost is a lower bound on the constrained one, and where the
+constraints do not bind, the search settles little more than the path itself. It is computed once
+per destination and metric (spf.all_pairs_costs over the reversed edges) and cached.
+
+Admin groups follow RSVP-TE (RFC 3209) session attributes: an edge is usable if it has none of
+the exclude_any groups, at least one of the include_any groups (if any are given) and all of the
+include_all groups. Edges out of a pseudonode, which carry no TE attributes of their own, are
+never pruned: the router -> pseudonode edge into a LAN stands for the whole LAN hop.
+
+place() takes a batch of requests. Without reservation, requests sharing constraints share one
+pruning, and identical requests one search. With reserve set, requests are placed in order and
+each placed LSP takes its bandwidth from the unreserved bandwidth of its edges, at its priority
+and every lower one, as an RSVP-TE router would advertise.
+"""
+# Standard Imports
+import heapq
+from typing import NamedTuple
+
+import numpy as np
+
+# Project internal imports
+from .csr import CsrTopology
+from .spf import all_pairs_costs
+
+PRIORITIES = 8
+# Destinations whose unconstrained costs (the A* bounds) are kept, per metric
+BOUNDS_CACHE = 1024
+
+
+class CspfRequest(NamedTuple):
+    """An LSP to place, between two routers (by node key, as in the build_nx_from_lsdb graph)
+
+    bandwidth is in bytes per second, as BGP-LS carries it; priority is the setup and holding
+    priority, 0 (highest) to 7; exclude_any, include_any and include_all are admin group
+    bitmasks, 0 for no constraint; metric is "te" or "igp".
+    """
+
+    source: str
+    destination: str
+    bandwidth: float = 0.0
+    priority: int = 7
+    exclude_any: int = 0
+    include_any: int = 0
+    include_all: int = 0
+    metric: str = "te"
+
+
+class CspfPath(NamedTuple):
+    """A path found for a CspfRequest
+
+    hops are the node keys of the routers along the path, source and destination included
+    (pseudonodes left out), and edges the CsrTopology edge IDs it takes (pseudonode edges
+    included).
+    """
+
+    request: CspfRequest
+    hops: list
+    edges: list
+    cost: float
+
+
+def _link_attr(lsa, key: str):
+    """Value of a link attribute TLV of a Link LSA, or None if absent"""
+    link = lsa["lsattribute"]["link"] if lsa is not None else None
+    if link is None or key not in link.keys():
+        return None
+    return link[key]
+
+
+class CspfEngine:
+    """Constrained shortest paths over a topology's TE attributes"""
+
+    def __init__(self, topology: CsrTopology):
+        """Reads the TE attributes of every edge into arrays
+
+        Args:
+            topology: graphing.csr.CsrTopology, built with its LSAs kept (the default)
+
+        Raises:
+            ValueError: If the topology was built without its LSAs, which carry the TE attributes
+        """
+        if topology.edge_lsas is None:
+            raise ValueError("CSPF needs a CsrTopology built with keep_lsas=True")
+        self.topology = topology
+        local = topology.edge_sources()
+        # Edges out of pseudonodes, which constraints never prune
+        self.exempt = topology.pseudonode[local]
+
+        # unreserved[e, p] is the bandwidth edge e can still reserve at priority p. A link
+        # without unreservedBandwidth falls back to its reservable, then maximum, bandwidth.
+        self.unreserved = np.zeros((topology.edge_count, PRIORITIES))
+        self.admin_group = np.zeros(topology.edge_count, dtype=np.uint32)
+        for edge, lsa in enumerate(topology.edge_lsas):
+            unreserved = _link_attr(lsa, "unreservedBandwidth")
+            if unreserved is None:
+                bandwidth = _link_attr(lsa, "reservableBandwidth")
+                if bandwidth is None:
+                    bandwidth = _link_attr(lsa, "bandwidth")
+                unreserved = [bandwidth or 0.0] * PRIORITIES
+            self.unreserved[edge] = unreserved
+            self.admin_group[edge] = _link_attr(lsa, "adminGroup") or 0
+        self.unreserved[self.exempt] = np.inf
+
+        # The search walks plain lists, much faster to index one element at a time than arrays
+        self._indptr = topology.indptr.tolist()
+        self._local = local.tolist()
+        self._indices = topology.indices.tolist()
+        self._metrics = {"te": topology.te_metric, "igp": topology.igp_metric}
+        # (metric, destination) -> unconstrained cost from each node to destination
+        self._bounds = {}
+
+    def usable(self, request: CspfRequest) -> np.ndarray:
+        """Edges meeting a request's bandwidth and admin group constraints (bool array)"""
+        usable = self.unreserved[:, request.priority] >= request.bandwidth
+        groups = self.admin_group
+        if request.exclude_any:
+            usable &= (groups & request.exclude_any) == 0
+        if request.include_any:
+            usable &= (groups & request.include_any) != 0
+        if request.include_all:
+            usable &= (groups & request.include_all) == request.include_all
+        return usable | self.exempt
+
+    def path(self, request: CspfRequest) -> CspfPath:
+        """Shortest path meeting a request's constraints, or None if there is none"""
+        source = self.topology.index[request.source]
+        target = self.topology.index[request.destination]
+        return self._search(request, source, target, self._weights(request))
+
+    def place(self, requests: list, reserve: bool = False) -> list:
+        """Paths for a batch of requests
+
+        Args:
+            requests: List of CspfRequest
+            reserve: Place the requests in order, each reserving its bandwidth along its path
+                (See: reserve), so later requests only get what is left
+
+        Returns:
+            List of CspfPath, or None where a request has no path, in the order of requests
+        """
+        if reserve:
+            paths = []
+            for request in requests:
+                path = self.path(request)
+                if path is not None:
+                    self.reserve(path)
+                paths.append(path)
+            return paths
+
+        # Requests with the same constraints share one pruning, and identical ones one search
+        index = self.topology.index
+        weights = {}
+        found = {}
+        paths = []
+        for request in requests:
+            if request not in found:
+                constraints = request._replace(source=None, destination=None)
+                if constraints not in weights:
+                    weights[constraints] = self._weights(constraints)
+                found[request] = self._search(
+                    request,
+                    index[request.source],
+                    index[request.destination],
+                    weights[constraints],
+                )
+            paths.append(found[request])
+        return paths
+
+    def reserve(self, path: CspfPath, release: bool = False):
+        """Reserves (or releases) a placed path's bandwidth on each of its edges
+
+        RSVP-TE style: bandwidth held at priority p is taken from the unreserved bandwidth at p
+        and every lower priority (p + 1 .. 7). A lower priority can go below zero, where LSPs
+        held at it would be preempted; no request at that priority fits until some are released.
+
+        Args:
+            path: CspfPath from path or place
+            release: Give the bandwidth back instead
+        """
+        request = path.request
+        bandwidth = -request.bandwidth if release else request.bandwidth
+        edges = np.array(path.edges, dtype=np.int64)
+        edges = edges[~self.exempt[edges]]
+        self.unreserved[edges, request.priority :] -= bandwidth
+
+    def _weights(self, request: CspfRequest) -> list:
+        """Metric of each edge for a request, -1 where its constraints prune the edge"""
+        return np.where(
+            self.usable(request), self._metrics[request.metric], -1
+        ).tolist()
+
+    def _bounds_to(self, target: int, metric: str) -> list:
+        """Unconstrained cost from each node to target on a metric, inf where unreachable"""
+        key = (metric, target)
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            if len(self._bounds) >= BOUNDS_CACHE:
+                self._bounds.clear()
+            # Costs from target over the reversed edges are the costs to target
+            bounds = all_pairs_costs(
+                self.topology.node_count,
+                self.topology.indices,
+                np.array(self._local),
+                self._metrics[metric].astype(np.float64),
+                np.array([target]),
+            )[0].tolist()
+            self._bounds[key] = bounds
+        return bounds
+
+    def _search(self, request: CspfRequest, source: int, target: int, weights: list):
+        """A* from source to target over the edges of non-negative weight
+
+        Returns:
+            CspfPath, or None if target cannot be reached
+        """
+        bounds = self._bounds_to(target, request.metric)
+        if bounds[source] == np.inf:
+            return None
+        indptr, indices = self._indptr, self._indices
+        costs = {source: 0}
+        via = {}
+        done = set()
+        heap = [(bounds[source], 0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                return self._path(request, source, target, cost, via)
+            if node in done:
+                continue
+            done.add(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                weight = weights[edge]
+                if weight < 0:
+                    continue
+                remote = indices[edge]
+                candidate = cost + weight
+                if remote not in costs or candidate < costs[remote]:
+                    costs[remote] = candidate
+                    via[remote] = edge
+                    # Nodes that cannot reach target at all keep an inf estimate, last in line
+                    heapq.heappush(
+                        heap, (candidate + bounds[remote], candidate, remote)
+                    )
+        return None
+
+    def _path(
+        self, request: CspfRequest, source: int, target: int, cost: float, via: dict
+    ) -> CspfPath:
+        """Walks a search back from target to source"""
+        edges = []
+        node = target
+        while node != source:
+            edge = via[node]
+            edges.append(edge)
+            node = self._local[edge]
+        edges.reverse()
+        names, pseudonode = self.topology.names, self.topology.pseudonode
+        hops = [names[source]] + [
+            names[self._indices[edge]]
+            for edge in edges
+            if not pseudonode[self._indices[edge]]
+        ]
+        return CspfPath(request, hops, edges, float(cost))
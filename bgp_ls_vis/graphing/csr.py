@@ -0,0 +1,303 @@
+"""Compact array-backed topology, for analysis that does not need the networkx graph
+
+The nx.MultiDiGraph from build_nx_from_lsdb keeps a dict of dicts per node and an attribute dict
+(holding the whole Link LSA) per edge. CsrTopology keeps the same topology as NumPy arrays:
+nodes are numbered 0..n-1, and the outgoing edges of node i are entries indptr[i]:indptr[i + 1]
+of the edge arrays (compressed sparse row layout), each giving the remote node and the link's
+IGP metric, maximum bandwidth and TE metric. Node keys and pseudonode flags are held in arrays
+alongside, indexed by node ID.
+
+Nodes and their keys are the same as in the graph from build_nx_from_lsdb (TLV137 hostname where
+known, else IGP RID), and to_networkx/from_networkx convert between the two.
+"""
+import networkx as nx
+import numpy as np
+
+# Project internal imports
+from . import link_edge_attrs, lsa_cost, lsa_pseudonode
+
+
+def _link_attr(lsa, key: str, default):
+    """Value of a link attribute TLV of a Link LSA, or default if absent"""
+    link = lsa["lsattribute"]["link"]
+    if link is None or key not in link.keys():
+        return default
+    return link[key]
+
+
+def _object_array(values: list) -> np.ndarray:
+    """1-D object array of values, without NumPy treating dict-like records as sequences"""
+    array = np.empty(len(values), dtype=object)
+    for position, value in enumerate(values):
+        array[position] = value
+    return array
+
+
+class CsrTopology:
+    """Directed topology of the LSDB, as CSR adjacency arrays
+
+    Attributes:
+        names: Node key of each node ID, as used by build_nx_from_lsdb (object array)
+        igp_router_ids: IGP RID of each node ID (object array)
+        pseudonode: True for each node ID that is an IS-IS pseudonode (bool array)
+        indptr: Outgoing edges of node i are indptr[i]:indptr[i + 1] (int64 array, n + 1)
+        indices: Remote node ID of each edge (int32 array)
+        igp_metric: IGP metric of each edge, 0 if absent, as lsa_cost (int64 array)
+        bandwidth: Maximum link bandwidth of each edge, 0.0 if absent (float64 array)
+        te_metric: TE default metric of each edge, the IGP metric if absent (int64 array)
+        edge_pseudonode: True for each edge towards a pseudonode (bool array)
+        node_lsas: Node LSA of each node ID, or None; None when LSAs are not kept
+        node_prefixes: List of Prefix LSAs of each node ID; None when LSAs are not kept
+        edge_lsas: Link LSA of each edge; None when LSAs are not kept
+    """
+
+    def __init__(
+        self,
+        names,
+        igp_router_ids,
+        pseudonode,
+        indptr,
+        indices,
+        igp_metric,
+        bandwidth,
+        te_metric,
+        edge_pseudonode,
+        node_lsas=None,
+        node_prefixes=None,
+        edge_lsas=None,
+    ):
+        # pylint: disable=too-many-arguments
+        self.names = names
+        self.igp_router_ids = igp_router_ids
+        self.pseudonode = pseudonode
+        self.indptr = indptr
+        self.indices = indices
+        self.igp_metric = igp_metric
+        self.bandwidth = bandwidth
+        self.te_metric = te_metric
+        self.edge_pseudonode = edge_pseudonode
+        self.node_lsas = node_lsas
+        self.node_prefixes = node_prefixes
+        self.edge_lsas = edge_lsas
+        # Node key -> node ID
+        self.index = {name: node_id for node_id, name in enumerate(names)}
+
+    @property
+    def node_count(self) -> int:
+        """Number of nodes"""
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of (directed) edges"""
+        return len(self.indices)
+
+    def edge_sources(self) -> np.ndarray:
+        """Local node ID of each edge, i.e. indptr expanded to one entry per edge"""
+        return np.repeat(
+            np.arange(self.node_count, dtype=np.int32), np.diff(self.indptr)
+        )
+
+    def neighbours(self, node_id: int) -> np.ndarray:
+        """Remote node IDs of the outgoing edges of a node"""
+        return self.indices[self.indptr[node_id] : self.indptr[node_id + 1]]
+
+    @classmethod
+    def _from_edges(
+        cls,
+        names: list,
+        igp_router_ids: list,
+        pseudonode: list,
+        edges: list,
+        node_lsas: list = None,
+        node_prefixes: list = None,
+    ):
+        """Builds the CSR arrays from per-node lists and (source, target, lsa, attrs) edges
+
+        attrs is a tuple of (igp metric, bandwidth, te metric, towards pseudonode). Edges keep
+        their given order within each source node.
+        """
+        sources = np.fromiter((edge[0] for edge in edges), np.int64, len(edges))
+        order = np.argsort(sources, kind="stable")
+        edges = [edges[i] for i in order]
+        counts = np.bincount(sources, minlength=len(names))
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        def column(position: int, dtype):
+            return np.fromiter((edge[3][position] for edge in edges), dtype, len(edges))
+
+        return cls(
+            names=_object_array(names),
+            igp_router_ids=_object_array(igp_router_ids),
+            pseudonode=np.array(pseudonode, dtype=bool),
+            indptr=indptr,
+            indices=np.fromiter((edge[1] for edge in edges), np.int32, len(edges)),
+            igp_metric=column(0, np.int64),
+            bandwidth=column(1, np.float64),
+            te_metric=column(2, np.int64),
+            edge_pseudonode=column(3, bool),
+            node_lsas=_object_array(node_lsas) if node_lsas is not None else None,
+            node_prefixes=node_prefixes,
+            edge_lsas=_object_array([edge[2] for edge in edges])
+            if node_lsas is not None
+            else None,
+        )
+
+    @staticmethod
+    def _edge_attrs(lsa, cost: int = None, pseudonode: bool = None) -> tuple:
+        """(igp metric, bandwidth, te metric, towards pseudonode) of a Link LSA"""
+        if cost is None:
+            cost = lsa_cost(lsa)
+        if pseudonode is None:
+            pseudonode = "pseudonode" in lsa["remoteNode"].keys()
+        return (
+            cost,
+            _link_attr(lsa, "bandwidth", 0.0),
+            _link_attr(lsa, "defaultTeMetric", cost),
+            pseudonode,
+        )
+
+    @classmethod
+    def from_lsdb(cls, lsdb, keep_lsas: bool = True):
+        """Builds the topology straight from an LSDB, without building a networkx graph
+
+        Args:
+            lsdb: Iterable of LSAs, from GoBGPQueryWrapper.get_lsdb or .iter_lsdb
+            keep_lsas: When set, Node, Prefix and Link LSAs are kept in node_lsas, node_prefixes
+                and edge_lsas, so that to_networkx gives the same graph as build_nx_from_lsdb
+
+        Returns:
+            New CsrTopology
+        """
+        name_map, node_lsas, prefixes, links = {}, {}, {}, []
+        for lsa in lsdb:
+            igp_rid = lsa["localNode"]["igpRouterId"]
+            if lsa["type"] == "Link":
+                links.append(lsa)
+            elif lsa["type"] == "Node":
+                node_lsas[igp_rid] = lsa
+                node_attr = lsa["lsattribute"]["node"]
+                if node_attr and "name" in node_attr.keys():
+                    name_map[igp_rid] = node_attr["name"]
+            elif lsa["type"] == "Prefix":
+                prefixes.setdefault(igp_rid, []).append(lsa)
+
+        # node key -> node ID, with nodes numbered in the order build_nx_from_lsdb adds them
+        index, igp_router_ids, pseudonode = {}, [], []
+
+        def node_id(descriptor) -> int:
+            igp_rid = descriptor["igpRouterId"]
+            name = name_map.get(igp_rid, igp_rid)
+            if name not in index:
+                index[name] = len(index)
+                igp_router_ids.append(igp_rid)
+                pseudonode.append(False)
+            if descriptor.get("pseudonode"):
+                pseudonode[index[name]] = True
+            return index[name]
+
+        for lsa in node_lsas.values():
+            node_id(lsa["localNode"])
+        edges = [
+            (
+                node_id(lsa["localNode"]),
+                node_id(lsa["remoteNode"]),
+                lsa,
+                cls._edge_attrs(lsa),
+            )
+            for lsa in links
+        ]
+
+        names = list(index)
+        rtn_node_lsas = rtn_prefixes = None
+        if keep_lsas:
+            rtn_node_lsas = [node_lsas.get(igp_rid) for igp_rid in igp_router_ids]
+            # Keyed by final node key, as build_nx_from_lsdb merges routers sharing a name
+            by_name = {}
+            for igp_rid, router_prefixes in prefixes.items():
+                name = name_map.get(igp_rid, igp_rid)
+                if name in index:
+                    by_name[name] = router_prefixes
+            rtn_prefixes = [by_name.get(name) for name in names]
+        return cls._from_edges(
+            names, igp_router_ids, pseudonode, edges, rtn_node_lsas, rtn_prefixes
+        )
+
+    @classmethod
+    def from_networkx(cls, graph: nx.MultiDiGraph):
+        """Builds the topology from a graph given by build_nx_from_lsdb
+
+        Node and edge LSAs are kept when the graph carries them. Node IDs follow graph node order.
+
+        Args:
+            graph: NetworkX MultiDiGraph object from graphing.build_nx_from_lsdb
+
+        Returns:
+            New CsrTopology
+        """
+        names = list(graph.nodes)
+        index = {name: node_id for node_id, name in enumerate(names)}
+        igp_router_ids, pseudonode, node_lsas, node_prefixes = [], [], [], []
+        for name, data in graph.nodes(data=True):
+            lsa = data.get("lsa")
+            igp_router_ids.append(lsa["localNode"]["igpRouterId"] if lsa else name)
+            pseudonode.append(
+                bool(data.get("pseudonode"))
+                or bool(lsa and lsa["localNode"].get("pseudonode"))
+            )
+            node_lsas.append(lsa)
+            node_prefixes.append(data.get("prefixes"))
+
+        edges = []
+        for local, remote, data in graph.edges(data=True):
+            lsa = data.get("lsa")
+            if lsa is not None:
+                attrs = cls._edge_attrs(lsa, data["cost"], data["pseudonode"])
+            else:
+                attrs = (data["cost"], 0.0, data["cost"], data["pseudonode"])
+            if attrs[3]:
+                pseudonode[index[remote]] = True
+            edges.append((index[local], index[remote], lsa, attrs))
+        return cls._from_edges(
+            names, igp_router_ids, pseudonode, edges, node_lsas, node_prefixes
+        )
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        """Converts back to a networkx graph, for graphing.draw_* or dashboard.main
+
+        With LSAs kept, node and edge attributes are those build_nx_from_lsdb sets. Otherwise
+        edges carry cost, pseudonode, color and weight, and nodes their pseudonode flag.
+
+        Returns:
+            NetworkX MultiDiGraph object
+        """
+        graph = nx.MultiDiGraph()
+        for node_id, name in enumerate(self.names):
+            attrs = {}
+            if self.node_lsas is None:
+                attrs["pseudonode"] = bool(self.pseudonode[node_id])
+            else:
+                lsa = self.node_lsas[node_id]
+                prefixes = self.node_prefixes[node_id]
+                if lsa is not None or prefixes is not None:
+                    attrs = {"lsa": lsa, "prefixes": prefixes or []}
+                if lsa is not None and lsa["lsattribute"]["node"]:
+                    attrs["pseudonode"] = lsa_pseudonode(lsa)
+            graph.add_node(name, **attrs)
+
+        sources = self.edge_sources()
+        for edge in range(self.edge_count):
+            local = self.names[sources[edge]]
+            remote = self.names[self.indices[edge]]
+            if self.edge_lsas is not None and self.edge_lsas[edge] is not None:
+                attrs = link_edge_attrs(self.edge_lsas[edge])
+            else:
+                attrs = {
+                    "cost": int(self.igp_metric[edge]),
+                    "pseudonode": bool(self.edge_pseudonode[edge]),
+                    "color": "black",
+                    "weight": 1,
+                }
+            graph.add_edge(local, remote, **attrs)
+        return graph
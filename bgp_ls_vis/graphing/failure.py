@@ -0,0 +1,445 @@
+"""Failure impact simulation: which endpoint to endpoint paths each link or node failure changes
+
+For every failure (a link, a node, and optionally an SRLG or a pair of links), simulate_failures
+finds the pairs of endpoints (e.g. PEs; every router by default) whose shortest paths ran over a
+failed adjacency, and their cost once it has failed. Neither needs a full SPF run per failure:
+
+- A pair (s, d) is affected by the loss of adjacency u -> v of weight w exactly when
+  cost(s, u) + w + cost(v, d) equals cost(s, d), so affected pairs are found from the
+  failure-free cost matrix with a few vectorized comparisons per failed adjacency.
+- SPF (graphing.spf.all_pairs_costs) is rerun only from the sources of affected pairs, over the
+  adjacency with the failed edges left out.
+
+A pair whose cost does not change was still rerouted: it lost one of its ECMP paths. Pairs with a
+failed node as an endpoint are not reported.
+
+Failures are spread over a multiprocessing.Pool. The topology's edge arrays and the failure-free
+cost matrix (8 bytes per pair of routers) are placed once in shared memory, which every worker
+maps read-only instead of receiving its own copy; tasks carry only the edge IDs of their failures.
+"""
+# Standard Imports
+import itertools
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+# Project internal imports
+from .csr import CsrTopology
+from .spf import all_pairs_costs, collapse_pseudonodes
+
+
+class Failure(NamedTuple):
+    """Elements that fail together
+
+    kind is "link", "node", "srlg" or "dual"; edges are the IDs of the CsrTopology edges that
+    fail, and nodes the node IDs of failed nodes, whose own paths are not reported.
+    """
+
+    kind: str
+    name: str
+    edges: np.ndarray
+    nodes: tuple = ()
+
+
+class FailureSummary(NamedTuple):
+    """Impact of one failure, from ImpactMatrix.summary"""
+
+    failure: Failure
+    rerouted: int
+    disconnected: int
+    worst_increase: float
+
+
+def link_failures(topology: CsrTopology) -> list:
+    """One Failure per link: both directions, and any parallel links between the same two nodes"""
+    local = topology.edge_sources().astype(np.int64)
+    remote = topology.indices.astype(np.int64)
+    pairs = np.minimum(local, remote) * topology.node_count + np.maximum(local, remote)
+    order = np.argsort(pairs, kind="stable")
+    keys, starts = np.unique(pairs[order], return_index=True)
+    return [
+        Failure(
+            "link",
+            f"{topology.names[key // topology.node_count]} - "
+            f"{topology.names[key % topology.node_count]}",
+            edges,
+        )
+        for key, edges in zip(keys, np.split(order, starts[1:]))
+    ]
+
+
+def node_failures(topology: CsrTopology) -> list:
+    """One Failure per node (pseudonodes included), taking out its edges in both directions"""
+    incoming = np.argsort(topology.indices, kind="stable")
+    in_start = np.searchsorted(
+        topology.indices[incoming], np.arange(topology.node_count + 1)
+    )
+    return [
+        Failure(
+            "node",
+            str(topology.names[node]),
+            np.union1d(
+                np.arange(topology.indptr[node], topology.indptr[node + 1]),
+                incoming[in_start[node] : in_start[node + 1]],
+            ),
+            (node,),
+        )
+        for node in range(topology.node_count)
+    ]
+
+
+def srlg_failures(topology: CsrTopology) -> list:
+    """One Failure per shared risk link group, taking out every link in it
+
+    Raises:
+        ValueError: If the topology was built without its LSAs, which carry the SRLGs
+    """
+    if topology.edge_lsas is None:
+        raise ValueError("SRLG failures need a CsrTopology built with keep_lsas=True")
+    groups = {}
+    for edge, lsa in enumerate(topology.edge_lsas):
+        link = lsa["lsattribute"]["link"]
+        if link is not None and "srlgs" in link.keys():
+            for srlg in link["srlgs"]:
+                groups.setdefault(srlg, []).append(edge)
+    return [
+        Failure("srlg", f"SRLG {srlg}", np.array(edges, dtype=np.int64))
+        for srlg, edges in sorted(groups.items())
+    ]
+
+
+def dual_failures(links: list) -> list:
+    """One Failure per pair of link Failures, i.e. len(links)^2 / 2 of them"""
+    return [
+        Failure(
+            "dual",
+            f"{first.name} + {second.name}",
+            np.union1d(first.edges, second.edges),
+        )
+        for first, second in itertools.combinations(links, 2)
+    ]
+
+
+def enumerate_failures(
+    topology: CsrTopology,
+    links: bool = True,
+    nodes: bool = True,
+    srlgs: bool = False,
+    dual: bool = False,
+) -> list:
+    """Failures to simulate: every single link and node, optionally SRLGs and dual link failures
+
+    Args:
+        topology: graphing.csr.CsrTopology
+        links: Include single link failures
+        nodes: Include single node failures
+        srlgs: Include SRLG failures (needs a topology built with keep_lsas=True)
+        dual: Include every pair of link failures
+
+    Returns:
+        List of Failure
+    """
+    failures = []
+    single_links = link_failures(topology) if links or dual else []
+    if links:
+        failures += single_links
+    if nodes:
+        failures += node_failures(topology)
+    if srlgs:
+        failures += srlg_failures(topology)
+    if dual:
+        failures += dual_failures(single_links)
+    return failures
+
+
+class ImpactMatrix:
+    """Changed endpoint pairs of each failure, in compressed sparse row layout by failure
+
+    Attributes:
+        failures: The simulated Failures
+        endpoints: Node key of each endpoint (object array)
+        baseline: Endpoint x endpoint cost matrix with nothing failed, inf where unreachable
+        indptr: The pairs failure i changes are entries indptr[i]:indptr[i + 1]
+        sources: Endpoint index of each pair's source (int32 array)
+        targets: Endpoint index of each pair's target (int32 array)
+        costs: Each pair's cost with the failure, inf if disconnected (float64 array)
+    """
+
+    def __init__(self, failures, endpoints, baseline, indptr, sources, targets, costs):
+        # pylint: disable=too-many-arguments
+        self.failures = failures
+        self.endpoints = endpoints
+        self.baseline = baseline
+        self.indptr = indptr
+        self.sources = sources
+        self.targets = targets
+        self.costs = costs
+
+    def increase(self) -> np.ndarray:
+        """Cost increase of each pair (0 where only an ECMP path was lost, inf if disconnected)"""
+        return self.costs - self.baseline[self.sources, self.targets]
+
+    def changes(self, failure: int) -> list:
+        """Changed pairs of one failure
+
+        Args:
+            failure: Index of the failure in failures
+
+        Returns:
+            List of (source, target, cost before, cost after), by endpoint node key
+        """
+        entries = range(self.indptr[failure], self.indptr[failure + 1])
+        return [
+            (
+                self.endpoints[self.sources[entry]],
+                self.endpoints[self.targets[entry]],
+                float(self.baseline[self.sources[entry], self.targets[entry]]),
+                float(self.costs[entry]),
+            )
+            for entry in entries
+        ]
+
+    def summary(self) -> list:
+        """FailureSummary of every failure, in the order of failures"""
+        increase = self.increase()
+        owner = np.repeat(np.arange(len(self.failures)), np.diff(self.indptr))
+        disconnected = np.bincount(
+            owner, weights=np.isinf(increase), minlength=len(self.failures)
+        )
+        worst = np.zeros(len(self.failures))
+        finite = np.isfinite(increase)
+        np.maximum.at(worst, owner[finite], increase[finite])
+        return [
+            FailureSummary(failure, int(count), int(lost), float(most))
+            for failure, count, lost, most in zip(
+                self.failures, np.diff(self.indptr), disconnected, worst
+            )
+        ]
+
+
+class _Simulator:
+    """Computes the impact of failures from the failure-free arrays (held in each worker)"""
+
+    def __init__(self, local, remote, weights, pseudonode, costs, endpoints):
+        # pylint: disable=too-many-arguments
+        self.local = local
+        self.remote = remote
+        self.weights = weights
+        self.pseudonode = pseudonode
+        # costs is router x router with nothing failed; endpoints are router positions
+        self.costs = costs
+        self.endpoints = endpoints
+        _, sources, targets, weights = collapse_pseudonodes(
+            local, remote, weights, pseudonode
+        )
+        self.router_count = len(costs)
+        self.adjacency = (sources, targets, weights)
+        self.pairs = sources * self.router_count + targets
+        self.from_endpoints = costs[endpoints]
+        # Router position of each node ID, -1 for pseudonodes
+        self.position = np.full(len(pseudonode), -1, dtype=np.int64)
+        self.position[~pseudonode] = np.arange(self.router_count)
+
+    def impact(self, edges: np.ndarray, nodes: tuple) -> tuple:
+        """Changed pairs of one failure
+
+        Returns:
+            Tuple of (source, target, cost) arrays, by endpoint index
+        """
+        keep = np.ones(len(self.local), dtype=bool)
+        keep[edges] = False
+        _, sources, targets, weights = collapse_pseudonodes(
+            self.local[keep], self.remote[keep], self.weights[keep], self.pseudonode
+        )
+
+        # Adjacencies lost, or left only with a dearer parallel path
+        old_sources, old_targets, old_weights = self.adjacency
+        pairs = sources * self.router_count + targets
+        found = np.searchsorted(pairs, self.pairs)
+        present = found < len(pairs)
+        present[present] = pairs[found[present]] == self.pairs[present]
+        worse = ~present
+        worse[present] = weights[found[present]] > old_weights[present]
+
+        # Routers each endpoint may have reached over a lost adjacency. Costs to the others stand.
+        stale = np.zeros(self.from_endpoints.shape, dtype=bool)
+        for local, remote, weight in zip(
+            old_sources[worse], old_targets[worse], old_weights[worse]
+        ):
+            via = self.from_endpoints[:, local] + weight
+            rows = np.flatnonzero(
+                np.isfinite(via) & (via == self.from_endpoints[:, remote])
+            )
+            if len(rows):
+                before = self.from_endpoints[rows]
+                stale[rows] |= np.isfinite(before) & (
+                    via[rows, None] + self.costs[remote] == before
+                )
+
+        affected = stale[:, self.endpoints]
+        failed = self.position[list(nodes)]
+        failed = np.flatnonzero(np.isin(self.endpoints, failed[failed >= 0]))
+        affected[failed, :] = False
+        affected[:, failed] = False
+
+        rows = np.flatnonzero(affected.any(axis=1))
+        source, target = np.nonzero(affected[rows])
+        if not len(rows):
+            return source, target, np.zeros(0)
+        # SPF from the affected endpoints, starting from the costs that stand: only edges into
+        # stale routers can lower anything
+        initial = np.where(stale[rows], np.inf, self.from_endpoints[rows])
+        into = stale[rows].any(axis=0)[targets]
+        costs = all_pairs_costs(
+            self.router_count,
+            sources[into],
+            targets[into],
+            weights[into],
+            self.endpoints[rows],
+            initial,
+        )
+        return rows[source], target, costs[source, self.endpoints[target]]
+
+
+# _Simulator of a pool worker, over the shared memory it maps (See: _init_worker)
+_SIMULATOR = None
+_SHARED = []
+
+
+def _share(arrays: dict) -> tuple:
+    """Copies arrays into one shared memory block
+
+    Returns:
+        Tuple of (SharedMemory, layout), where layout maps each name to (offset, shape, dtype)
+    """
+    layout = {}
+    size = 0
+    for name, array in arrays.items():
+        layout[name] = (size, array.shape, array.dtype.str)
+        # 8 byte aligned, for the float64 and int64 arrays
+        size += -(-array.nbytes // 8) * 8
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, array in arrays.items():
+        _view(block, layout[name])[...] = array
+    return block, layout
+
+
+def _view(block: shared_memory.SharedMemory, spec: tuple) -> np.ndarray:
+    """NumPy array over part of a shared memory block"""
+    offset, shape, dtype = spec
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+
+
+def _init_worker(name: str, layout: dict):
+    """Pool initializer: maps the shared arrays and builds this worker's _Simulator"""
+    global _SIMULATOR  # pylint: disable=global-statement
+    block = shared_memory.SharedMemory(name=name)
+    # Kept referenced, since the arrays' memory goes with it
+    _SHARED.append(block)
+    arrays = {key: _view(block, spec) for key, spec in layout.items()}
+    for array in arrays.values():
+        array.flags.writeable = False
+    _SIMULATOR = _Simulator(**arrays)
+
+
+def _run_chunk(chunk: list) -> list:
+    """Pool task: the impact of each (failure index, edges, nodes) of a chunk"""
+    return [(index, *_SIMULATOR.impact(edges, nodes)) for index, edges, nodes in chunk]
+
+
+def simulate_failures(
+    topology: CsrTopology,
+    failures: list = None,
+    endpoints: list = None,
+    metric: str = "igp",
+    processes: int = None,
+    chunksize: int = None,
+) -> ImpactMatrix:
+    """Simulates each failure, finding the endpoint pairs whose shortest paths change
+
+    Args:
+        topology: graphing.csr.CsrTopology, e.g. CsrTopology.from_lsdb(lsdb)
+        failures: List of Failure, by default every single link and node (See:
+            enumerate_failures)
+        endpoints: Node keys of the routers whose paths matter (e.g. PEs); all routers if None
+        metric: "igp" for the IGP metric (`cost` edge attribute), or "te" for the TE metric
+        processes: Worker processes, one per CPU if None; 1 runs in this process
+        chunksize: Failures per pool task, by default enough for ~4 tasks per worker
+
+    Returns:
+        ImpactMatrix
+
+    Raises:
+        ValueError: If an endpoint is a pseudonode
+    """
+    if failures is None:
+        failures = enumerate_failures(topology)
+    processes = processes or os.cpu_count() or 1
+
+    weights = topology.igp_metric if metric == "igp" else topology.te_metric
+    routers, *adjacency = collapse_pseudonodes(
+        topology.edge_sources(), topology.indices, weights, topology.pseudonode
+    )
+    costs = all_pairs_costs(len(routers), *adjacency)
+    position = {node: index for index, node in enumerate(routers)}
+    if endpoints is None:
+        endpoints = routers
+    else:
+        endpoints = [topology.index[name] for name in endpoints]
+        if any(node not in position for node in endpoints):
+            raise ValueError("Endpoints must be routers, not pseudonodes")
+    arrays = {
+        "local": topology.edge_sources(),
+        "remote": topology.indices,
+        "weights": weights,
+        "pseudonode": topology.pseudonode,
+        "costs": costs,
+        "endpoints": np.array([position[node] for node in endpoints], dtype=np.int64),
+    }
+
+    jobs = [
+        (index, failure.edges, failure.nodes) for index, failure in enumerate(failures)
+    ]
+    if processes == 1 or len(jobs) < 2:
+        simulator = _Simulator(**arrays)
+        results = [
+            (index, *simulator.impact(edges, nodes)) for index, edges, nodes in jobs
+        ]
+    else:
+        chunksize = chunksize or max(1, len(jobs) // (processes * 4))
+        chunks = [jobs[i : i + chunksize] for i in range(0, len(jobs), chunksize)]
+        block, layout = _share(arrays)
+        try:
+            with multiprocessing.Pool(
+                processes, initializer=_init_worker, initargs=(block.name, layout)
+            ) as pool:
+                results = [
+                    result
+                    for chunk in pool.imap_unordered(_run_chunk, chunks)
+                    for result in chunk
+                ]
+        finally:
+            block.close()
+            block.unlink()
+
+    results.sort(key=lambda result: result[0])
+    counts = [len(result[3]) for result in results]
+    indptr = np.zeros(len(failures) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    endpoint_positions = arrays["endpoints"]
+    return ImpactMatrix(
+        failures=failures,
+        endpoints=topology.names[np.asarray(endpoints, dtype=np.int64)],
+        baseline=costs[np.ix_(endpoint_positions, endpoint_positions)],
+        indptr=indptr,
+        sources=np.concatenate([result[1] for result in results] + [[]]).astype(
+            np.int32
+        ),
+        targets=np.concatenate([result[2] for result in results] + [[]]).astype(
+            np.int32
+        ),
+        costs=np.concatenate([result[3] for result in results] + [[]]),
+    )
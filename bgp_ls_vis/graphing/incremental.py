@@ -0,0 +1,218 @@
+"""Incremental updates of a build_nx_from_lsdb graph from LSDB deltas
+
+Rebuilding the graph on every change costs O(table). GraphUpdater instead keeps a small index of
+the graph (IGP router ID -> node key, and the Prefix LSAs of each router) so each delta from
+GoBGPQueryWrapper.watch_lsdb is applied in O(delta): touching only the edge, node or prefix list
+it names, plus the node's own adjacencies when a TLV137 hostname change relabels it.
+"""
+import networkx as nx
+
+# Project internal imports
+from . import link_edge_attrs, lsa_pseudonode
+
+
+class GraphUpdater:
+    """Applies LSDB deltas to a graph from build_nx_from_lsdb, in place
+
+    After each delta, the graph matches what build_nx_from_lsdb would build from the updated LSDB,
+    except for node and edge ordering.
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph, lsdb=None):
+        """Indexes an existing graph, which takes a single O(nodes) pass
+
+        Args:
+            graph: NetworkX MultiDiGraph object from graphing.build_nx_from_lsdb
+            lsdb: Optional LSDB the graph was built from. build_nx_from_lsdb drops Prefix LSAs
+                of routers that are not in the graph; given the LSDB, those are held back and
+                attached should the router appear later. Costs one extra pass over the LSDB.
+        """
+        self.graph = graph
+        # names is keyed by IGP RID, where value is the node key in graph, if not the IGP RID
+        self.names = {}
+        # node_lsas is the set of IGP RIDs for which a Node LSA is currently known
+        self.node_lsas = set()
+        # prefixes is keyed by IGP RID, where value is the same list object as the node's
+        # `prefixes` attribute, so prefixes can be held for routers not (yet) in the graph
+        self.prefixes = {}
+
+        for node, data in graph.nodes(data=True):
+            igp_rid = node
+            if data.get("lsa") is not None:
+                igp_rid = data["lsa"]["localNode"]["igpRouterId"]
+                self.node_lsas.add(igp_rid)
+                if igp_rid != node:
+                    self.names[igp_rid] = node
+            if "prefixes" in data:
+                self.prefixes[igp_rid] = data["prefixes"]
+
+        for lsa in lsdb or []:
+            if lsa["type"] == "Prefix":
+                igp_rid = lsa["localNode"]["igpRouterId"]
+                if self.node_key(igp_rid) not in graph:
+                    self.prefixes.setdefault(igp_rid, []).append(lsa)
+
+    def node_key(self, igp_rid: str) -> str:
+        """Key of the graph node for a given IGP RID (its TLV137 hostname if known)"""
+        return self.names.get(igp_rid, igp_rid)
+
+    def apply(self, delta):
+        """Applies a single delta to the graph
+
+        Args:
+            delta: proto.lsa.LsdbDelta, as yielded by GoBGPQueryWrapper.watch_lsdb
+        """
+        withdraw, lsa = delta
+        if lsa["type"] == "Link":
+            if withdraw:
+                self._withdraw_link(lsa)
+            else:
+                self._add_link(lsa)
+        elif lsa["type"] == "Node":
+            if withdraw:
+                self._withdraw_node(lsa)
+            else:
+                self._add_node(lsa)
+        elif lsa["type"] == "Prefix":
+            if withdraw:
+                self._withdraw_prefix(lsa)
+            else:
+                self._add_prefix(lsa)
+
+    def apply_all(self, deltas) -> int:
+        """Applies each delta of an iterable (e.g. GoBGPQueryWrapper.watch_lsdb) in turn
+
+        Args:
+            deltas: Iterable of proto.lsa.LsdbDelta
+
+        Returns:
+            Number of deltas applied
+        """
+        count = 0
+        for delta in deltas:
+            self.apply(delta)
+            count += 1
+        return count
+
+    def _ensure_node(self, igp_rid: str) -> str:
+        """Adds the node for igp_rid if missing, attaching any held prefixes, returning its key"""
+        node = self.node_key(igp_rid)
+        if node not in self.graph:
+            self.graph.add_node(node)
+            if self.prefixes.get(igp_rid):
+                self.graph.nodes[node].update(lsa=None, prefixes=self.prefixes[igp_rid])
+        return node
+
+    def _prune_node(self, igp_rid: str):
+        """Removes the node for igp_rid if it no longer has a Node LSA nor any edges"""
+        node = self.node_key(igp_rid)
+        if (
+            igp_rid not in self.node_lsas
+            and node in self.graph
+            and self.graph.degree(node) == 0
+        ):
+            self.graph.remove_node(node)
+
+    def _find_link(self, lsa: dict):
+        """Finds the edge for a Link LSA, matching on its descriptors
+
+        Returns:
+            Tuple of (local node, remote node, edge key), with edge key None if not found
+        """
+        local = self.node_key(lsa["localNode"]["igpRouterId"])
+        remote = self.node_key(lsa["remoteNode"]["igpRouterId"])
+        if self.graph.has_edge(local, remote):
+            for key, data in self.graph[local][remote].items():
+                if data["lsa"]["linkDescriptor"] == lsa["linkDescriptor"]:
+                    return local, remote, key
+        return local, remote, None
+
+    def _add_link(self, lsa: dict):
+        local, remote, key = self._find_link(lsa)
+        if key is None:
+            self._ensure_node(lsa["localNode"]["igpRouterId"])
+            self._ensure_node(lsa["remoteNode"]["igpRouterId"])
+            self.graph.add_edge(local, remote, **link_edge_attrs(lsa))
+        else:
+            data = self.graph[local][remote][key]
+            data.clear()
+            data.update(link_edge_attrs(lsa))
+
+    def _withdraw_link(self, lsa: dict):
+        local, remote, key = self._find_link(lsa)
+        if key is not None:
+            self.graph.remove_edge(local, remote, key)
+            self._prune_node(lsa["localNode"]["igpRouterId"])
+            self._prune_node(lsa["remoteNode"]["igpRouterId"])
+
+    def _relabel(self, igp_rid: str, new_name: str):
+        """Moves the node for igp_rid to a new key, touching only its own adjacencies"""
+        old_name = self.node_key(igp_rid)
+        if new_name == igp_rid:
+            self.names.pop(igp_rid, None)
+        else:
+            self.names[igp_rid] = new_name
+        if old_name != new_name and old_name in self.graph:
+            nx.relabel_nodes(self.graph, {old_name: new_name}, copy=False)
+
+    def _add_node(self, lsa: dict):
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        self.node_lsas.add(igp_rid)
+
+        node_attr = lsa["lsattribute"]["node"]
+        if node_attr and "name" in node_attr.keys():
+            self._relabel(igp_rid, node_attr["name"])
+        else:
+            self._relabel(igp_rid, igp_rid)
+
+        data = self.graph.nodes[self._ensure_node(igp_rid)]
+        data["lsa"] = lsa
+        data["prefixes"] = self.prefixes.setdefault(igp_rid, [])
+        if node_attr:
+            data["pseudonode"] = lsa_pseudonode(lsa)
+        else:
+            data.pop("pseudonode", None)
+
+    def _withdraw_node(self, lsa: dict):
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        self.node_lsas.discard(igp_rid)
+        self._relabel(igp_rid, igp_rid)
+        self._prune_node(igp_rid)
+
+        if igp_rid in self.graph:
+            # Still the far end of some Link LSA: keep it, as build_nx_from_lsdb would
+            data = self.graph.nodes[igp_rid]
+            data.pop("pseudonode", None)
+            if self.prefixes.get(igp_rid):
+                data["lsa"] = None
+            else:
+                data.clear()
+
+    def _add_prefix(self, lsa: dict):
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        prefixes = self.prefixes.setdefault(igp_rid, [])
+        for index, prefix in enumerate(prefixes):
+            if prefix["prefixDescriptor"] == lsa["prefixDescriptor"]:
+                prefixes[index] = lsa
+                break
+        else:
+            prefixes.append(lsa)
+
+        node = self.node_key(igp_rid)
+        if node in self.graph:
+            data = self.graph.nodes[node]
+            data.setdefault("lsa", None)
+            data["prefixes"] = prefixes
+
+    def _withdraw_prefix(self, lsa: dict):
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        prefixes = self.prefixes.get(igp_rid, [])
+        for index, prefix in enumerate(prefixes):
+            if prefix["prefixDescriptor"] == lsa["prefixDescriptor"]:
+                del prefixes[index]
+                break
+
+        # A router known only from Link LSAs carries no attributes once its last prefix goes
+        node = self.node_key(igp_rid)
+        if not prefixes and igp_rid not in self.node_lsas and node in self.graph:
+            self.graph.nodes[node].clear()
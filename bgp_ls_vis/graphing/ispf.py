@@ -0,0 +1,298 @@
+"""Incremental SPF (iSPF): shortest path costs from every node, kept current from LSDB deltas
+
+AllPairsSpf recomputes every shortest path tree from scratch, although a single Link LSA change
+(a metric change, a link coming up or going down) usually moves only a few subtrees of a few
+trees. IncrementalSpf applies each delta to the graph with a GraphUpdater, then repairs only the
+trees the changed adjacency u -> v affects, as in Ramalingam and Reps' dynamic SPF:
+
+- Cheaper (or new) u -> v: only sources for which cost(s, u) + weight < cost(s, v) change, and
+  within each only the nodes a Dijkstra search from v improves.
+- Dearer (or removed) u -> v: only sources for which u -> v was on every shortest path to v
+  change. Within each, the affected nodes are those whose every shortest path runs through v;
+  they are costed again from their unaffected predecessors, with a Dijkstra search among
+  themselves.
+
+The weight of an adjacency is the `cost` of its cheapest parallel edge. Costs are held for every
+node of the graph, pseudonodes included. As in Ramalingam and Reps, there must be no cycle of zero
+cost edges: IGP metrics are at least 1, and only the pseudonode -> router half of a LAN is 0.
+"""
+# Standard Imports
+import heapq
+
+import networkx as nx
+import numpy as np
+
+# Project internal imports
+from .incremental import GraphUpdater
+from .spf import all_pairs_costs
+
+
+class IncrementalSpf:
+    """Shortest path costs between all nodes of a build_nx_from_lsdb graph, kept by LSDB deltas"""
+
+    def __init__(self, graph: nx.MultiDiGraph, lsdb=None):
+        """Runs SPF from every node
+
+        Args:
+            graph: NetworkX MultiDiGraph object from graphing.build_nx_from_lsdb, which apply()
+                updates in place (See: graphing.incremental.GraphUpdater)
+            lsdb: Optional LSDB the graph was built from, passed on to GraphUpdater
+        """
+        self.graph = graph
+        self.updater = GraphUpdater(graph, lsdb)
+        self.recompute()
+
+    def recompute(self):
+        """Runs SPF from every node again, e.g. after the graph was changed other than by apply()"""
+        # names is the node key of each row and column of costs, None for a free slot
+        self.names = list(self.graph)
+        self.index = {name: position for position, name in enumerate(self.names)}
+        self._free = []
+
+        # _out[i] maps the position of each node i has an adjacency to onto its weight, and
+        # _in[i] each node with an adjacency to i
+        self._out = [{} for _ in self.names]
+        self._in = [{} for _ in self.names]
+        for local, remote, cost in self.graph.edges(data="cost"):
+            local, remote = self.index[local], self.index[remote]
+            # The cheapest of parallel edges (See: _weight)
+            weight = min(cost, self._out[local].get(remote, np.inf))
+            self._set_weight(local, remote, weight)
+        sources = [local for local, adjacent in enumerate(self._out) for _ in adjacent]
+        targets = [remote for adjacent in self._out for remote in adjacent]
+        weights = [weight for adjacent in self._out for weight in adjacent.values()]
+        # costs[i, j] is the cost from node i to node j, inf where unreachable
+        self.costs = all_pairs_costs(
+            len(self.names),
+            np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.float64),
+        )
+
+    def cost(self, source: str, target: str) -> float:
+        """Shortest path cost between two nodes, inf if unreachable
+
+        Args:
+            source: Node key of the source, as in the build_nx_from_lsdb graph
+            target: Node key of the target
+        """
+        return self.costs[self.index[source], self.index[target]]
+
+    def distances(self, source: str) -> dict:
+        """Shortest path cost from a node to every node it reaches, keyed by node key"""
+        row = self.costs[self.index[source]]
+        return {
+            self.names[position]: float(row[position])
+            for position in np.flatnonzero(np.isfinite(row))
+        }
+
+    def apply(self, delta) -> int:
+        """Applies a single delta to the graph, and repairs the shortest path trees it changes
+
+        Args:
+            delta: proto.lsa.LsdbDelta, as yielded by GoBGPQueryWrapper.watch_lsdb
+
+        Returns:
+            Number of sources whose costs were updated
+        """
+        _, lsa = delta
+        if lsa["type"] == "Link":
+            local = self.updater.node_key(lsa["localNode"]["igpRouterId"])
+            remote = self.updater.node_key(lsa["remoteNode"]["igpRouterId"])
+            self.updater.apply(delta)
+            self._add_nodes(local, remote)
+            if local not in self.index or remote not in self.index:
+                return 0  # Withdrawn, but never in the graph
+            local, remote = self.index[local], self.index[remote]
+            before = self._out[local].get(remote, np.inf)
+            after = self._weight(self.names[local], self.names[remote])
+            self._set_weight(local, remote, after)
+            updated = 0
+            if after < before:
+                updated = self._decrease(local, remote, after)
+            elif after > before:
+                updated = self._increase(local, remote, before)
+            self._drop_nodes(self.names[local], self.names[remote])
+            return updated
+
+        if lsa["type"] == "Node":
+            igp_rid = lsa["localNode"]["igpRouterId"]
+            before = self.updater.node_key(igp_rid)
+            self.updater.apply(delta)
+            after = self.updater.node_key(igp_rid)
+            if after != before and before in self.index:
+                if after in self.index:
+                    # Renamed onto the key of another node: nothing to repair, start again
+                    self.recompute()
+                    return len(self.names)
+                # A hostname change moves no edges, only the key of its row and column
+                position = self.index.pop(before)
+                self.index[after] = position
+                self.names[position] = after
+            self._add_nodes(after)
+            self._drop_nodes(before, after)
+            return 0
+
+        self.updater.apply(delta)
+        return 0
+
+    def apply_all(self, deltas) -> int:
+        """Applies each delta of an iterable (e.g. GoBGPQueryWrapper.watch_lsdb) in turn
+
+        Args:
+            deltas: Iterable of proto.lsa.LsdbDelta
+
+        Returns:
+            Number of deltas applied
+        """
+        count = 0
+        for delta in deltas:
+            self.apply(delta)
+            count += 1
+        return count
+
+    def _weight(self, local: str, remote: str) -> float:
+        """Weight of the adjacency local -> remote in the graph: its cheapest parallel edge"""
+        edges = self.graph.succ.get(local, {}).get(remote)
+        if not edges:
+            return np.inf
+        return float(min(data["cost"] for data in edges.values()))
+
+    def _set_weight(self, local: int, remote: int, weight: float):
+        """Sets the weight of an adjacency in _out and _in, removing it if inf"""
+        if weight == np.inf:
+            self._out[local].pop(remote, None)
+            self._in[remote].pop(local, None)
+        else:
+            self._out[local][remote] = weight
+            self._in[remote][local] = weight
+
+    def _add_nodes(self, *names):
+        """Gives each node new to the graph a row and column, reaching only itself"""
+        for name in names:
+            if name in self.index or name not in self.graph:
+                continue
+            if self._free:
+                position = self._free.pop()
+                self.names[position] = name
+            else:
+                position = len(self.names)
+                self.names.append(name)
+                self._out.append({})
+                self._in.append({})
+                if position == len(self.costs):
+                    # Grow by doubling, so adding n nodes copies the matrix O(log n) times
+                    capacity = max(2 * position, 16)
+                    costs = np.full((capacity, capacity), np.inf)
+                    costs[:position, :position] = self.costs
+                    self.costs = costs
+            self.index[name] = position
+            self.costs[position, :] = np.inf
+            self.costs[:, position] = np.inf
+            self.costs[position, position] = 0.0
+
+    def _drop_nodes(self, *names):
+        """Frees the row and column of each node no longer in the graph"""
+        for name in names:
+            if name not in self.index or name in self.graph:
+                continue
+            position = self.index.pop(name)
+            self.names[position] = None
+            self.costs[position, :] = np.inf
+            self.costs[:, position] = np.inf
+            self._free.append(position)
+
+    def _decrease(self, local: int, remote: int, weight: float) -> int:
+        """Repairs every tree after the adjacency local -> remote got cheaper, or came up"""
+        via = self.costs[:, local] + weight
+        sources = np.flatnonzero(via < self.costs[:, remote])
+        for source in sources:
+            # Searched as a list: indexing a NumPy row one element at a time is far slower
+            row = self.costs[source].tolist()
+            row[remote] = float(via[source])
+            changed = {remote}
+            self._search(row, [(row[remote], remote)], changed)
+            changed = list(changed)
+            self.costs[source, changed] = [row[node] for node in changed]
+        return len(sources)
+
+    def _increase(self, local: int, remote: int, weight: float) -> int:
+        """Repairs every tree after the adjacency local -> remote got dearer, or went down
+
+        Args:
+            local: Position of the local node
+            remote: Position of the remote node
+            weight: Weight of the adjacency before the change
+        """
+        column = self.costs[:, remote]
+        # Sources that reached remote over local -> remote, and over no other adjacency
+        tight = np.isfinite(column) & (self.costs[:, local] + weight == column)
+        if tight.any():
+            for predecessor, cost in self._in[remote].items():
+                tight &= self.costs[:, predecessor] + cost != column
+        sources = np.flatnonzero(tight)
+        for source in sources:
+            row = self.costs[source].tolist()
+            affected = list(self._repair(row, remote))
+            self.costs[source, affected] = [row[node] for node in affected]
+        return len(sources)
+
+    def _repair(self, row: list, root: int) -> set:
+        """Costs again the nodes of one tree whose every shortest path ran through root
+
+        Returns:
+            Positions of the nodes costed again, the only ones changed in row
+        """
+        affected = {root}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for successor, cost in self._out[node].items():
+                if successor in affected or row[node] + cost != row[successor]:
+                    continue
+                # Affected once every predecessor it was reached over is affected; rechecked
+                # as each of those is found
+                if all(
+                    predecessor in affected
+                    or row[predecessor] + weight != row[successor]
+                    for predecessor, weight in self._in[successor].items()
+                ):
+                    affected.add(successor)
+                    stack.append(successor)
+
+        for node in affected:
+            row[node] = np.inf
+        heap = []
+        for node in affected:
+            best = min(
+                (
+                    row[predecessor] + weight
+                    for predecessor, weight in self._in[node].items()
+                ),
+                default=np.inf,
+            )
+            if best < np.inf:
+                row[node] = best
+                heap.append((best, node))
+        heapq.heapify(heap)
+        self._search(row, heap, affected)
+        return affected
+
+    def _search(self, row: list, heap: list, changed: set):
+        """Dijkstra from the (cost, position) entries of heap, lowering costs of row in place
+
+        Args:
+            row: Costs from one source, by position
+            heap: Heap of (cost, position) to search from
+            changed: Set the position of each node whose cost is lowered is added to
+        """
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > row[node]:
+                continue
+            for successor, weight in self._out[node].items():
+                candidate = cost + weight
+                if candidate < row[successor]:
+                    row[successor] = candidate
+                    changed.add(successor)
+                    heapq.heappush(heap, (candidate, successor))
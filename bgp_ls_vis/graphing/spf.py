@@ -0,0 +1,282 @@
+"""All-pairs IGP shortest path first (SPF) over a CsrTopology
+
+Pseudonodes (IS-IS LAN pseudonodes, or OSPF DRs) are transit only: they are never a source,
+destination or next hop. Before SPF, each pair of edges router -> pseudonode -> router is
+collapsed into a single router -> router adjacency whose cost is the sum of the two (the
+pseudonode -> router half is 0 in IS-IS), so results are indexed by routers alone. Parallel
+adjacencies between two routers collapse to the cheapest.
+
+Costs are computed with a binary heap Dijkstra from each source, over the adjacency held as plain
+lists in CSR order (indexing lists one element at a time is far faster than indexing arrays), so
+the work per source is bounded by the edges whatever the diameter of the topology. ECMP next-hop
+sets are derived from the cost matrix: neighbour k of s is a next hop towards d when
+cost(s, k) + cost(k, d) equals cost(s, d).
+"""
+# Standard Imports
+import heapq
+
+import numpy as np
+
+# Project internal imports
+from .csr import CsrTopology
+
+# Cap on edge relaxation candidates held at once (origins x edges) when starting from initial costs
+BATCH_CELLS = 1 << 22
+
+
+def router_adjacency(topology: CsrTopology, metric: str = "igp"):
+    """Collapses pseudonodes out of a topology, giving the router to router adjacency
+
+    Args:
+        topology: graphing.csr.CsrTopology
+        metric: "igp" for the IGP metric (`cost` edge attribute), or "te" for the TE metric
+
+    Returns:
+        Tuple of (routers, sources, targets, weights): the node IDs of the routers, and the
+        adjacency as arrays of indexes into routers with their cost
+    """
+    weights = topology.igp_metric if metric == "igp" else topology.te_metric
+    return collapse_pseudonodes(
+        topology.edge_sources(), topology.indices, weights, topology.pseudonode
+    )
+
+
+def collapse_pseudonodes(
+    local: np.ndarray, remote: np.ndarray, weights: np.ndarray, pseudonode: np.ndarray
+):
+    """router_adjacency over bare edge arrays, e.g. a subset of a topology's edges
+
+    Args:
+        local: Local node ID of each edge
+        remote: Remote node ID of each edge
+        weights: Cost of each edge
+        pseudonode: True for each node ID that is a pseudonode
+
+    Returns:
+        Tuple of (routers, sources, targets, weights), as router_adjacency
+    """
+    node_count = len(pseudonode)
+
+    # Router to router edges, as they are
+    direct = ~pseudonode[local] & ~pseudonode[remote]
+    sources, targets, costs = [local[direct]], [remote[direct]], [weights[direct]]
+
+    # Router -> pseudonode -> router, joining each edge into a pseudonode with its edges out
+    into = np.flatnonzero(~pseudonode[local] & pseudonode[remote])
+    out_of = np.flatnonzero(pseudonode[local] & ~pseudonode[remote])
+    out_of = out_of[np.argsort(local[out_of], kind="stable")]
+    out_degree = np.bincount(local[out_of], minlength=node_count)
+    out_start = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(out_degree, out=out_start[1:])
+
+    repeats = out_degree[remote[into]]
+    first = np.repeat(into, repeats)
+    offsets = np.arange(repeats.sum()) - np.repeat(
+        np.cumsum(repeats) - repeats, repeats
+    )
+    second = out_of[out_start[remote[first]] + offsets]
+    transit = local[first] != remote[second]
+    sources.append(local[first][transit])
+    targets.append(remote[second][transit])
+    costs.append(weights[first][transit] + weights[second][transit])
+
+    routers = np.flatnonzero(~pseudonode)
+    position = np.full(node_count, -1, dtype=np.int64)
+    position[routers] = np.arange(len(routers))
+    sources = position[np.concatenate(sources)]
+    targets = position[np.concatenate(targets)]
+    costs = np.concatenate(costs).astype(np.float64)
+
+    # Keep only the cheapest of parallel adjacencies
+    pairs = sources * len(routers) + targets
+    order = np.lexsort((costs, pairs))
+    keep = order[np.r_[True, pairs[order][1:] != pairs[order][:-1]]]
+    return routers, sources[keep], targets[keep], costs[keep]
+
+
+def all_pairs_costs(
+    count: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: np.ndarray,
+    origins: np.ndarray = None,
+    initial: np.ndarray = None,
+) -> np.ndarray:
+    """Shortest path cost between every pair of nodes of a directed graph
+
+    Args:
+        count: Number of nodes, numbered 0..count-1
+        sources: Local node of each edge
+        targets: Remote node of each edge
+        weights: Non-negative cost of each edge
+        origins: Optional nodes to compute costs from, rather than every node
+        initial: Optional starting costs from each origin, at least the true costs (e.g. the
+            costs before some edges were removed, inf for pairs that may have used them): the
+            search only runs from the nodes whose cost one relaxation of every edge lowers
+
+    Returns:
+        len(origins) x count float64 matrix of costs (count x count without origins), inf where
+        unreachable
+    """
+    if origins is None:
+        origins = np.arange(count)
+    if initial is None:
+        costs = np.full((len(origins), count), np.inf)
+    else:
+        costs = np.array(initial, dtype=np.float64)
+    costs[np.arange(len(origins)), origins] = 0.0
+    if len(sources) == 0:
+        return costs
+
+    # Adjacency in CSR order, as lists of (remote, weight) per local node
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+    edges = list(zip(targets[order].tolist(), weights[order].tolist()))
+    indptr = indptr.tolist()
+    adjacency = [edges[indptr[node] : indptr[node + 1]] for node in range(count)]
+
+    if initial is None:
+        for row, origin in enumerate(origins.tolist()):
+            costs[row] = _dijkstra(costs[row].tolist(), [(0.0, origin)], adjacency)
+        return costs
+
+    # From initial costs, one vectorized relaxation of every edge finds the nodes they overstate;
+    # only those can lower anything further
+    order = np.argsort(targets, kind="stable")
+    sources, targets, weights = sources[order], targets[order], weights[order]
+    reached, starts = np.unique(targets, return_index=True)
+    batch = max(1, BATCH_CELLS // len(sources))
+    for first in range(0, len(origins), batch):
+        rows = costs[first : first + batch]
+        best = np.minimum.reduceat(rows[:, sources] + weights, starts, axis=1)
+        for row, improved in enumerate(best < rows[:, reached]):
+            nodes = reached[improved]
+            if not len(nodes):
+                continue
+            heap = list(zip(best[row, improved].tolist(), nodes.tolist()))
+            heapq.heapify(heap)
+            line = rows[row].tolist()
+            for cost, node in heap:
+                line[node] = cost
+            rows[row] = _dijkstra(line, heap, adjacency)
+    return costs
+
+
+def _dijkstra(row: list, heap: list, adjacency: list) -> list:
+    """Dijkstra from the (cost, node) entries of heap, lowering the costs of row in place
+
+    Args:
+        row: Costs from one origin by node, each at least the true cost; those of heap set
+        heap: Heap of (cost, node) of the nodes whose edges are yet to be relaxed
+        adjacency: List of (remote, weight) of each node's edges
+
+    Returns:
+        row
+    """
+    pop, push = heapq.heappop, heapq.heappush
+    while heap:
+        cost, node = pop(heap)
+        if cost > row[node]:
+            continue
+        for remote, weight in adjacency[node]:
+            candidate = cost + weight
+            if candidate < row[remote]:
+                row[remote] = candidate
+                push(heap, (candidate, remote))
+    return row
+
+
+class AllPairsSpf:
+    """All-pairs SPF costs and ECMP next hops between the routers of a topology"""
+
+    def __init__(self, topology: CsrTopology, metric: str = "igp"):
+        """Runs SPF from every router
+
+        Args:
+            topology: graphing.csr.CsrTopology, e.g. CsrTopology.from_lsdb(lsdb)
+            metric: "igp" for the IGP metric (`cost` edge attribute), or "te" for the TE metric
+        """
+        self.topology = topology
+        self.routers, sources, targets, weights = router_adjacency(topology, metric)
+        # names is the node key of each router, in the order of the costs matrix
+        self.names = topology.names[self.routers]
+        self.index = {name: position for position, name in enumerate(self.names)}
+        # costs[i, j] is the cost from router i to router j, inf where unreachable
+        self.costs = all_pairs_costs(len(self.routers), sources, targets, weights)
+
+        # Router adjacency as CSR, for next hop lookups
+        order = np.argsort(sources, kind="stable")
+        self._neighbours = targets[order]
+        self._weights = weights[order]
+        self._start = np.zeros(len(self.routers) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=len(self.routers)), out=self._start[1:]
+        )
+
+    def cost(self, source: str, target: str) -> float:
+        """Shortest path cost between two routers, inf if unreachable
+
+        Args:
+            source: Node key of the source router, as in the build_nx_from_lsdb graph
+            target: Node key of the target router
+        """
+        return self.costs[self.index[source], self.index[target]]
+
+    def next_hop_mask(self, source: str):
+        """ECMP next hops from a router towards every router, as a boolean matrix
+
+        Args:
+            source: Node key of the source router
+
+        Returns:
+            Tuple of (next_hops, mask): the router indexes of source's neighbours, and a
+            len(next_hops) x routers boolean matrix, True where that neighbour is a next hop on a
+            shortest path towards that router
+        """
+        row = self.index[source]
+        start, end = self._start[row], self._start[row + 1]
+        neighbours = self._neighbours[start:end]
+        via = self._weights[start:end, None] + self.costs[neighbours]
+        mask = (via == self.costs[row]) & np.isfinite(via)
+        mask[:, row] = False
+        return neighbours, mask
+
+    def next_hops(self, source: str, target: str) -> list:
+        """ECMP next hops from one router towards another
+
+        Args:
+            source: Node key of the source router
+            target: Node key of the target router
+
+        Returns:
+            List of node keys of the neighbouring routers that are next hops, empty if target is
+            unreachable or is source
+        """
+        neighbours, mask = self.next_hop_mask(source)
+        return list(self.names[neighbours[mask[:, self.index[target]]]])
+
+    def paths(self, source: str, target: str) -> list:
+        """Every equal cost shortest path between two routers
+
+        Args:
+            source: Node key of the source router
+            target: Node key of the target router
+
+        Returns:
+            List of paths, each a list of router node keys from source to target
+        """
+        if not np.isfinite(self.cost(source, target)):
+            return []
+        return self._paths(source, target, {source})
+
+    def _paths(self, source: str, target: str, visited: set) -> list:
+        """paths() without the reachability check; visited guards against zero cost loops"""
+        if source == target:
+            return [[source]]
+        return [
+            [source] + path
+            for hop in self.next_hops(source, target)
+            if hop not in visited
+            for path in self._paths(hop, target, visited | {hop})
+        ]
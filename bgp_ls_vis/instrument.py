@@ -0,0 +1,315 @@
+"""Per-stage timing and memory instrumentation for the fetch, decode, graph and render pipeline
+
+Code marks out its stages as spans, either around a block:
+
+    with instrument.span("graphing.build_nx_from_lsdb") as stage:
+        ...
+        stage.count = graph.number_of_edges()
+
+or around a streamed stage, timing only what is spent producing each item:
+
+    responses = instrument.iterate("proto.ListPath", stub.ListPath(request), size=len)
+
+Nothing is measured until a sink is set with enable(); while disabled, span() hands back a shared
+no-op and iterate() the iterable itself, so instrumented code costs a function call and a global
+lookup per stage. A sink is any callable taking each finished Span, e.g. a Recorder, which
+collects them for totals(), or log_sink(), which logs one line per span:
+
+    recorder = instrument.Recorder()
+    instrument.enable(recorder, memory=True)
+    graph = build_nx_from_lsdb(rpc.get_lsdb())
+    instrument.disable()
+    for name, total in recorder.totals().items():
+        print(name, total.self_wall, total.count)
+
+Spans nest per thread: wall and cpu include time in nested spans, self_wall and self_cpu do not,
+so self times of the stages of a streamed pipeline (ListPath, MessageToDict, filtering, all
+interleaved per response) add up to its total. With memory=True, tracemalloc runs while enabled,
+and each span records the peak of Python allocations above what was allocated when it started;
+for a streamed stage, the largest for producing any one item. tracemalloc slows allocation-heavy
+code severalfold, so time spans separately from measuring memory.
+"""
+# Standard Imports
+import logging
+import threading
+import time
+import tracemalloc
+from typing import NamedTuple
+
+_sink = None
+_memory = False
+# Whether enable started tracemalloc, and disable should stop it
+_tracing = False
+_local = threading.local()
+
+
+class Span:
+    """A timed stage; nested spans in the same thread count towards their parents' times"""
+
+    __slots__ = (
+        "name",
+        "wall",
+        "cpu",
+        "self_wall",
+        "self_cpu",
+        "memory_peak",
+        "count",
+        "bytes",
+        "depth",
+        "_start",
+        "_mem_start",
+        "_mem_peak",
+        "_child_wall",
+        "_child_cpu",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = self.cpu = self.self_wall = self.self_cpu = 0.0
+        # memory_peak is None unless enable(memory=True)
+        self.memory_peak = None
+        # count and bytes are set by the instrumented code, e.g. LSAs decoded
+        self.count = None
+        self.bytes = None
+        self.depth = 0
+
+    def __enter__(self):
+        self._resume()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pause()
+        _emit(self)
+
+    def _resume(self):
+        stack = _stack()
+        self.depth = len(stack)
+        if _memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._mem_peak = max(stack[-1]._mem_peak, peak)
+            tracemalloc.reset_peak()
+            self._mem_start = self._mem_peak = current
+        self._child_wall = self._child_cpu = 0.0
+        stack.append(self)
+        self._start = (time.perf_counter(), time.process_time())
+
+    def _pause(self):
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+        stack = _stack()
+        stack.pop()
+        self.wall += wall
+        self.cpu += cpu
+        self.self_wall += wall - self._child_wall
+        self.self_cpu += cpu - self._child_cpu
+        if stack:
+            stack[-1]._child_wall += wall
+            stack[-1]._child_cpu += cpu
+        if _memory and tracemalloc.is_tracing():
+            peak = max(self._mem_peak, tracemalloc.get_traced_memory()[1])
+            self.memory_peak = max(self.memory_peak or 0, peak - self._mem_start)
+            if stack:
+                stack[-1]._mem_peak = max(stack[-1]._mem_peak, peak)
+
+    def __repr__(self):
+        return (
+            f"Span({self.name!r}, wall={self.wall:.6f}, self_wall={self.self_wall:.6f},"
+            f" cpu={self.cpu:.6f}, memory_peak={self.memory_peak}, count={self.count},"
+            f" bytes={self.bytes})"
+        )
+
+
+class _NullSpan:
+    """Stand-in for Span while instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def _stack() -> list:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _emit(span: Span):
+    sink = _sink
+    if sink is not None:
+        sink(span)
+
+
+def enable(sink, memory: bool = False):
+    """Starts instrumentation, passing each finished Span to sink
+
+    Args:
+        sink: Callable taking a Span, e.g. a Recorder or log_sink()
+        memory: When set, tracemalloc is started (if not already) to record memory peaks
+    """
+    global _sink, _memory, _tracing  # pylint: disable=global-statement
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracing = True
+    _sink = sink
+
+
+def disable():
+    """Stops instrumentation (and tracemalloc, if enable started it)"""
+    global _sink, _memory, _tracing  # pylint: disable=global-statement
+    if _tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _sink = None
+    _memory = False
+    _tracing = False
+
+
+def enabled() -> bool:
+    """Whether a sink is set"""
+    return _sink is not None
+
+
+def span(name: str):
+    """Context manager timing a block as a stage
+
+    Returns:
+        Span, whose count and bytes the block may set; a no-op while disabled
+    """
+    if _sink is None:
+        return NULL_SPAN
+    return Span(name)
+
+
+def iterate(name: str, iterable, size=None):
+    """Times a streamed stage: the time spent producing each item of an iterable
+
+    The Span is emitted when the iterable is exhausted or the iterator closed, counting the
+    items produced.
+
+    Args:
+        name: Name of the stage
+        iterable: Iterable, e.g. a ListPath response stream or a generator decoding one
+        size: Optional callable giving each item's size in bytes, totalled as Span.bytes
+
+    Returns:
+        The iterable unchanged while disabled, else an iterator over the same items
+    """
+    if _sink is None:
+        return iterable
+    return _iterate(Span(name), iter(iterable), size)
+
+
+def _iterate(stage: Span, iterator, size):
+    stage.count = 0
+    if size is not None:
+        stage.bytes = 0
+    try:
+        while True:
+            stage._resume()  # pylint: disable=protected-access
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stage._pause()  # pylint: disable=protected-access
+            stage.count += 1
+            if size is not None:
+                stage.bytes += size(item)
+            yield item
+    finally:
+        _emit(stage)
+
+
+class StageTotal(NamedTuple):
+    """Totals of every span of one name (See: Recorder.totals)"""
+
+    calls: int
+    wall: float
+    self_wall: float
+    cpu: float
+    self_cpu: float
+    memory_peak: int
+    count: int
+    bytes: int
+
+
+class Recorder:
+    """Sink collecting every span, in the order they finish"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: Span):
+        with self._lock:
+            self.spans.append(stage)
+
+    def clear(self):
+        """Forgets the spans recorded so far"""
+        with self._lock:
+            self.spans = []
+
+    def totals(self) -> dict:
+        """Totals by span name; memory_peak is the highest of any span, counts are summed
+
+        Returns:
+            Dict of name -> StageTotal, in order of each name's first span
+        """
+        totals = {}
+        for stage in list(self.spans):
+            total = totals.get(stage.name, StageTotal(0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0))
+            totals[stage.name] = StageTotal(
+                total.calls + 1,
+                total.wall + stage.wall,
+                total.self_wall + stage.self_wall,
+                total.cpu + stage.cpu,
+                total.self_cpu + stage.self_cpu,
+                max(total.memory_peak, stage.memory_peak or 0),
+                total.count + (stage.count or 0),
+                total.bytes + (stage.bytes or 0),
+            )
+        return totals
+
+
+def log_sink(logger: logging.Logger = None, level: int = logging.INFO):
+    """Sink logging one line per span
+
+    Args:
+        logger: Logger to use, "bgp_ls_vis.instrument" if None
+        level: Level to log at
+
+    Returns:
+        Callable taking a Span
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    def sink(stage: Span):
+        if not logger.isEnabledFor(level):
+            return
+        details = [
+            f"wall={stage.wall * 1e3:.2f}ms",
+            f"self={stage.self_wall * 1e3:.2f}ms",
+            f"cpu={stage.cpu * 1e3:.2f}ms",
+        ]
+        if stage.memory_peak is not None:
+            details.append(f"memory_peak={stage.memory_peak}")
+        if stage.count is not None:
+            details.append(f"count={stage.count}")
+        if stage.bytes is not None:
+            details.append(f"bytes={stage.bytes}")
+        logger.log(level, "%s%s %s", "  " * stage.depth, stage.name, " ".join(details))
+
+    return sink
@@ -0,0 +1,48 @@
+"""Deferred imports, so heavy dependencies load only once the feature using them is used
+
+Importing bgp_ls_vis.proto used to load gRPC, PyYAML, protobuf's json_format and the generated
+GoBGP modules, and bgp_ls_vis.graphing matplotlib.pyplot, before any work was done; even loading
+a snapshot file offline paid for all of them. lazy_import hands back a stand-in instead, which
+imports the module on first attribute access:
+
+    gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+    ...
+    request = gobgp.ListPathRequest()  # gobgp_pb2 is imported here
+
+Module-level code must therefore not touch such modules, including in annotations, which are
+evaluated when a function is defined (quote them instead). benchmarks/bench_import.py reports the
+import time and the heavy modules loaded by each entry point.
+"""
+# Standard Imports
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module, importing it on first attribute access"""
+
+    def __getattr__(self, attr: str):
+        value = getattr(importlib.import_module(self.__name__), attr)
+        # Cached, so later accesses are plain attribute lookups
+        setattr(self, attr, value)
+        return value
+
+
+def lazy_import(name: str):
+    """Module `name`, imported on first attribute access rather than now
+
+    Nothing is imported until then, not even the module's parent packages (importing
+    matplotlib.pyplot first imports matplotlib, which is itself slow), so an import error, e.g.
+    for a missing optional dependency, is raised on first use.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module if it has already been imported, else a LazyModule
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -1,13 +1,54 @@
 """t"""
-# Standard Imports
-import yaml
-from google.protobuf.json_format import MessageToDict
+# Project internal imports
+from .. import instrument
+from ..lazy import lazy_import
 
 # RPC & GoBGP imports
-import grpc
-from . import gobgp_pb2 as gobgp
-from . import gobgp_pb2_grpc
-from . import attribute_pb2
+from .binary import RawGobgpApiStub, decode_raw_response
+from .channel import POOL, ChannelOptions, RetryPolicy, call_with_retry
+from .decode import decode_destination, decode_path, load_message_types
+from .lsa import LinkLSA, LsdbDelta, NodeLSA, PrefixLSA, lsa_from_dict
+from .merge import LsdbDiff, MergedLsdb, diff_lsdbs, merge_lsdbs, nlri_key
+from .snapshot import is_snapshot, iter_snapshot_lsdb, write_snapshot
+from .store import is_store, iter_store_lsdb
+
+# Loaded on first use, so that offline use (e.g. loading a snapshot) needs neither gRPC nor the
+# generated GoBGP modules (See: bgp_ls_vis.lazy)
+yaml = lazy_import("yaml")
+json_format = lazy_import("google.protobuf.json_format")
+gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+gobgp_pb2_grpc = lazy_import("bgp_ls_vis.proto.gobgp_pb2_grpc")
+attribute_pb2 = lazy_import("bgp_ls_vis.proto.attribute_pb2")
+
+
+def response_size(response) -> int:
+    """Size in bytes of a ListPath response, serialized (bytes) or not, for instrumentation"""
+    if isinstance(response, (bytes, bytearray, memoryview)):
+        return len(response)
+    return response.ByteSize()
+
+
+def build_list_path_request(binary: bool = False) -> "gobgp.ListPathRequest":
+    """Builds a structured message for RPC query to get BGP-LS table
+
+    Shared by GoBGPQueryWrapper and proto.aio.AsyncGoBGPQueryWrapper.
+
+    Args:
+        binary: When set, also requests the raw NLRI and path attribute bytes of each path
+
+    Returns:
+        gobgp.ListPathRequest: Structured message for RPC query
+    """
+    request = gobgp.ListPathRequest(
+        table_type=gobgp.LOCAL,
+        name="",
+        family=gobgp.Family(afi=gobgp.Family.AFI_LS, safi=gobgp.Family.SAFI_LS),
+        prefixes=None,
+        sort_type=True,
+        enable_nlri_binary=binary,
+        enable_attribute_binary=binary,
+    )
+    return request
 
 
 class GoBGPQueryWrapper:
@@ -18,34 +59,122 @@ class GoBGPQueryWrapper:
         target_ipv4_address: str = "",
         target_rpc_port: str = "",
         connect: bool = True,
+        direct_decode: bool = True,
+        binary: bool = False,
+        timeout: float = None,
+        retry: RetryPolicy = RetryPolicy(),
+        channel_options: ChannelOptions = None,
     ):
         """Constructor initialises RPC session
 
+        The channel is taken from the process-wide pool (See: proto.channel), so wrappers for the
+        same target and channel_options share one connection.
+
         Args:
             target_ipv4_address: Management IPv4 Address of GoBGP instance
             target_rpc_port: Management Port of GoBGP Instance
             connect: When set false, will not build grpc channel or api stub objects
+            direct_decode: When set false, RPC responses are converted with MessageToDict and
+                filtered, instead of being decoded directly from protobuf (See: proto.decode)
+            binary: When set, ListPath asks GoBGP for raw NLRI and path attribute bytes, which
+                are decoded as BGP-LS TLVs (See: proto.binary). Takes precedence over
+                direct_decode, which is used as the fallback for anything that fails to decode.
+            timeout: Deadline in seconds for each ListPath call, or None for none. When it
+                passes, the call raises grpc.RpcError with code DEADLINE_EXCEEDED.
+            retry: RetryPolicy for ListPath calls failing before their first response
+            channel_options: ChannelOptions (keepalive, compression) of the channel, defaults
+                if None
         """
+        # pylint: disable=too-many-arguments
+        self.direct_decode = direct_decode
+        self.binary = binary
+        self.timeout = timeout
+        self.retry = retry
         if connect:
-            channel = grpc.insecure_channel(f"{target_ipv4_address}:{target_rpc_port}")
+            channel = POOL.get(
+                f"{target_ipv4_address}:{target_rpc_port}", channel_options
+            )
             self.stub = gobgp_pb2_grpc.GobgpApiStub(channel)
+            self.raw_stub = RawGobgpApiStub(channel)
 
     @staticmethod
-    def __build_rpc_request() -> gobgp.ListPathRequest:
+    def __build_rpc_request(binary: bool = False) -> "gobgp.ListPathRequest":
         """Builds a structured message for RPC query to get BGP-LS table
 
+        Args:
+            binary: When set, also requests the raw NLRI and path attribute bytes of each path
+
         Returns:
             gobgp.ListPathRequest: Structured message for RPC query
         """
-        request = gobgp.ListPathRequest(
-            table_type=gobgp.LOCAL,
+        return build_list_path_request(binary)
+
+    @staticmethod
+    def __build_monitor_request(
+        current: bool, post_policy: bool
+    ) -> "gobgp.MonitorTableRequest":
+        """Builds a structured message for RPC query to stream changes to the BGP-LS table
+
+        GoBGP only supports monitoring the GLOBAL (best path) and ADJ_IN tables, so this watches
+        GLOBAL rather than the LOCAL table queried by __build_rpc_request.
+
+        Args:
+            current: When set, the current table contents are streamed first as additions
+            post_policy: Passed through to GoBGP, which applies it to ADJ_IN monitoring only
+
+        Returns:
+            gobgp.MonitorTableRequest: Structured message for RPC query
+        """
+        request = gobgp.MonitorTableRequest(
+            table_type=gobgp.GLOBAL,
             name="",
             family=gobgp.Family(afi=gobgp.Family.AFI_LS, safi=gobgp.Family.SAFI_LS),
-            prefixes=None,
-            sort_type=True,
+            current=current,
+            post_policy=post_policy,
         )
         return request
 
+    def __list_path(self, method, request):
+        """Calls ListPath with the wrapper's deadline and retry policy (See: proto.channel)"""
+        return instrument.iterate(
+            "proto.ListPath",
+            call_with_retry(method, request, timeout=self.timeout, retry=self.retry),
+            size=response_size,
+        )
+
+    def __iter_bgp_ls_table(self):
+        """Submits RPC query (structured message) for BGP-LS table, yielding NLRI as they arrive
+
+        Sends gobgp.ListPathRequest object over RPC session to get BGP-LS NLRI objects. The
+        ListPath RPC is server-streaming, so each response is converted as it is received rather
+        than materialising the whole table first.
+
+        Yields:
+            Dict objects, one per NLRI for the BGP-LS AFI/SAFI
+
+        Notes:
+            To build required structured, message, calls __build_rpc_request() first
+        """
+        responses = self.__list_path(self.stub.ListPath, self.__build_rpc_request())
+        load_message_types()
+        yield from instrument.iterate(
+            "proto.MessageToDict",
+            (json_format.MessageToDict(nlri) for nlri in responses),
+        )
+
+    def __iter_binary_lsdb(self):
+        """Queries the BGP-LS table in binary mode, decoding each response's TLVs as it arrives
+
+        Responses are received as raw bytes. Any response that fails to decode as binary (e.g. a
+        GoBGP version ignoring the enable_*_binary flags) is parsed and decoded from its protobuf
+        messages instead.
+
+        Yields:
+            LSA records, or None for NLRI types that are not Link, Prefix or Node
+        """
+        for raw in self.iter_raw_table():
+            yield decode_raw_response(raw)
+
     def __get_bgp_ls_table(self) -> list:
         """Submits RPC query (structured message) for BGP-LS table
 
@@ -53,19 +182,167 @@ class GoBGPQueryWrapper:
 
         Returns:
             List of NLRI objects for the BGP-LS AFI/SAFI
-
-        Notes:
-            To build required structured, message, calls __build_rpc_request() first
         """
-        request = self.__build_rpc_request()
-        response = self.stub.ListPath(request)
-        rtn = [MessageToDict(nlri) for nlri in response]
-        return rtn
+        return list(self.__iter_bgp_ls_table())
 
     def debug(self) -> list:
         """Dumps the raw BGP-LS table received from GoBGP"""
         return self.__get_bgp_ls_table()
 
+    def table_counts(self) -> tuple:
+        """Counts of the BGP-LS table via the GetTable RPC, a cheap check for table changes
+
+        Returns:
+            Tuple of (destinations, paths, accepted paths)
+        """
+        request = gobgp.GetTableRequest(
+            table_type=gobgp.LOCAL,
+            family=gobgp.Family(afi=gobgp.Family.AFI_LS, safi=gobgp.Family.SAFI_LS),
+            name="",
+        )
+        response = self.stub.GetTable(request, timeout=self.timeout)
+        return (response.num_destination, response.num_path, response.num_accepted)
+
+    def iter_raw_table(self):
+        """Queries the BGP-LS table in binary mode, yielding each response undecoded
+
+        Yields:
+            Serialized gobgp.ListPathResponse messages (bytes), with binary NLRI and path
+            attributes, which proto.binary.decode_raw_response turns into LSA records
+        """
+        yield from self.__list_path(
+            self.raw_stub.ListPath, self.__build_rpc_request(binary=True)
+        )
+
+    def save_snapshot(self, filename: str) -> int:
+        """Saves the BGP-LS table received from GoBGP as a snapshot file (See: proto.snapshot)
+
+        The table is requested with binary NLRI and path attributes, and each response is written
+        as received, without decoding. The snapshot can be loaded with get_lsdb(filename).
+
+        Args:
+            filename: Path of the snapshot file to write
+
+        Returns:
+            Number of NLRI written
+        """
+        return write_snapshot(filename, self.iter_raw_table())
+
+    @staticmethod
+    def __filter_nlri(nlri: dict):
+        """Cuts a single raw BGP-LS table entry down to a concise LSA
+
+        Args:
+            nlri: Dict for one destination, as given by MessageToDict on a ListPathResponse
+
+        Returns:
+            LinkLSA, PrefixLSA or NodeLSA record, or None for other NLRI types
+        """
+        best_path = [p for p in nlri["destination"]["paths"] if p["best"]][0]
+
+        paths_nlri = dict(best_path["nlri"]["nlri"])
+        protocol_id = best_path["nlri"].get("protocolId")
+
+        paths_pattrs = [dict(pattr) for pattr in best_path["pattrs"]]
+        paths_pattrs_types = [pattr["@type"] for pattr in paths_pattrs]
+
+        # Not all NLRI has the LSAttr attribute - see psueodnodes on Cisco
+        if "type.googleapis.com/gobgpapi.LsAttribute" in paths_pattrs_types:
+            paths_pattr_lsattr = [
+                attr
+                for attr in paths_pattrs
+                if attr["@type"] == "type.googleapis.com/gobgpapi.LsAttribute"
+            ][0]
+        else:
+            paths_pattr_lsattr = {
+                "node": None,
+                "link": None,
+                "prefix": None,
+            }
+
+        if paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsLinkNLRI":
+            return lsa_from_dict(
+                {
+                    "type": "Link",
+                    "localNode": paths_nlri["localNode"],
+                    "remoteNode": paths_nlri["remoteNode"],
+                    "linkDescriptor": paths_nlri["linkDescriptor"],
+                    "lsattribute": {
+                        "node": paths_pattr_lsattr["node"],
+                        "link": paths_pattr_lsattr["link"],
+                        "prefix": paths_pattr_lsattr["prefix"],
+                    },
+                    "protocolId": protocol_id,
+                }
+            )
+        if paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsPrefixV4NLRI":
+            return lsa_from_dict(
+                {
+                    "type": "Prefix",
+                    "localNode": paths_nlri["localNode"],
+                    "prefixDescriptor": paths_nlri["prefixDescriptor"],
+                    "protocolId": protocol_id,
+                }
+            )
+        if paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsNodeNLRI":
+            return lsa_from_dict(
+                {
+                    "type": "Node",
+                    "localNode": paths_nlri["localNode"],
+                    "lsattribute": {
+                        "node": paths_pattr_lsattr["node"],
+                        "link": paths_pattr_lsattr["link"],
+                        "prefix": paths_pattr_lsattr["prefix"],
+                    },
+                    "protocolId": protocol_id,
+                }
+            )
+        return None
+
+    def iter_lsdb(self, filename: str = None):
+        """Generator form of get_lsdb, yielding each concise LSA as soon as it is filtered
+
+        When querying over RPC, each ListPath response is converted and filtered as it arrives,
+        so the raw table is never held in memory as a whole. Unless direct_decode was disabled,
+        responses are decoded straight from protobuf, skipping MessageToDict entirely, or from
+        the raw BGP-LS TLVs when binary mode is set.
+
+        Args:
+            filename: Optional path to a BGP-LS table dump, loaded instead of querying over RPC.
+                Either a snapshot file (See: save_snapshot), a snapshot store (See: proto.store)
+                or a YAML dump of debug(), detected from the file contents.
+
+        Yields:
+            LSA records (See: proto.lsa), representing Link Prefix and Node LSAs
+        """
+        # Entries become LSAs by filtering MessageToDict output ("filter"), or by decoding
+        decoder = "proto.decode"
+        if filename and is_snapshot(filename):
+            lsas = iter_snapshot_lsdb(filename)
+        elif filename and is_store(filename):
+            lsas = iter_store_lsdb(filename)
+        elif filename:
+            with instrument.span("proto.load_yaml") as stage, open(
+                filename, "r"
+            ) as dump:
+                b_rib = yaml.load(dump, Loader=yaml.Loader)
+                stage.count = len(b_rib)
+            lsas = (self.__filter_nlri(nlri) for nlri in b_rib)
+            decoder = "proto.filter"
+        elif self.binary:
+            lsas = self.__iter_binary_lsdb()
+        elif self.direct_decode:
+            response = self.__list_path(self.stub.ListPath, self.__build_rpc_request())
+            lsas = (decode_destination(nlri.destination) for nlri in response)
+        else:
+            lsas = (self.__filter_nlri(nlri) for nlri in self.__iter_bgp_ls_table())
+            decoder = "proto.filter"
+
+        lsas = instrument.iterate(decoder, lsas)
+        for lsa in lsas:
+            if lsa is not None:
+                yield lsa
+
     def get_lsdb(self, filename: str = None) -> list:
         """Public method to get a version of the BGP-LS LSDB thats more concise
 
@@ -73,74 +350,35 @@ class GoBGPQueryWrapper:
         usecase requires, so this method cuts out most of the unncessary information and
         provides a concise structure of LSAs.
 
+        Args:
+            filename: Optional path to a BGP-LS table dump, loaded instead of querying over RPC.
+                Either a snapshot file (See: save_snapshot), a snapshot store (See: proto.store)
+                or a YAML dump of debug().
+
         Returns:
-            List of dict objects, representing Link Prefix and Node LSAs
+            List of LSA records (See: proto.lsa), representing Link Prefix and Node LSAs.
+            Records support the same dict-style access as the nested dicts used previously.
         """
-        b_rib = (
-            self.__get_bgp_ls_table()
-            if not filename
-            else yaml.load(open(filename, "r"), Loader=yaml.Loader)
-        )
-
-        filtered_lsdb = []
+        with instrument.span("proto.get_lsdb") as stage:
+            lsdb = list(self.iter_lsdb(filename=filename))
+            stage.count = len(lsdb)
+        return lsdb
 
-        for lsa in b_rib:
+    def watch_lsdb(self, current: bool = True, post_policy: bool = False):
+        """Streams changes to the LSDB as they happen, via the MonitorTable RPC
 
-            best_path = [p for p in lsa["destination"]["paths"] if p["best"]][0]
+        Runs until the RPC is cancelled or the GoBGP instance closes the stream. Deltas can be
+        applied to a graph from graphing.build_nx_from_lsdb with graphing.incremental.GraphUpdater.
 
-            paths_nlri = dict(best_path["nlri"]["nlri"])
-
-            paths_pattrs = [dict(pattr) for pattr in best_path["pattrs"]]
-            paths_pattrs_types = [pattr["@type"] for pattr in paths_pattrs]
-
-            # Not all NLRI has the LSAttr attribute - see psueodnodes on Cisco
-            if "type.googleapis.com/gobgpapi.LsAttribute" in paths_pattrs_types:
-                paths_pattr_lsattr = [
-                    attr
-                    for attr in paths_pattrs
-                    if attr["@type"] == "type.googleapis.com/gobgpapi.LsAttribute"
-                ][0]
-            else:
-                paths_pattr_lsattr = {
-                    "node": None,
-                    "link": None,
-                    "prefix": None,
-                }
+        Args:
+            current: When set, the current LSDB is streamed first, as one addition per LSA
+            post_policy: Passed through to MonitorTableRequest.post_policy
 
-            if paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsLinkNLRI":
-                filtered_lsdb.append(
-                    {
-                        "type": "Link",
-                        "localNode": paths_nlri["localNode"],
-                        "remoteNode": paths_nlri["remoteNode"],
-                        "linkDescriptor": paths_nlri["linkDescriptor"],
-                        "lsattribute": {
-                            # TODO: paths_pattr_lsattr may be ref before assignment
-                            "node": paths_pattr_lsattr["node"],
-                            "link": paths_pattr_lsattr["link"],
-                            "prefix": paths_pattr_lsattr["prefix"],
-                        },
-                    }
-                )
-            elif paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsPrefixV4NLRI":
-                filtered_lsdb.append(
-                    {
-                        "type": "Prefix",
-                        "localNode": paths_nlri["localNode"],
-                        "prefixDescriptor": paths_nlri["prefixDescriptor"],
-                    }
-                )
-            elif paths_nlri["@type"] == "type.googleapis.com/gobgpapi.LsNodeNLRI":
-                filtered_lsdb.append(
-                    {
-                        "type": "Node",
-                        "localNode": paths_nlri["localNode"],
-                        "lsattribute": {
-                            "node": paths_pattr_lsattr["node"],
-                            "link": paths_pattr_lsattr["link"],
-                            "prefix": paths_pattr_lsattr["prefix"],
-                        },
-                    }
-                )
-
-        return filtered_lsdb
+        Yields:
+            LsdbDelta tuples of (withdraw, lsa), where lsa is an LSA record (See: proto.lsa)
+        """
+        request = self.__build_monitor_request(current, post_policy)
+        for response in self.stub.MonitorTable(request):
+            lsa = decode_path(response.path)
+            if lsa is not None:
+                yield LsdbDelta(response.path.is_withdraw, lsa)
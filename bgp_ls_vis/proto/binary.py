@@ -0,0 +1,756 @@
+"""Binary BGP-LS fetch mode: raw NLRI / path attribute bytes instead of protobuf Any messages
+
+With ListPathRequest.enable_nlri_binary and .enable_attribute_binary set, GoBGP adds the wire
+encoding of each path's NLRI (Path.nlri_binary) and path attributes (Path.pattrs_binary) to the
+ListPath response. This module decodes those bytes straight into LSA records (See: proto.lsa):
+
+- ListPath responses are received as raw bytes (RawGobgpApiStub) and only the few Path fields
+  needed are read from the protobuf wire format, so no protobuf message objects are built at all.
+- The BGP-LS NLRI and BGP-LS attribute (path attribute type 29) TLVs of RFC 7752 are walked over
+  a memoryview and written into record slots, without intermediate per-field dicts.
+
+Values are rendered the way GoBGP renders them in its API (e.g. IS-IS system IDs as
+"0020.9000.0003", pseudonodes with a "-01" suffix), so records compare equal to those decoded from
+the protobuf messages by proto.decode. Anything unexpected raises BinaryDecodeError, upon which
+GoBGPQueryWrapper falls back to proto.decode for that response.
+
+The encode_* functions are the inverse, used to build binary tables for benchmarks and tooling.
+"""
+# Standard Imports
+import base64
+import ipaddress
+import struct
+import sys
+
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+from .decode import (
+    PROTOCOL_NAMES,
+    _shortest_float,
+    decode_destination,
+    decode_path,
+    protocol_name,
+)
+from .lsa import (
+    LinkAttribute,
+    LinkDescriptor,
+    LinkLSA,
+    LsAttribute,
+    NodeAttribute,
+    NodeDescriptor,
+    NodeLSA,
+    PrefixAttribute,
+    PrefixDescriptor,
+    PrefixLSA,
+)
+
+attribute_pb2 = lazy_import("bgp_ls_vis.proto.attribute_pb2")
+gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+
+# BGP path attribute type code for the BGP-LS attribute (RFC 7752 s3.3)
+BGP_LS_ATTRIBUTE = 29
+
+# NLRI types (RFC 7752 s3.2)
+NLRI_NODE = 1
+NLRI_LINK = 2
+NLRI_PREFIX_V4 = 3
+
+# Protocol-ID of GoBGP's LS_PROTOCOL_ISIS_L2, used when encoding records without a protocolId
+PROTOCOL_ISIS_L2 = 2
+
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+_F32 = struct.Struct(">f")
+_TLV = struct.Struct(">HH")
+_NLRI_HEADER = struct.Struct(">HHBQ")
+
+# GoBGP's rendering of LsOspfRouteType; IS-IS prefixes carry no route type and render as 0
+OSPF_ROUTE_TYPES = {
+    1: "INTRA-AREA",
+    2: "INTER-AREA",
+    3: "EXTERNAL1",
+    4: "EXTERNAL2",
+    5: "NSSA1",
+    6: "NSSA2",
+}
+
+# Flag bit -> JSON key, for the flag TLVs rendered as dicts of set flags
+NODE_FLAGS = (
+    (0x80, "overload"),
+    (0x40, "attached"),
+    (0x20, "external"),
+    (0x10, "abr"),
+    (0x08, "router"),
+    (0x04, "v6"),
+)
+IGP_FLAGS = (
+    (0x80, "down"),
+    (0x40, "noUnicast"),
+    (0x20, "localAddress"),
+    (0x10, "propagateNssa"),
+)
+
+
+class BinaryDecodeError(ValueError):
+    """Raised when binary NLRI or attributes are missing, truncated or malformed"""
+
+
+class RawGobgpApiStub:
+    """Minimal GobgpApi stub whose ListPath yields each response as undecoded bytes"""
+
+    def __init__(self, channel):
+        """Constructor
+
+        Args:
+            channel: A grpc.Channel
+        """
+        self.ListPath = channel.unary_stream(  # pylint: disable=invalid-name
+            "/gobgpapi.GobgpApi/ListPath",
+            request_serializer=gobgp.ListPathRequest.SerializeToString,
+            response_deserializer=None,
+        )
+
+
+# Protobuf wire format
+
+
+def _varint(buf, pos: int):
+    """Reads a protobuf varint, returning (value, position after it)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip(buf, pos: int, wire_type: int) -> int:
+    """Skips over a protobuf field value of the given wire type, returning the new position"""
+    if wire_type == 0:
+        return _varint(buf, pos)[1]
+    if wire_type == 2:
+        length, pos = _varint(buf, pos)
+        return pos + length
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 5:
+        return pos + 4
+    raise BinaryDecodeError(f"Unsupported protobuf wire type {wire_type}")
+
+
+def _submessage(buf, pos: int, end: int, field_number: int):
+    """Yields (start, end) of each length-delimited field_number field in buf[pos:end]"""
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        if key >> 3 == field_number and key & 7 == 2:
+            length, pos = _varint(buf, pos)
+            yield pos, pos + length
+            pos += length
+        else:
+            pos = _skip(buf, pos, key & 7)
+
+
+def read_path(buf, pos: int, end: int):
+    """Reads the fields of a gobgpapi.Path needed for binary decoding
+
+    Args:
+        buf: memoryview over a serialized message containing the Path
+        pos: Start offset of the Path
+        end: End offset of the Path
+
+    Returns:
+        Tuple of (best, is_withdraw, nlri_binary, [pattrs_binary, ...]), bytes as memoryviews
+    """
+    best = withdraw = False
+    nlri = None
+    pattrs = []
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        field_number = key >> 3
+        if field_number == 4:
+            value, pos = _varint(buf, pos)
+            best = bool(value)
+        elif field_number == 5:
+            value, pos = _varint(buf, pos)
+            withdraw = bool(value)
+        elif field_number in (20, 21):
+            length, pos = _varint(buf, pos)
+            if field_number == 20:
+                nlri = buf[pos : pos + length]
+            else:
+                pattrs.append(buf[pos : pos + length])
+            pos += length
+        else:
+            pos = _skip(buf, pos, key & 7)
+    return best, withdraw, nlri, pattrs
+
+
+def decode_list_path_response(raw: bytes):
+    """Decodes a serialized ListPathResponse received with the binary flags set
+
+    Args:
+        raw: Serialized gobgpapi.ListPathResponse
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record for the best path, or None for other NLRI types
+
+    Raises:
+        BinaryDecodeError: If there is no best path carrying nlri_binary, or it fails to decode
+    """
+    buf = memoryview(raw)
+    try:
+        for dest_start, dest_end in _submessage(buf, 0, len(buf), 1):
+            for path_start, path_end in _submessage(buf, dest_start, dest_end, 2):
+                best, _, nlri, pattrs = read_path(buf, path_start, path_end)
+                if best:
+                    return decode_binary_path(nlri, pattrs)
+    except (IndexError, struct.error, UnicodeDecodeError, ValueError) as err:
+        raise BinaryDecodeError(str(err)) from err
+    raise BinaryDecodeError("No best path in ListPath response")
+
+
+def decode_raw_response(raw: bytes):
+    """Decodes a serialized ListPathResponse, from its binary fields where it has them
+
+    Any response that fails to decode as binary (e.g. from a GoBGP version ignoring the
+    enable_*_binary flags) is parsed and decoded from its protobuf messages instead.
+
+    Args:
+        raw: Serialized gobgpapi.ListPathResponse
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record for the best path, or None for other NLRI types
+    """
+    try:
+        return decode_list_path_response(raw)
+    except BinaryDecodeError:
+        return decode_destination(gobgp.ListPathResponse.FromString(raw).destination)
+
+
+def decode_binary_path(nlri, pattrs):
+    """Decodes the binary NLRI and path attributes of one path into an LSA record
+
+    Args:
+        nlri: BGP-LS NLRI bytes (Path.nlri_binary)
+        pattrs: Iterable of path attribute bytes (Path.pattrs_binary)
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record, or None for other NLRI types
+
+    Raises:
+        BinaryDecodeError: If nlri is empty, e.g. GoBGP ignored enable_nlri_binary
+    """
+    if not nlri:
+        raise BinaryDecodeError("Path has no nlri_binary")
+    lsa = decode_nlri(nlri)
+    if lsa is None or lsa.type == "Prefix":
+        return lsa
+
+    lsa.lsattribute = LsAttribute()
+    for pattr in pattrs:
+        type_code, value = split_path_attribute(pattr)
+        if type_code == BGP_LS_ATTRIBUTE:
+            lsa.lsattribute = decode_ls_attribute(value)
+            break
+    return lsa
+
+
+def split_path_attribute(pattr):
+    """Splits a serialized BGP path attribute into (type code, value)"""
+    pattr = memoryview(pattr)
+    flags, type_code = pattr[0], pattr[1]
+    if flags & 0x10:  # Extended Length
+        length = _U16.unpack_from(pattr, 2)[0]
+        start = 4
+    else:
+        length = pattr[2]
+        start = 3
+    if start + length > len(pattr):
+        raise BinaryDecodeError(f"Truncated path attribute type {type_code}")
+    return type_code, pattr[start : start + length]
+
+
+# BGP-LS NLRI TLVs
+
+
+def _ipv4(value) -> str:
+    if len(value) != 4:
+        raise BinaryDecodeError(f"Invalid IPv4 address length {len(value)}")
+    return "%d.%d.%d.%d" % tuple(value)  # pylint: disable=consider-using-f-string
+
+
+def _ip(value) -> str:
+    if len(value) == 4:
+        return _ipv4(value)
+    return str(ipaddress.IPv6Address(bytes(value)))
+
+
+def format_igp_router_id(value):
+    """Renders an IGP Router-ID sub-TLV value as GoBGP does
+
+    Returns:
+        Tuple of (router ID string, pseudonode flag)
+    """
+    if len(value) == 6:  # IS-IS non-pseudonode
+        return "{:02x}{:02x}.{:02x}{:02x}.{:02x}{:02x}".format(*value), False
+    if len(value) == 7:  # IS-IS pseudonode
+        return "{:02x}{:02x}.{:02x}{:02x}.{:02x}{:02x}-{:02x}".format(*value), True
+    if len(value) == 4:  # OSPF non-pseudonode
+        return _ipv4(value), False
+    if len(value) == 8:  # OSPF pseudonode
+        return f"{_ipv4(value[:4])}:{_ipv4(value[4:])}", True
+    raise BinaryDecodeError(f"Invalid IGP Router-ID length {len(value)}")
+
+
+def decode_node_descriptor(buf, pos: int, end: int) -> NodeDescriptor:
+    """Decodes Local/Remote Node Descriptor sub-TLVs in buf[pos:end]"""
+    asn = bgp_ls_id = ospf_area_id = pseudonode = igp_router_id = None
+    while pos < end:
+        tlv_type, length = _TLV.unpack_from(buf, pos)
+        pos += 4
+        if tlv_type == 512:
+            asn = _U32.unpack_from(buf, pos)[0] or None
+        elif tlv_type == 513:
+            bgp_ls_id = _U32.unpack_from(buf, pos)[0] or None
+        elif tlv_type == 514:
+            ospf_area_id = _U32.unpack_from(buf, pos)[0] or None
+        elif tlv_type == 515:
+            igp_router_id, pseudonode = format_igp_router_id(buf[pos : pos + length])
+            pseudonode = pseudonode or None
+        pos += length
+    return NodeDescriptor(asn, bgp_ls_id, ospf_area_id, pseudonode, igp_router_id)
+
+
+def decode_nlri(nlri):
+    """Decodes a BGP-LS NLRI (RFC 7752 s3.2) into an LSA record, without its lsattribute
+
+    Args:
+        nlri: NLRI bytes, starting at the 2-byte NLRI Type
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record, or None for other NLRI types (e.g. IPv6 Prefix).
+        lsattribute of Node and Link LSAs is left unset, for the caller to fill.
+    """
+    buf = memoryview(nlri)
+    nlri_type, length, protocol_id, _ = _NLRI_HEADER.unpack_from(buf, 0)
+    if nlri_type not in (NLRI_NODE, NLRI_LINK, NLRI_PREFIX_V4):
+        return None
+    end = 4 + length
+    if end > len(buf):
+        raise BinaryDecodeError("Truncated BGP-LS NLRI")
+
+    local_node = remote_node = None
+    link_descriptor = LinkDescriptor() if nlri_type == NLRI_LINK else None
+    prefix_descriptor = PrefixDescriptor() if nlri_type == NLRI_PREFIX_V4 else None
+    pos = _NLRI_HEADER.size
+    while pos < end:
+        tlv_type, tlv_length = _TLV.unpack_from(buf, pos)
+        pos += 4
+        tlv_end = pos + tlv_length
+        if tlv_type == 256:
+            local_node = decode_node_descriptor(buf, pos, tlv_end)
+        elif tlv_type == 257:
+            remote_node = decode_node_descriptor(buf, pos, tlv_end)
+        elif tlv_type == 258:
+            link_descriptor.link_local_id = _U32.unpack_from(buf, pos)[0] or None
+            link_descriptor.link_remote_id = _U32.unpack_from(buf, pos + 4)[0] or None
+        elif tlv_type == 259:
+            link_descriptor.interface_addr_ipv4 = _ipv4(buf[pos:tlv_end])
+        elif tlv_type == 260:
+            link_descriptor.neighbor_addr_ipv4 = _ipv4(buf[pos:tlv_end])
+        elif tlv_type == 261:
+            link_descriptor.interface_addr_ipv6 = _ip(buf[pos:tlv_end])
+        elif tlv_type == 262:
+            link_descriptor.neighbor_addr_ipv6 = _ip(buf[pos:tlv_end])
+        elif tlv_type == 264:
+            prefix_descriptor.ospf_route_type = OSPF_ROUTE_TYPES.get(buf[pos])
+        elif tlv_type == 265:
+            prefix_len = buf[pos]
+            address = bytes(buf[pos + 1 : tlv_end]).ljust(4, b"\0")
+            if prefix_descriptor.ip_reachability is None:
+                prefix_descriptor.ip_reachability = []
+            prefix_descriptor.ip_reachability.append(f"{_ipv4(address)}/{prefix_len}")
+        pos = tlv_end
+
+    if local_node is None:
+        raise BinaryDecodeError("BGP-LS NLRI has no Local Node Descriptors")
+    if nlri_type == NLRI_NODE:
+        return NodeLSA(local_node, None, protocol_name(protocol_id))
+    if nlri_type == NLRI_LINK:
+        if remote_node is None:
+            raise BinaryDecodeError("Link NLRI has no Remote Node Descriptors")
+        return LinkLSA(
+            local_node, remote_node, link_descriptor, None, protocol_name(protocol_id)
+        )
+    if prefix_descriptor.ospf_route_type is None:
+        # GoBGP renders an absent route type as the zero value of its enum
+        prefix_descriptor.ospf_route_type = "LsOspfRouteType(0)"
+    return PrefixLSA(local_node, prefix_descriptor, protocol_name(protocol_id))
+
+
+# BGP-LS attribute TLVs
+
+
+def _uint(value) -> int:
+    return int.from_bytes(value, "big")
+
+
+def _b64(value) -> str:
+    return base64.b64encode(value).decode("utf-8")
+
+
+def _float(buf, pos: int) -> float:
+    return _shortest_float(_F32.unpack_from(buf, pos)[0])
+
+
+def _flags(value: int, names: tuple) -> dict:
+    return {name: True for bit, name in names if value & bit}
+
+
+def _sid(value) -> int:
+    """SID/Label value of an SR TLV: a 20-bit label in 3 bytes, or a 4 byte index"""
+    if len(value) == 3:
+        return _uint(value) & 0xFFFFF
+    return _uint(value)
+
+
+def _sr_ranges(buf, pos: int, end: int) -> list:
+    """Decodes SR range entries (3 byte range size + SID/Label sub-TLV) into LsSrRange dicts"""
+    ranges = []
+    while pos < end:
+        size = _uint(buf[pos : pos + 3])
+        _, length = _TLV.unpack_from(buf, pos + 3)
+        begin = _sid(buf[pos + 7 : pos + 7 + length])
+        ranges.append(
+            {key: val for key, val in (("begin", begin), ("end", begin + size)) if val}
+        )
+        pos += 7 + length
+    return ranges
+
+
+def decode_ls_attribute(value) -> LsAttribute:
+    """Decodes the value of a BGP-LS attribute (RFC 7752 s3.3) into an LsAttribute record
+
+    Args:
+        value: Path attribute value, i.e. the concatenated Node, Link and Prefix attribute TLVs
+
+    Returns:
+        LsAttribute record, with node, link and prefix always set as GoBGP does
+    """
+    buf = memoryview(value)
+    node, link, prefix = NodeAttribute(), LinkAttribute(), PrefixAttribute()
+    pos, end = 0, len(buf)
+    while pos < end:
+        tlv_type, length = _TLV.unpack_from(buf, pos)
+        pos += 4
+        tlv_end = pos + length
+        if tlv_end > end:
+            raise BinaryDecodeError(f"Truncated BGP-LS attribute TLV {tlv_type}")
+        data = buf[pos:tlv_end]
+
+        # Node Attribute TLVs
+        if tlv_type == 1024:
+            node.flags = _flags(data[0], NODE_FLAGS)
+        elif tlv_type == 1025:
+            node.opaque = _b64(data)
+        elif tlv_type == 1026:
+            node.name = str(data, "utf-8")
+        elif tlv_type == 1027:
+            node.isis_area = _b64(data)
+        elif tlv_type == 1028:
+            router_id = sys.intern(_ipv4(data))
+            node.local_router_id = link.local_router_id = router_id
+        elif tlv_type == 1029:
+            node.local_router_id_v6 = link.local_router_id_v6 = _ip(data)
+        elif tlv_type == 1034:
+            caps = _flags(data[0], ((0x80, "ipv4Supported"), (0x40, "ipv6Supported")))
+            ranges = _sr_ranges(buf, pos + 2, tlv_end)
+            if ranges:
+                caps["ranges"] = ranges
+            node.sr_capabilities = caps
+        elif tlv_type == 1035:
+            node.sr_algorithms = _b64(data)
+        elif tlv_type == 1036:
+            ranges = _sr_ranges(buf, pos + 2, tlv_end)
+            node.sr_local_block = {"ranges": ranges} if ranges else {}
+
+        # Link Attribute TLVs
+        elif tlv_type == 1030:
+            link.remote_router_id = sys.intern(_ipv4(data))
+        elif tlv_type == 1031:
+            link.remote_router_id_v6 = _ip(data)
+        elif tlv_type == 1088:
+            link.admin_group = _uint(data) or None
+        elif tlv_type == 1089:
+            link.bandwidth = _float(buf, pos) or None
+        elif tlv_type == 1090:
+            link.reservable_bandwidth = _float(buf, pos) or None
+        elif tlv_type == 1091:
+            link.unreserved_bandwidth = tuple(
+                _float(buf, offset) for offset in range(pos, tlv_end, 4)
+            )
+        elif tlv_type == 1092:
+            link.default_te_metric = _uint(data) or None
+        elif tlv_type == 1095:
+            if length == 1:
+                link.igp_metric = (data[0] & 0x3F) or None
+            else:
+                link.igp_metric = _uint(data) or None
+        elif tlv_type == 1096:
+            link.srlgs = tuple(
+                _U32.unpack_from(buf, offset)[0] for offset in range(pos, tlv_end, 4)
+            )
+        elif tlv_type == 1097:
+            link.opaque = _b64(data)
+        elif tlv_type == 1098:
+            link.name = str(data, "utf-8")
+        elif tlv_type == 1099:
+            link.sr_adjacency_sid = _sid(data[4:]) or None
+
+        # Prefix Attribute TLVs
+        elif tlv_type == 1152:
+            prefix.igp_flags = _flags(data[0], IGP_FLAGS)
+        elif tlv_type == 1157:
+            prefix.opaque = _b64(data)
+        elif tlv_type == 1158:
+            prefix.sr_prefix_sid = _sid(data[4:]) or None
+
+        pos = tlv_end
+    return LsAttribute(node=node, link=link, prefix=prefix)
+
+
+# Encoding
+
+
+def _tlv(tlv_type: int, value: bytes) -> bytes:
+    return _TLV.pack(tlv_type, len(value)) + value
+
+
+def parse_igp_router_id(igp_router_id: str) -> bytes:
+    """Inverse of format_igp_router_id"""
+    if ":" in igp_router_id:
+        local, designated = igp_router_id.split(":")
+        return (
+            ipaddress.IPv4Address(local).packed
+            + ipaddress.IPv4Address(designated).packed
+        )
+    if "." in igp_router_id and igp_router_id.count(".") == 3:
+        return ipaddress.IPv4Address(igp_router_id).packed
+    system_id, _, psn = igp_router_id.partition("-")
+    return bytes.fromhex(system_id.replace(".", "") + psn)
+
+
+def encode_node_descriptor(descriptor) -> bytes:
+    """Encodes Node Descriptor sub-TLVs from a NodeDescriptor record (or dict)"""
+    value = b""
+    for key, tlv_type in (("asn", 512), ("bgpLsId", 513), ("ospfAreaId", 514)):
+        if descriptor.get(key):
+            value += _tlv(tlv_type, _U32.pack(descriptor[key]))
+    if descriptor.get("igpRouterId"):
+        value += _tlv(515, parse_igp_router_id(descriptor["igpRouterId"]))
+    return value
+
+
+# LsProtocolID enum name -> BGP-LS Protocol-ID
+_PROTOCOL_IDS = {name: value for value, name in PROTOCOL_NAMES.items()}
+
+
+def encode_nlri(lsa, protocol_id: int = None, identifier: int = 0) -> bytes:
+    """Encodes the NLRI of an LSA record (or dict) as BGP-LS NLRI bytes
+
+    Args:
+        lsa: NodeLSA, LinkLSA or PrefixLSA record, or its dict form
+        protocol_id: BGP-LS Protocol-ID. Defaults to the protocolId of the LSA, or
+            PROTOCOL_ISIS_L2 if it has none.
+        identifier: BGP-LS Identifier (instance ID)
+
+    Returns:
+        NLRI bytes, starting at the NLRI Type, as found in Path.nlri_binary
+    """
+    if protocol_id is None:
+        protocol_id = lsa.get("protocolId", PROTOCOL_ISIS_L2)
+        if isinstance(protocol_id, str):
+            protocol_id = _PROTOCOL_IDS[protocol_id]
+    body = _tlv(256, encode_node_descriptor(lsa["localNode"]))
+    if lsa["type"] == "Node":
+        nlri_type = NLRI_NODE
+    elif lsa["type"] == "Link":
+        nlri_type = NLRI_LINK
+        body += _tlv(257, encode_node_descriptor(lsa["remoteNode"]))
+        descriptor = lsa["linkDescriptor"]
+        if descriptor.get("linkLocalId") or descriptor.get("linkRemoteId"):
+            body += _tlv(
+                258,
+                _U32.pack(descriptor.get("linkLocalId", 0))
+                + _U32.pack(descriptor.get("linkRemoteId", 0)),
+            )
+        for key, tlv_type in (
+            ("interfaceAddrIpv4", 259),
+            ("neighborAddrIpv4", 260),
+            ("interfaceAddrIpv6", 261),
+            ("neighborAddrIpv6", 262),
+        ):
+            if descriptor.get(key):
+                body += _tlv(tlv_type, ipaddress.ip_address(descriptor[key]).packed)
+    else:
+        nlri_type = NLRI_PREFIX_V4
+        descriptor = lsa["prefixDescriptor"]
+        route_types = {name: code for code, name in OSPF_ROUTE_TYPES.items()}
+        if descriptor.get("ospfRouteType") in route_types:
+            body += _tlv(264, bytes([route_types[descriptor["ospfRouteType"]]]))
+        for prefix in descriptor.get("ipReachability", []):
+            network = ipaddress.IPv4Network(prefix, strict=False)
+            octets = (network.prefixlen + 7) // 8
+            body += _tlv(
+                265,
+                bytes([network.prefixlen]) + network.network_address.packed[:octets],
+            )
+    header = struct.pack(">BQ", protocol_id, identifier)
+    return _U16.pack(nlri_type) + _U16.pack(len(header) + len(body)) + header + body
+
+
+def _flag_byte(flags: dict, names: tuple) -> bytes:
+    return bytes([sum(bit for bit, name in names if flags.get(name))])
+
+
+def _encode_sr_ranges(ranges: list) -> bytes:
+    value = b""
+    for sr_range in ranges:
+        begin = sr_range.get("begin", 0)
+        size = sr_range.get("end", 0) - begin
+        value += size.to_bytes(3, "big") + _tlv(
+            1161, (begin & 0xFFFFF).to_bytes(3, "big")
+        )
+    return value
+
+
+def encode_ls_attribute(lsattribute) -> bytes:
+    """Encodes an LsAttribute record (or dict) as BGP-LS attribute TLVs
+
+    Router IDs shared between the node and link sections (TLVs 1028/1029) are taken from the
+    node section, falling back to the link section.
+
+    Args:
+        lsattribute: LsAttribute record, or its dict form
+
+    Returns:
+        Path attribute value bytes, without the path attribute header
+    """
+    node = lsattribute["node"] or {}
+    link = lsattribute["link"] or {}
+    prefix = lsattribute["prefix"] or {}
+    value = b""
+
+    if "flags" in node:
+        value += _tlv(1024, _flag_byte(node["flags"], NODE_FLAGS))
+    if "opaque" in node:
+        value += _tlv(1025, base64.b64decode(node["opaque"]))
+    if "name" in node:
+        value += _tlv(1026, node["name"].encode("utf-8"))
+    if "isisArea" in node:
+        value += _tlv(1027, base64.b64decode(node["isisArea"]))
+    router_id = node.get("localRouterId") or link.get("localRouterId")
+    if router_id:
+        value += _tlv(1028, ipaddress.IPv4Address(router_id).packed)
+    router_id = node.get("localRouterIdV6") or link.get("localRouterIdV6")
+    if router_id:
+        value += _tlv(1029, ipaddress.IPv6Address(router_id).packed)
+    if "srCapabilities" in node:
+        caps = node["srCapabilities"]
+        flags = _flag_byte(caps, ((0x80, "ipv4Supported"), (0x40, "ipv6Supported")))
+        value += _tlv(1034, flags + b"\0" + _encode_sr_ranges(caps.get("ranges", [])))
+    if "srAlgorithms" in node:
+        value += _tlv(1035, base64.b64decode(node["srAlgorithms"]))
+    if "srLocalBlock" in node:
+        value += _tlv(
+            1036, b"\0\0" + _encode_sr_ranges(node["srLocalBlock"].get("ranges", []))
+        )
+
+    if "remoteRouterId" in link:
+        value += _tlv(1030, ipaddress.IPv4Address(link["remoteRouterId"]).packed)
+    if "remoteRouterIdV6" in link:
+        value += _tlv(1031, ipaddress.IPv6Address(link["remoteRouterIdV6"]).packed)
+    if "adminGroup" in link:
+        value += _tlv(1088, _U32.pack(link["adminGroup"]))
+    if "bandwidth" in link:
+        value += _tlv(1089, _F32.pack(link["bandwidth"]))
+    if "reservableBandwidth" in link:
+        value += _tlv(1090, _F32.pack(link["reservableBandwidth"]))
+    if "unreservedBandwidth" in link:
+        value += _tlv(
+            1091, b"".join(_F32.pack(bw) for bw in link["unreservedBandwidth"])
+        )
+    if "defaultTeMetric" in link:
+        value += _tlv(1092, _U32.pack(link["defaultTeMetric"]))
+    if "igpMetric" in link:
+        value += _tlv(1095, link["igpMetric"].to_bytes(3, "big"))
+    if "srlgs" in link:
+        value += _tlv(1096, b"".join(_U32.pack(srlg) for srlg in link["srlgs"]))
+    if "opaque" in link:
+        value += _tlv(1097, base64.b64decode(link["opaque"]))
+    if "name" in link:
+        value += _tlv(1098, link["name"].encode("utf-8"))
+    if "srAdjacencySid" in link:
+        value += _tlv(1099, b"\0\0\0\0" + _U32.pack(link["srAdjacencySid"]))
+
+    if "igpFlags" in prefix:
+        value += _tlv(1152, _flag_byte(prefix["igpFlags"], IGP_FLAGS))
+    if "opaque" in prefix:
+        value += _tlv(1157, base64.b64decode(prefix["opaque"]))
+    if "srPrefixSid" in prefix:
+        value += _tlv(1158, b"\0\0\0\0" + _U32.pack(prefix["srPrefixSid"]))
+    return value
+
+
+def encode_path_attribute(type_code: int, value: bytes, flags: int = 0x80) -> bytes:
+    """Wraps a path attribute value with its BGP header (flags, type code, length)
+
+    Args:
+        type_code: Path attribute type code, e.g. BGP_LS_ATTRIBUTE
+        value: Path attribute value
+        flags: Attribute flags; Optional by default. Extended Length is set as needed.
+
+    Returns:
+        Path attribute bytes, as found in Path.pattrs_binary
+    """
+    if len(value) > 255:
+        return bytes([flags | 0x10, type_code]) + _U16.pack(len(value)) + value
+    return bytes([flags & ~0x10, type_code, len(value)]) + value
+
+
+def encode_path_attributes(lsa) -> list:
+    """Path attributes of an LSA for Path.pattrs_binary: just the BGP-LS attribute, if any"""
+    lsattribute = lsa.get("lsattribute")
+    if lsattribute is None or lsattribute["node"] is None:
+        return []
+    return [encode_path_attribute(BGP_LS_ATTRIBUTE, encode_ls_attribute(lsattribute))]
+
+
+def add_binary_fields(
+    response: "gobgp.ListPathResponse",
+) -> "gobgp.ListPathResponse":
+    """Fills nlri_binary and pattrs_binary of each path from its protobuf NLRI and attributes
+
+    Mirrors what GoBGP does for a ListPathRequest with the binary flags set, so that tables
+    captured without them (e.g. the dumps under tests/) can be served or benchmarked in binary.
+    Only the BGP-LS attribute is encoded into pattrs_binary.
+
+    Args:
+        response: ListPathResponse, modified in place
+
+    Returns:
+        The same response
+    """
+    for path in response.destination.paths:
+        ls_prefix = attribute_pb2.LsAddrPrefix.FromString(path.nlri.value)
+        lsa = decode_path(path)
+        if lsa is None:
+            continue
+        path.nlri_binary = encode_nlri(lsa, ls_prefix.protocol_id, ls_prefix.identifier)
+        path.pattrs_binary[:] = encode_path_attributes(lsa)
+    return response
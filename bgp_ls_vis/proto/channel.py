@@ -0,0 +1,183 @@
+"""Shared gRPC channels to GoBGP, with keepalive, deadlines and retries
+
+Each GoBGPQueryWrapper used to open its own channel with gRPC's defaults: no keepalive, so a
+collector that silently went away left the connection (and any ListPath on it) hanging until the
+OS gave up on it, and no deadline or retry on the call itself. Channels are now taken from a
+process-wide pool, so wrappers created for the same target on every refresh share one
+connection, configured by ChannelOptions. ListPath calls are made through call_with_retry, which
+applies a deadline and retries calls that failed before any response arrived.
+
+gzip compression is optional (ChannelOptions.compression). It compresses the requests sent, and
+asks the server to compress its responses, which gRPC servers do only when configured to; see
+benchmarks/bench_channel.py for what it saves on the BGP-LS table.
+"""
+# Standard Imports
+import random
+import threading
+import time
+from typing import NamedTuple
+
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+grpc = lazy_import("grpc")
+
+
+class ChannelOptions(NamedTuple):
+    """Options of a pooled channel; channels to one target with different options are separate
+
+    Attributes:
+        keepalive_time: Seconds between HTTP/2 keepalive pings while calls are active, or None to
+            disable keepalive. gRPC servers (GoBGP included) by default reject pings more often
+            than every 300 seconds, closing the connection.
+        keepalive_timeout: Seconds to wait for a ping to be acknowledged before the connection
+            is considered dead, failing the calls on it with UNAVAILABLE
+        compression: When set, the channel uses gzip compression
+        max_receive_message_length: Largest response message accepted, in bytes (-1: no limit)
+    """
+
+    keepalive_time: float = 300.0
+    keepalive_timeout: float = 20.0
+    compression: bool = False
+    max_receive_message_length: int = -1
+
+
+class RetryPolicy(NamedTuple):
+    """Retries of calls that fail before any response is received, with exponential backoff
+
+    Attributes:
+        max_attempts: Total attempts, including the first; 1 disables retries
+        initial_backoff: Seconds to wait before the first retry
+        max_backoff: Upper bound on the wait between attempts
+        multiplier: Factor the wait grows by after each retry
+        retryable_codes: Names of the grpc.StatusCode values worth retrying (StatusCode members
+            are accepted too)
+    """
+
+    max_attempts: int = 3
+    initial_backoff: float = 0.2
+    max_backoff: float = 5.0
+    multiplier: float = 2.0
+    retryable_codes: frozenset = frozenset({"UNAVAILABLE"})
+
+    def retryable(self, code) -> bool:
+        """Whether a call failing with grpc.StatusCode `code` is worth retrying"""
+        return code in self.retryable_codes or code.name in self.retryable_codes
+
+    def backoff(self, attempt: int) -> float:
+        """Wait before retry number `attempt` (from 1), with full jitter"""
+        ceiling = min(
+            self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1)
+        )
+        return random.uniform(0, ceiling)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def channel_arguments(options: ChannelOptions) -> list:
+    """gRPC channel arguments for a set of ChannelOptions"""
+    arguments = [
+        ("grpc.max_receive_message_length", options.max_receive_message_length)
+    ]
+    if options.keepalive_time is not None:
+        arguments += [
+            ("grpc.keepalive_time_ms", int(options.keepalive_time * 1000)),
+            ("grpc.keepalive_timeout_ms", int(options.keepalive_timeout * 1000)),
+            ("grpc.keepalive_permit_without_calls", 0),
+            ("grpc.http2.max_pings_without_data", 0),
+        ]
+    return arguments
+
+
+def channel_compression(options: ChannelOptions):
+    """grpc.Compression of a set of ChannelOptions"""
+    return (
+        grpc.Compression.Gzip if options.compression else grpc.Compression.NoCompression
+    )
+
+
+class ChannelPool:
+    """Thread-safe pool of open channels, keyed by target and ChannelOptions"""
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def get(self, target: str, options: ChannelOptions = None) -> "grpc.Channel":
+        """Channel to a target, opened on first use and shared afterwards
+
+        Args:
+            target: "address:port" of the GoBGP instance
+            options: ChannelOptions, defaults if None
+
+        Returns:
+            grpc.Channel
+        """
+        key = (target, options or ChannelOptions())
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = grpc.insecure_channel(
+                    target,
+                    options=channel_arguments(key[1]),
+                    compression=channel_compression(key[1]),
+                )
+                self._channels[key] = channel
+            return channel
+
+    def close(self, target: str = None):
+        """Closes and forgets the pooled channels to one target, or all of them
+
+        Calls in progress on them are cancelled.
+        """
+        with self._lock:
+            for key in [key for key in self._channels if target in (None, key[0])]:
+                self._channels.pop(key).close()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+
+# The process-wide pool used by GoBGPQueryWrapper
+POOL = ChannelPool()
+
+
+def call_with_retry(
+    method, request, timeout: float = None, retry: RetryPolicy = NO_RETRY
+):
+    """Makes a server-streaming call, retrying it while it fails before its first response
+
+    Once a response has been yielded the call is not retried, since the caller has already
+    consumed part of it; errors after that point are raised as they are.
+
+    Args:
+        method: Server-streaming multi-callable, e.g. stub.ListPath
+        request: Request message
+        timeout: Deadline in seconds for each attempt, or None for none
+        retry: RetryPolicy
+
+    Yields:
+        Each response of the call
+
+    Raises:
+        grpc.RpcError: If the last attempt fails, or a non-retryable error occurs
+    """
+    attempt = 1
+    while True:
+        received = False
+        try:
+            for response in method(request, timeout=timeout):
+                received = True
+                yield response
+            return
+        except grpc.RpcError as error:
+            if (
+                received
+                or attempt >= retry.max_attempts
+                or not retry.retryable(error.code())
+            ):
+                raise
+        time.sleep(retry.backoff(attempt))
+        attempt += 1
@@ -0,0 +1,253 @@
+"""Direct decoding of GoBGP BGP-LS protobufs into concise LSAs
+
+GoBGPQueryWrapper originally ran MessageToDict over every ListPath response and then filtered
+the resulting camelCase dicts. Most of that work is wasted: every path attribute (including the
+MpReachNLRI copy of the NLRI) is converted, and each google.protobuf.Any is resolved through the
+descriptor pool by name. The functions here instead dispatch on the Any type URL, parse only the
+LS messages that are needed, and fill the LSA records (See: proto.lsa) directly from the protobuf
+fields.
+"""
+# Standard Imports
+import base64
+import functools
+import struct
+
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+from .lsa import (
+    LinkAttribute,
+    LinkDescriptor,
+    LinkLSA,
+    LsAttribute,
+    NodeAttribute,
+    NodeDescriptor,
+    NodeLSA,
+    PrefixAttribute,
+    PrefixDescriptor,
+    PrefixLSA,
+)
+
+attribute_pb2 = lazy_import("bgp_ls_vis.proto.attribute_pb2")
+
+TYPE_URL_PREFIX = "type.googleapis.com/gobgpapi."
+LS_ATTRIBUTE_TYPE_URL = TYPE_URL_PREFIX + "LsAttribute"
+
+# BGP-LS Protocol-ID -> LsProtocolID enum name, as MessageToDict renders LsAddrPrefix.protocol_id.
+# Spelled out rather than read from attribute_pb2, so the binary decoder can do without it.
+PROTOCOL_NAMES = {
+    1: "LS_PROTOCOL_ISIS_L1",
+    2: "LS_PROTOCOL_ISIS_L2",
+    3: "LS_PROTOCOL_OSPF_V2",
+    4: "LS_PROTOCOL_DIRECT",
+    5: "LS_PROTOCOL_STATIC",
+    6: "LS_PROTOCOL_OSPF_V3",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def nlri_types() -> dict:
+    """Type URL of the NLRI carried inside LsAddrPrefix.nlri -> (LSA record, message class)"""
+    return {
+        TYPE_URL_PREFIX + "LsLinkNLRI": (LinkLSA, attribute_pb2.LsLinkNLRI),
+        TYPE_URL_PREFIX + "LsPrefixV4NLRI": (PrefixLSA, attribute_pb2.LsPrefixV4NLRI),
+        TYPE_URL_PREFIX + "LsNodeNLRI": (NodeLSA, attribute_pb2.LsNodeNLRI),
+    }
+
+
+def load_message_types():
+    """Imports attribute_pb2, whose LS messages json_format needs to resolve Any fields
+
+    gobgp_pb2 carries NLRI and path attributes as google.protobuf.Any, so does not import
+    attribute_pb2 itself; MessageToDict and ParseDict look the packed types up by name.
+    """
+    return attribute_pb2.DESCRIPTOR
+
+
+_FLOAT32 = struct.Struct("<f")
+
+
+def _shortest_float(value: float) -> float:
+    """Shortest decimal form of a float32 field value, as MessageToDict renders it
+
+    Args:
+        value: Python float read from a protobuf `float` field
+
+    Returns:
+        Float with the fewest significant digits that still round-trips to the same float32
+    """
+    packed = _FLOAT32.pack(value)
+    for precision in range(6, 10):
+        candidate = float(f"{value:.{precision}g}")
+        if _FLOAT32.pack(candidate) == packed:
+            return candidate
+    return value
+
+
+def _field_value(field, value):
+    """Converts one set protobuf field value to its MessageToDict form"""
+    if field.type == field.TYPE_MESSAGE:
+        if field.label == field.LABEL_REPEATED:
+            return [message_to_dict(item) for item in value]
+        return message_to_dict(value)
+    if field.type == field.TYPE_FLOAT:
+        if field.label == field.LABEL_REPEATED:
+            return [_shortest_float(item) for item in value]
+        return _shortest_float(value)
+    if field.type == field.TYPE_BYTES:
+        return base64.b64encode(value).decode("utf-8")
+    if field.label == field.LABEL_REPEATED:
+        return list(value)
+    return value
+
+
+def message_to_dict(message) -> dict:
+    """Lean equivalent of MessageToDict for the LS descriptor and attribute messages
+
+    Only fields set to a non-default value are included, keyed by their JSON (camelCase) name.
+    Output matches MessageToDict for the scalar, bytes, float, repeated and nested message fields
+    used by the BGP-LS messages in attribute.proto.
+
+    Args:
+        message: Any protobuf message instance from attribute_pb2
+
+    Returns:
+        Dict of set fields
+    """
+    return {
+        field.json_name: _field_value(field, value)
+        for field, value in message.ListFields()
+    }
+
+
+def record_from_message(record_class, message):
+    """Fills an LSA sub-record from the set fields of the matching protobuf message
+
+    Record slots are named after the protobuf fields, so no name mapping is needed. Nested
+    messages (e.g. node flags, SR capabilities) are kept as dicts, as MessageToDict renders them.
+
+    Args:
+        record_class: Record class from proto.lsa, e.g. LinkAttribute
+        message: protobuf message instance, e.g. attribute_pb2.LsAttributeLink
+
+    Returns:
+        New instance of record_class
+    """
+    return record_class(
+        **{
+            field.name: _field_value(field, value)
+            for field, value in message.ListFields()
+        }
+    )
+
+
+def decode_node_descriptor(
+    descriptor: "attribute_pb2.LsNodeDescriptor",
+) -> NodeDescriptor:
+    """Hand-unrolled record_from_message for LsNodeDescriptor, which every LSA carries
+
+    Args:
+        descriptor: LsNodeDescriptor message from an LS NLRI
+
+    Returns:
+        NodeDescriptor record
+    """
+    return NodeDescriptor(
+        descriptor.asn or None,
+        descriptor.bgp_ls_id or None,
+        descriptor.ospf_area_id or None,
+        descriptor.pseudonode or None,
+        descriptor.igp_router_id or None,
+    )
+
+
+def decode_ls_attribute(pattrs) -> LsAttribute:
+    """Finds and decodes the LsAttribute path attribute, if present
+
+    Args:
+        pattrs: Repeated google.protobuf.Any field (Path.pattrs)
+
+    Returns:
+        LsAttribute record. node, link and prefix are None when the path carries no
+        LsAttribute (e.g. Cisco pseudonodes).
+    """
+    for pattr in pattrs:
+        if pattr.type_url == LS_ATTRIBUTE_TYPE_URL:
+            attr = attribute_pb2.LsAttribute.FromString(pattr.value)
+            return LsAttribute(
+                node=record_from_message(NodeAttribute, attr.node)
+                if attr.HasField("node")
+                else None,
+                link=record_from_message(LinkAttribute, attr.link)
+                if attr.HasField("link")
+                else None,
+                prefix=record_from_message(PrefixAttribute, attr.prefix)
+                if attr.HasField("prefix")
+                else None,
+            )
+    return LsAttribute()
+
+
+def protocol_name(protocol_id: int):
+    """protocolId of an LSA from its BGP-LS Protocol-ID, as MessageToDict gives it
+
+    Returns:
+        LsProtocolID enum name, the int itself for values GoBGP does not know, or None for 0
+        (LS_PROTOCOL_UNKNOWN), which MessageToDict omits as the enum default
+    """
+    if not protocol_id:
+        return None
+    return PROTOCOL_NAMES.get(protocol_id, protocol_id)
+
+
+def decode_path(path):
+    """Decodes a single GoBGP Path carrying BGP-LS NLRI into a concise LSA
+
+    Args:
+        path: gobgp_pb2.Path message
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record, or None for other NLRI types
+    """
+    ls_prefix = attribute_pb2.LsAddrPrefix.FromString(path.nlri.value)
+    nlri_type = nlri_types().get(ls_prefix.nlri.type_url)
+    if nlri_type is None:
+        return None
+    lsa_class, nlri_class = nlri_type
+    nlri = nlri_class.FromString(ls_prefix.nlri.value)
+
+    if lsa_class is LinkLSA:
+        return LinkLSA(
+            decode_node_descriptor(nlri.local_node),
+            decode_node_descriptor(nlri.remote_node),
+            record_from_message(LinkDescriptor, nlri.link_descriptor),
+            decode_ls_attribute(path.pattrs),
+            protocol_name(ls_prefix.protocol_id),
+        )
+    if lsa_class is PrefixLSA:
+        return PrefixLSA(
+            decode_node_descriptor(nlri.local_node),
+            record_from_message(PrefixDescriptor, nlri.prefix_descriptor),
+            protocol_name(ls_prefix.protocol_id),
+        )
+    return NodeLSA(
+        decode_node_descriptor(nlri.local_node),
+        decode_ls_attribute(path.pattrs),
+        protocol_name(ls_prefix.protocol_id),
+    )
+
+
+def decode_destination(destination):
+    """Decodes the best path of a GoBGP Destination into a concise LSA
+
+    Args:
+        destination: gobgp_pb2.Destination message, as found in ListPathResponse.destination
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA record, or None for other NLRI types
+    """
+    for path in destination.paths:
+        if path.best:
+            return decode_path(path)
+    raise IndexError(f"No best path for destination {destination.prefix}")
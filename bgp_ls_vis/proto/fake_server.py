@@ -0,0 +1,400 @@
+"""Local stand-in for a GoBGP instance, for benchmarking and testing without a network
+
+FakeGobgpServicer implements the GobgpApi RPCs GoBGPQueryWrapper uses (ListPath, MonitorTable
+and GetTable) over an in-memory BGP-LS table: one of the dumps under tests/, any file get_lsdb
+can load, or copies of one scaled up to any size (replicate_isis_lsdb). With a churn rate set, a
+background thread keeps changing link metrics and flapping links, which ListPath reflects and
+MonitorTable streams as they happen.
+
+Each LSA's Path is serialized once (with and without the binary NLRI/attribute fields, as the
+request asks) and kept until the LSA changes, and responses are framed around it as bytes, so the
+server spends as little CPU as possible per response and benchmarks measure the client. serve()
+starts a server on localhost:
+
+    server, port = serve(FakeGobgpServicer.from_file(dump, copies=100, churn_rate=10))
+    lsdb = GoBGPQueryWrapper("127.0.0.1", port).get_lsdb()
+    server.stop(None)
+
+It can also be run stand-alone: `python -m bgp_ls_vis.proto.fake_server --help`.
+"""
+# Standard Imports
+import argparse
+import json
+import queue
+import random
+import re
+import threading
+import time
+from concurrent import futures
+
+# RPC & GoBGP imports
+import grpc
+from google.protobuf import any_pb2
+from google.protobuf.json_format import ParseDict
+from . import attribute_pb2
+from . import gobgp_pb2 as gobgp
+from .binary import encode_nlri, encode_path_attributes
+from .lsa import LsdbDelta, lsa_from_dict
+from .merge import nlri_key
+from .snapshot import _encode_varint
+
+TYPE_URL_PREFIX = "type.googleapis.com/gobgpapi."
+LS_FAMILY = gobgp.Family(afi=gobgp.Family.AFI_LS, safi=gobgp.Family.SAFI_LS)
+
+# LSA type -> (NLRI message, LsNLRIType, JSON keys of the NLRI)
+_NLRI_MESSAGES = {
+    "Node": (attribute_pb2.LsNodeNLRI, 1, ("localNode",)),
+    "Link": (
+        attribute_pb2.LsLinkNLRI,
+        2,
+        ("localNode", "remoteNode", "linkDescriptor"),
+    ),
+    "Prefix": (attribute_pb2.LsPrefixV4NLRI, 3, ("localNode", "prefixDescriptor")),
+}
+
+
+def _any(message) -> any_pb2.Any:
+    return any_pb2.Any(
+        type_url=TYPE_URL_PREFIX + type(message).__name__,
+        value=message.SerializeToString(),
+    )
+
+
+def _plain(value):
+    """JSON-compatible copy of a record, for ParseDict (tuples become lists)"""
+    return json.loads(json.dumps(value, default=dict))
+
+
+def path_from_lsa(lsa, binary: bool = False) -> gobgp.Path:
+    """Builds the GoBGP Path of an LSA, as GoBGP would return it from ListPath
+
+    Args:
+        lsa: NodeLSA, LinkLSA or PrefixLSA record, or its dict form
+        binary: When set, nlri_binary and pattrs_binary are filled too
+
+    Returns:
+        gobgp.Path, with best set
+    """
+    nlri_class, nlri_type, keys = _NLRI_MESSAGES[lsa["type"]]
+    nlri = ParseDict(_plain({key: lsa[key] for key in keys}), nlri_class())
+    ls_prefix = attribute_pb2.LsAddrPrefix(type=nlri_type, nlri=_any(nlri))
+    if lsa.get("protocolId") is not None:
+        ls_prefix.protocol_id = attribute_pb2.LsProtocolID.Value(lsa["protocolId"])
+    path = gobgp.Path(nlri=_any(ls_prefix), best=True, family=LS_FAMILY)
+    # GoBGP always sends the mandatory ORIGIN attribute, even on paths without others
+    path.pattrs.append(_any(attribute_pb2.OriginAttribute(origin=0)))
+
+    lsattribute = lsa.get("lsattribute")
+    if lsattribute is not None and lsattribute["node"] is not None:
+        path.pattrs.append(
+            _any(ParseDict(_plain(lsattribute), attribute_pb2.LsAttribute()))
+        )
+    if binary:
+        path.nlri_binary = encode_nlri(lsa)
+        path.pattrs_binary[:] = encode_path_attributes(lsa)
+    return path
+
+
+def replicate_isis_lsdb(lsdb, copies: int) -> list:
+    """Scales up an IS-IS LSDB by repeating it as disjoint copies with their own router IDs
+
+    The first group of each IS-IS system ID is replaced by the copy number (up to 65536 copies)
+    and hostnames are suffixed with it, so every copy is a separate, valid IS-IS topology.
+
+    Args:
+        lsdb: LSDB from GoBGPQueryWrapper.get_lsdb, for an IS-IS topology
+        copies: Number of copies to make
+
+    Returns:
+        List of LSA dicts
+    """
+    template = json.dumps(
+        [lsa.to_dict() if hasattr(lsa, "to_dict") else lsa for lsa in lsdb]
+    )
+    replicated = []
+    for copy in range(copies):
+        text = re.sub(
+            r'"igpRouterId": "[0-9a-f]{4}\.',
+            f'"igpRouterId": "{copy:04x}.',
+            template,
+        )
+        text = re.sub(r'"name": "([^"]+)"', rf'"name": "\1-{copy}"', text)
+        replicated.extend(json.loads(text))
+    return replicated
+
+
+def _length_delimited(field: int, value: bytes) -> bytes:
+    """Protobuf wire encoding of a bytes or message field"""
+    return bytes([field << 3 | 2]) + _encode_varint(len(value)) + value
+
+
+# Path.is_withdraw = True, appended to a serialized Path (protobuf merges repeated fields)
+_WITHDRAW = bytes([5 << 3, 1])
+
+
+class _Entry:
+    """An LSA of the fake table, with its Path serialized on first use"""
+
+    __slots__ = ("lsa", "_paths")
+
+    def __init__(self, lsa):
+        self.lsa = lsa
+        self._paths = [None, None]
+
+    def path(self, binary: bool) -> bytes:
+        """Serialized Path of the LSA, with or without the binary fields"""
+        if self._paths[binary] is None:
+            self._paths[binary] = path_from_lsa(self.lsa, binary).SerializeToString()
+        return self._paths[binary]
+
+    def list_path_response(self, binary: bool) -> bytes:
+        """Serialized ListPathResponse, with the Path as the Destination's only path"""
+        return _length_delimited(1, _length_delimited(2, self.path(binary)))
+
+    def monitor_response(self, withdraw: bool = False) -> bytes:
+        """Serialized MonitorTableResponse of the Path"""
+        path = self.path(False)
+        return _length_delimited(1, path + _WITHDRAW if withdraw else path)
+
+
+class FakeGobgpServicer:
+    """GobgpApi serving an in-memory BGP-LS table, optionally changing at a set rate
+
+    The RPC methods return responses already serialized, so they are served with the method
+    handlers of serve() rather than gobgp_pb2_grpc.add_GobgpApiServicer_to_server.
+    """
+
+    def __init__(
+        self,
+        lsdb,
+        churn_rate: float = 0.0,
+        latency: float = 0.0,
+        seed: int = 0,
+    ):
+        """Constructor
+
+        Args:
+            lsdb: Iterable of LSA records or dicts to serve
+            churn_rate: Changes per second made to the table while the server runs (link
+                metric changes, and links withdrawn and restored), 0 for a static table
+            latency: Seconds to wait before the first response of each call, as a stand-in for
+                network round trip and GoBGP processing time
+            seed: Seed of the churn's random choices
+        """
+        self.churn_rate = churn_rate
+        self.latency = latency
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._table = {}
+        for lsa in lsdb:
+            if isinstance(lsa, dict):
+                lsa = lsa_from_dict(lsa)
+            self._table[nlri_key(lsa)] = _Entry(lsa)
+        self._links = [key for key, entry in self._table.items() if key[0] == "Link"]
+        self._down = {}
+        self._monitors = []
+        self._stop = threading.Event()
+        self._churn_thread = None
+        # changes is the number of deltas churn has made so far
+        self.changes = 0
+
+    @classmethod
+    def from_file(cls, filename: str, copies: int = 1, **kwargs):
+        """Serves a table loaded from a file, optionally scaled up
+
+        Args:
+            filename: Any file GoBGPQueryWrapper.get_lsdb can load (YAML dump, snapshot, store)
+            copies: When more than 1, the table is replicated with replicate_isis_lsdb
+            **kwargs: Passed to the constructor
+
+        Returns:
+            New FakeGobgpServicer
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from . import GoBGPQueryWrapper
+
+        lsdb = GoBGPQueryWrapper(connect=False).get_lsdb(filename)
+        if copies > 1:
+            lsdb = replicate_isis_lsdb(lsdb, copies)
+        return cls(lsdb, **kwargs)
+
+    @property
+    def lsdb(self) -> list:
+        """LSAs currently in the table"""
+        with self._lock:
+            return [entry.lsa for entry in self._table.values()]
+
+    def start(self):
+        """Starts the churn thread, if a churn rate is set"""
+        if self.churn_rate > 0 and self._churn_thread is None:
+            self._stop.clear()
+            self._churn_thread = threading.Thread(target=self._churn, daemon=True)
+            self._churn_thread.start()
+
+    def stop(self):
+        """Stops the churn thread and ends any MonitorTable streams"""
+        self._stop.set()
+        if self._churn_thread is not None:
+            self._churn_thread.join()
+            self._churn_thread = None
+        with self._lock:
+            for monitor in self._monitors:
+                monitor.put(None)
+
+    def change(self, delta):
+        """Applies a change to the table, and streams it to MonitorTable callers
+
+        Args:
+            delta: LsdbDelta; its LSA replaces the table's LSA with the same NLRI, or is removed
+        """
+        withdraw, lsa = delta
+        key = nlri_key(lsa)
+        with self._lock:
+            if withdraw:
+                entry = self._table.pop(key, None) or _Entry(lsa)
+            else:
+                entry = self._table[key] = _Entry(lsa)
+            self.changes += 1
+            for monitor in self._monitors:
+                monitor.put((withdraw, entry))
+
+    def _churn_delta(self) -> LsdbDelta:
+        """A random change: restores a withdrawn link, withdraws one, or changes a metric"""
+        rng = self._rng
+        if self._down and rng.random() < 0.5:
+            return LsdbDelta(False, self._down.pop(rng.choice(list(self._down))))
+        key = rng.choice(self._links)
+        entry = self._table.get(key)
+        if entry is None:
+            return LsdbDelta(False, self._down.pop(key))
+        if rng.random() < 0.3:
+            self._down[key] = entry.lsa
+            return LsdbDelta(True, entry.lsa)
+        lsa = lsa_from_dict(_plain(entry.lsa))
+        lsa["lsattribute"]["link"]["igpMetric"] = rng.randint(1, 1000)
+        return LsdbDelta(False, lsa)
+
+    def _churn(self):
+        interval = 1.0 / self.churn_rate
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            deadline += interval
+            self._stop.wait(max(0.0, deadline - time.monotonic()))
+            if self._links and not self._stop.is_set():
+                self.change(self._churn_delta())
+
+    # GobgpApi RPCs
+
+    def ListPath(self, request, context):  # pylint: disable=invalid-name
+        if self.latency:
+            time.sleep(self.latency)
+        binary = request.enable_nlri_binary or request.enable_attribute_binary
+        with self._lock:
+            entries = list(self._table.values())
+        for entry in entries:
+            if not context.is_active():
+                return
+            yield entry.list_path_response(binary)
+
+    def MonitorTable(self, request, context):  # pylint: disable=invalid-name
+        if self.latency:
+            time.sleep(self.latency)
+        monitor = queue.Queue()
+        with self._lock:
+            current = list(self._table.values()) if request.current else []
+            self._monitors.append(monitor)
+        try:
+            for entry in current:
+                yield entry.monitor_response()
+            while context.is_active():
+                try:
+                    change = monitor.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if change is None:
+                    return
+                withdraw, entry = change
+                yield entry.monitor_response(withdraw)
+        finally:
+            with self._lock:
+                self._monitors.remove(monitor)
+
+    def GetTable(self, request, context):  # pylint: disable=invalid-name
+        with self._lock:
+            count = len(self._table)
+        return gobgp.GetTableResponse(
+            num_destination=count, num_path=count, num_accepted=count
+        )
+
+
+def serve(servicer: FakeGobgpServicer, address: str = "127.0.0.1", port: int = 0):
+    """Starts a gRPC server for a FakeGobgpServicer, and its churn
+
+    Args:
+        servicer: FakeGobgpServicer
+        address: Address to listen on
+        port: Port to listen on; 0 picks a free one
+
+    Returns:
+        Tuple of (grpc.Server, port as str). Stop with server.stop(None), which also stops
+        the churn.
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    # Streamed responses are bytes already, so they have no serializer. Any other GobgpApi
+    # method is answered UNIMPLEMENTED.
+    handlers = {
+        "ListPath": grpc.unary_stream_rpc_method_handler(
+            servicer.ListPath,
+            request_deserializer=gobgp.ListPathRequest.FromString,
+        ),
+        "MonitorTable": grpc.unary_stream_rpc_method_handler(
+            servicer.MonitorTable,
+            request_deserializer=gobgp.MonitorTableRequest.FromString,
+        ),
+        "GetTable": grpc.unary_unary_rpc_method_handler(
+            servicer.GetTable,
+            request_deserializer=gobgp.GetTableRequest.FromString,
+            response_serializer=gobgp.GetTableResponse.SerializeToString,
+        ),
+    }
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler("gobgpapi.GobgpApi", handlers),)
+    )
+    port = server.add_insecure_port(f"{address}:{port}")
+    server.start()
+    servicer.start()
+
+    stop = server.stop
+
+    def stop_all(grace):
+        servicer.stop()
+        return stop(grace)
+
+    server.stop = stop_all
+    return server, str(port)
+
+
+def main():
+    """Runs a fake GoBGP server until interrupted"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("filename", help="Table to serve: YAML dump, snapshot or store")
+    parser.add_argument("--copies", type=int, default=1, help="Replicate the table")
+    parser.add_argument("--churn", type=float, default=0.0, help="Changes per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per call")
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50051)
+    args = parser.parse_args()
+
+    servicer = FakeGobgpServicer.from_file(
+        args.filename, args.copies, churn_rate=args.churn, latency=args.latency
+    )
+    server, port = serve(servicer, args.address, args.port)
+    print(f"Serving {len(servicer.lsdb)} LSAs on {args.address}:{port}")
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop(None)
+
+
+if __name__ == "__main__":
+    main()
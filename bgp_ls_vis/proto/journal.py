@@ -0,0 +1,381 @@
+"""Append-only journal of LSDB changes, for rebuilding the LSDB as it was at any past time
+
+Saving the whole table every minute (as YAML dumps or snapshot files) repeats every unchanged LSA
+in every copy. A journal instead records each change once, as an add or withdraw delta, from
+GoBGPQueryWrapper.watch_lsdb or from diffing successive get_lsdb pulls, and every so often a
+full checkpoint of the LSDB. The LSDB at a given time is rebuilt from the last checkpoint before
+it plus the deltas since, so the work is bounded by the checkpoint spacing, not the journal's
+length.
+
+Layout of the journal file (integers little-endian):
+
+    MAGIC, VERSION
+    frame*      varint length, then kind (1 byte), timestamp (float64), body
+
+    kind CHECKPOINT: body is every LSA of the LSDB, each as an LSA entry
+    kind ADD:        body is the LSA entry of an LSA added or updated
+    kind WITHDRAW:   body is the LSA entry of a withdrawn LSA, without attributes
+
+    LSA entry   varint length, NLRI bytes, varint length, BGP-LS attribute bytes (may be empty),
+                as proto.binary encodes them for Path.nlri_binary/pattrs_binary
+
+A sidecar index file (journal filename + INDEX_SUFFIX) holds (timestamp, offset) of each
+checkpoint. A reader only trusts it if it agrees with the checkpoints found walking the frame
+headers (which it does on opening anyway, to find where the last complete frame ends). A writer
+reopening a journal cuts off any frame torn by a crash, and rewrites the index in full.
+"""
+# Standard Imports
+import bisect
+import mmap
+import os
+import struct
+import time
+
+# Project internal imports
+from .binary import (
+    _varint,
+    decode_binary_path,
+    encode_nlri,
+    encode_path_attributes,
+)
+from .lsa import LsdbDelta
+from .merge import nlri_key
+from .snapshot import _encode_varint
+
+MAGIC = b"BGPLSJNL"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+INDEX_SUFFIX = ".idx"
+
+CHECKPOINT = ord("C")
+ADD = ord("A")
+WITHDRAW = ord("W")
+
+# kind, timestamp of a frame
+FRAME = struct.Struct("<Bd")
+# timestamp, file offset of a checkpoint frame
+INDEX_ENTRY = struct.Struct("<dQ")
+
+
+def _encode_lsa(lsa, attributes: bool = True) -> bytes:
+    """LSA entry of an LSA"""
+    nlri = encode_nlri(lsa)
+    pattrs = encode_path_attributes(lsa) if attributes else []
+    pattr = pattrs[0] if pattrs else b""
+    return _encode_varint(len(nlri)) + nlri + _encode_varint(len(pattr)) + pattr
+
+
+def _decode_lsa(buf, pos: int) -> tuple:
+    """Decodes the LSA entry at pos, returning (LSA record, position after it)"""
+    length, pos = _varint(buf, pos)
+    nlri = buf[pos : pos + length]
+    pos += length
+    length, pos = _varint(buf, pos)
+    pattrs = (buf[pos : pos + length],) if length else ()
+    return decode_binary_path(nlri, pattrs), pos + length
+
+
+class JournalWriter:
+    """Appends LSDB changes to a journal file, with a checkpoint at regular intervals
+
+    The writer keeps the current LSDB in memory (one LSA per NLRI, keyed by proto.nlri_key), to
+    write checkpoints from and to diff table pulls against.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        checkpoint_interval: float = 3600.0,
+        checkpoint_deltas: int = 10000,
+    ):
+        """Opens a journal for appending, creating it if it does not exist
+
+        When appending to an existing journal, its latest LSDB is rebuilt first. A trailing
+        frame left incomplete (e.g. by a crash mid-write) is truncated away, and the index is
+        rewritten from the checkpoints found.
+
+        Args:
+            filename: Path of the journal file
+            checkpoint_interval: Seconds of journal time after which the next change is preceded
+                by a checkpoint
+            checkpoint_deltas: Number of deltas after which a checkpoint is written
+        """
+        self.filename = filename
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_deltas = checkpoint_deltas
+        self.state = {}
+        self._last_checkpoint = None
+        self._deltas = 0
+
+        index = []
+        if os.path.exists(filename) and os.path.getsize(filename):
+            with JournalReader(filename) as reader:
+                self.state = {nlri_key(lsa): lsa for lsa in reader.lsdb_at()}
+                if reader.checkpoints:
+                    self._last_checkpoint = reader.checkpoints[-1]
+                    self._deltas = sum(1 for _ in reader.deltas(self._last_checkpoint))
+                index = reader.index
+                end = reader.end
+            # New frames must follow the last complete one, not the remains of a torn one
+            os.truncate(filename, end)
+            self._file = open(filename, "ab")
+        else:
+            self._file = open(filename, "wb")
+            self._file.write(HEADER)
+        self._index = open(filename + INDEX_SUFFIX, "wb")
+        self._index.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in index))
+
+    def close(self):
+        """Flushes and closes the journal"""
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def flush(self):
+        """Flushes written frames to the OS, making them visible to readers"""
+        self._file.flush()
+        self._index.flush()
+
+    @property
+    def lsdb(self) -> list:
+        """Current LSDB, as a list of LSA records"""
+        return list(self.state.values())
+
+    def _write(self, kind: int, timestamp: float, body: bytes):
+        payload = FRAME.pack(kind, timestamp) + body
+        self._file.write(_encode_varint(len(payload)) + payload)
+
+    def checkpoint(self, timestamp: float = None):
+        """Writes a checkpoint of the current LSDB
+
+        Args:
+            timestamp: Journal time in seconds (e.g. of time.time()), now if None
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        offset = self._file.tell()
+        self._write(
+            CHECKPOINT, timestamp, b"".join(map(_encode_lsa, self.state.values()))
+        )
+        self._index.write(INDEX_ENTRY.pack(timestamp, offset))
+        self._last_checkpoint = timestamp
+        self._deltas = 0
+
+    def record(self, delta, timestamp: float = None) -> bool:
+        """Records a single change, unless it leaves the LSDB unchanged
+
+        Args:
+            delta: proto.lsa.LsdbDelta, as yielded by GoBGPQueryWrapper.watch_lsdb
+            timestamp: Journal time of the change in seconds, now if None. Timestamps must not
+                decrease from one record to the next.
+
+        Returns:
+            True if the delta was written, False if it was a no-op (an unchanged LSA, or the
+            withdrawal of an LSA not in the LSDB)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        withdraw, lsa = delta
+        key = nlri_key(lsa)
+        if withdraw:
+            if key not in self.state:
+                return False
+        elif self.state.get(key) == lsa:
+            return False
+
+        if (
+            self._last_checkpoint is None
+            or timestamp - self._last_checkpoint >= self.checkpoint_interval
+            or self._deltas >= self.checkpoint_deltas
+        ):
+            self.checkpoint(timestamp)
+
+        if withdraw:
+            del self.state[key]
+            self._write(WITHDRAW, timestamp, _encode_lsa(lsa, attributes=False))
+        else:
+            self.state[key] = lsa
+            self._write(ADD, timestamp, _encode_lsa(lsa))
+        self._deltas += 1
+        return True
+
+    def record_deltas(self, deltas, timestamp: float = None) -> int:
+        """Records a stream of deltas, e.g. GoBGPQueryWrapper.watch_lsdb()
+
+        Args:
+            deltas: Iterable of LsdbDelta
+            timestamp: Journal time of every delta, or None to use the time each is received
+
+        Returns:
+            Number of deltas written
+        """
+        return sum(self.record(delta, timestamp) for delta in deltas)
+
+    def record_table(self, lsdb, timestamp: float = None) -> int:
+        """Records the changes between the current LSDB and a fresh pull of the whole table
+
+        LSAs missing from lsdb are recorded as withdrawn, and new or changed LSAs as added.
+
+        Args:
+            lsdb: Iterable of LSAs, e.g. from GoBGPQueryWrapper.get_lsdb
+            timestamp: Journal time of the pull, now if None
+
+        Returns:
+            Number of deltas written. The first pull into an empty journal is written as its
+            first checkpoint instead, and counts as none.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._last_checkpoint is None:
+            self.state = {nlri_key(lsa): lsa for lsa in lsdb}
+            self.checkpoint(timestamp)
+            return 0
+        seen = set()
+        written = 0
+        for lsa in lsdb:
+            seen.add(nlri_key(lsa))
+            written += self.record(LsdbDelta(False, lsa), timestamp)
+        for key in [key for key in self.state if key not in seen]:
+            written += self.record(LsdbDelta(True, self.state[key]), timestamp)
+        return written
+
+
+class JournalReader:
+    """Reads a journal file, rebuilding the LSDB at any time it covers
+
+    The journal is memory-mapped as it was when opened; frames appended afterwards are not seen.
+    """
+
+    def __init__(self, filename: str):
+        """Opens and memory-maps a journal, loading (or rebuilding) its checkpoint index
+
+        Frames are read up to the last complete one; a trailing frame still being written, or
+        torn by a crash, is left out.
+
+        Raises:
+            ValueError: If the file is not a journal, or of an unsupported version
+        """
+        with open(filename, "rb") as journal:
+            self._data = mmap.mmap(journal.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[: len(MAGIC)] != MAGIC:
+            self._data.close()
+            raise ValueError(f"{filename} is not a BGP-LS journal")
+        if self._data[len(MAGIC)] != VERSION:
+            version = self._data[len(MAGIC)]
+            self._data.close()
+            raise ValueError(f"{filename} is journal version {version}, not {VERSION}")
+
+        # end is the offset after the last complete frame
+        self.end = len(HEADER)
+        scanned = []
+        for offset, kind, timestamp, _, self.end in self._frames(len(HEADER)):
+            if kind == CHECKPOINT:
+                scanned.append((timestamp, offset))
+
+        index = []
+        if os.path.exists(filename + INDEX_SUFFIX):
+            with open(filename + INDEX_SUFFIX, "rb") as index_file:
+                data = index_file.read()
+            # Leaving out an entry torn by a crash
+            data = data[: len(data) - len(data) % INDEX_ENTRY.size]
+            index = list(INDEX_ENTRY.iter_unpack(data))
+        if len(index) != len(scanned) or (index and index[-1][1] != scanned[-1][1]):
+            index = scanned
+        # checkpoints holds the timestamp of each checkpoint, in order
+        self.checkpoints = [timestamp for timestamp, _ in index]
+        self._offsets = [offset for _, offset in index]
+
+    @property
+    def index(self) -> list:
+        """(timestamp, file offset) of each checkpoint, in order, as the index file holds them"""
+        return list(zip(self.checkpoints, self._offsets))
+
+    def close(self):
+        """Unmaps the journal file"""
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _frames(self, pos: int):
+        """Yields (offset, kind, timestamp, body start, body end) of each frame from pos"""
+        data = self._data
+        while pos < len(data):
+            offset = pos
+            try:
+                length, pos = _varint(data, pos)
+            except IndexError:
+                return  # length still being written
+            end = pos + length
+            if end > len(data):
+                return  # frame still being written
+            kind, timestamp = FRAME.unpack_from(data, pos)
+            yield offset, kind, timestamp, pos + FRAME.size, end
+            pos = end
+
+    def _checkpoint_before(self, timestamp: float) -> int:
+        """Position in checkpoints of the last checkpoint at or before timestamp, or -1"""
+        if timestamp is None:
+            return len(self.checkpoints) - 1
+        return bisect.bisect_right(self.checkpoints, timestamp) - 1
+
+    def deltas(self, start: float = None, end: float = None):
+        """Yields the deltas recorded between two times, from the checkpoint at or before start
+
+        Args:
+            start: Journal time to start from; the first checkpoint if None
+            end: Journal time to stop after, inclusive; the end of the journal if None
+
+        Yields:
+            Tuples of (timestamp, LsdbDelta)
+        """
+        position = self._checkpoint_before(start) if start is not None else 0
+        pos = self._offsets[position] if position >= 0 else len(HEADER)
+        for _, kind, timestamp, body, _ in self._frames(pos):
+            if end is not None and timestamp > end:
+                return
+            if kind == CHECKPOINT or (start is not None and timestamp < start):
+                continue
+            lsa, _ = _decode_lsa(self._data, body)
+            yield timestamp, LsdbDelta(kind == WITHDRAW, lsa)
+
+    def lsdb_at(self, timestamp: float = None) -> list:
+        """Rebuilds the LSDB as it was at a given time
+
+        Loads the last checkpoint at or before timestamp and replays the deltas after it, up
+        to and including timestamp.
+
+        Args:
+            timestamp: Journal time in seconds; the end of the journal if None
+
+        Returns:
+            List of LSA records, as GoBGPQueryWrapper.get_lsdb would have returned them then
+            (empty before the first checkpoint), ready for graphing.build_nx_from_lsdb
+        """
+        position = self._checkpoint_before(timestamp)
+        if position < 0:
+            return []
+        data = self._data
+        frames = self._frames(self._offsets[position])
+        _, _, _, pos, end = next(frames)
+        state = {}
+        while pos < end:
+            lsa, pos = _decode_lsa(data, pos)
+            state[nlri_key(lsa)] = lsa
+
+        for _, kind, frame_time, body, _ in frames:
+            if timestamp is not None and frame_time > timestamp:
+                break
+            if kind == CHECKPOINT:
+                continue
+            lsa, _ = _decode_lsa(data, body)
+            if kind == WITHDRAW:
+                state.pop(nlri_key(lsa), None)
+            else:
+                state[nlri_key(lsa)] = lsa
+        return list(state.values())
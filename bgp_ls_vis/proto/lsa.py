@@ -0,0 +1,395 @@
+"""Compact LSA records returned by GoBGPQueryWrapper.get_lsdb
+
+LSAs used to be nested dicts, one dict per LSA plus one per node descriptor, link/prefix
+descriptor and LS attribute. Every one of those carried its own hash table, and every LSA repeated
+its own copy of the router ID strings. The classes here store the same data in __slots__, with
+router IDs interned so that each ID string exists once no matter how many LSAs reference it.
+
+All records keep dict-style access by the camelCase keys get_lsdb has always used, so code like
+`lsa["localNode"]["igpRouterId"]` or `"pseudonode" in lsa["remoteNode"].keys()` keeps working.
+Like the MessageToDict output they replace, descriptor and attribute records only report keys for
+fields that are set: an unset field is None internally, and is absent from keys(). Repeated
+link attributes (unreservedBandwidth, srlgs) are held as shared tuples rather than lists.
+
+LSAs also carry the BGP-LS Protocol-ID of their NLRI as protocolId (e.g. "LS_PROTOCOL_ISIS_L2",
+as MessageToDict renders the LsAddrPrefix enum), absent when it is unknown.
+"""
+# Standard Imports
+import sys
+from typing import NamedTuple
+
+
+def _camel(name: str) -> str:
+    """snake_case protobuf field name -> camelCase JSON name (e.g. igp_router_id -> igpRouterId)"""
+    head, *tail = name.split("_")
+    return head + "".join(part.capitalize() for part in tail)
+
+
+def _json_keys(slots: tuple, **overrides) -> dict:
+    """Builds the JSON key -> slot name map for a record class"""
+    return {overrides.get(slot, _camel(slot)): slot for slot in slots}
+
+
+def _intern(value):
+    """Interns router ID strings, passing through None for unset fields"""
+    return sys.intern(value) if value else None
+
+
+# Shared tuples for repeated list values, e.g. the 8 unreserved bandwidth priorities, which are
+# the same on most links of a network. Bounded so that pathological input cannot grow it forever.
+_SHARED_TUPLES = {}
+_SHARED_TUPLES_MAX = 4096
+
+
+def _intern_tuple(values):
+    """Returns a shared tuple equal to values, passing through None for unset fields"""
+    if values is None:
+        return None
+    values = tuple(values)
+    shared = _SHARED_TUPLES.get(values)
+    if shared is None:
+        shared = values
+        if len(_SHARED_TUPLES) < _SHARED_TUPLES_MAX:
+            _SHARED_TUPLES[values] = values
+    return shared
+
+
+class Record:
+    """Base for slotted records that also behave like read/write dicts keyed by JSON name"""
+
+    __slots__ = ()
+
+    # JSON (camelCase) key -> slot name, set by each subclass
+    _keys = {}
+    # When True, slots holding None are treated as absent keys, as MessageToDict omits them
+    _sparse = True
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, fields.pop(slot, None))
+        if fields:
+            raise TypeError(f"Unknown fields for {type(self).__name__}: {list(fields)}")
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Builds a record from its dict form, e.g. as given by MessageToDict
+
+        Args:
+            data: Dict keyed by JSON name
+
+        Returns:
+            New record of this class
+        """
+        keys = cls._keys
+        return cls(**{keys[key]: value for key, value in data.items() if key != "type"})
+
+    def __getitem__(self, key: str):
+        slot = self._keys.get(key)
+        if slot is None:
+            raise KeyError(key)
+        value = getattr(self, slot)
+        if value is None and self._sparse:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        slot = self._keys.get(key)
+        if slot is None:
+            raise KeyError(key)
+        setattr(self, slot, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (
+                other.to_dict() if isinstance(other, Record) else other
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key: str, default=None):
+        """dict.get equivalent"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> list:
+        """JSON keys of the fields present on this record"""
+        if not self._sparse:
+            return list(self._keys)
+        return [
+            key for key, slot in self._keys.items() if getattr(self, slot) is not None
+        ]
+
+    def values(self) -> list:
+        """dict.values equivalent"""
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> list:
+        """dict.items equivalent"""
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> dict:
+        """Converts this record, and any records nested in it, back to plain dicts and lists"""
+        rtn = {}
+        for key, value in self.items():
+            if isinstance(value, Record):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = list(value)
+            rtn[key] = value
+        return rtn
+
+
+class NodeDescriptor(Record):
+    """Local/Remote Node Descriptor of an LS NLRI (attribute.proto: LsNodeDescriptor)"""
+
+    __slots__ = ("asn", "bgp_ls_id", "ospf_area_id", "pseudonode", "igp_router_id")
+    _keys = _json_keys(__slots__)
+
+    def __init__(
+        self,
+        asn=None,
+        bgp_ls_id=None,
+        ospf_area_id=None,
+        pseudonode=None,
+        igp_router_id=None,
+    ):
+        # pylint: disable=super-init-not-called,too-many-arguments
+        self.asn = asn
+        self.bgp_ls_id = bgp_ls_id
+        self.ospf_area_id = ospf_area_id
+        self.pseudonode = pseudonode
+        self.igp_router_id = _intern(igp_router_id)
+
+
+class LinkDescriptor(Record):
+    """Link Descriptor of a Link NLRI (attribute.proto: LsLinkDescriptor)"""
+
+    __slots__ = (
+        "link_local_id",
+        "link_remote_id",
+        "interface_addr_ipv4",
+        "neighbor_addr_ipv4",
+        "interface_addr_ipv6",
+        "neighbor_addr_ipv6",
+    )
+    _keys = _json_keys(__slots__)
+
+
+class PrefixDescriptor(Record):
+    """Prefix Descriptor of a Prefix NLRI (attribute.proto: LsPrefixDescriptor)"""
+
+    __slots__ = ("ip_reachability", "ospf_route_type")
+    _keys = _json_keys(__slots__)
+
+
+class NodeAttribute(Record):
+    """Node attribute TLVs of the BGP-LS attribute (attribute.proto: LsAttributeNode)"""
+
+    __slots__ = (
+        "name",
+        "flags",
+        "local_router_id",
+        "local_router_id_v6",
+        "isis_area",
+        "opaque",
+        "sr_capabilities",
+        "sr_algorithms",
+        "sr_local_block",
+    )
+    _keys = _json_keys(__slots__)
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self.local_router_id = _intern(self.local_router_id)
+
+
+class LinkAttribute(Record):
+    """Link attribute TLVs of the BGP-LS attribute (attribute.proto: LsAttributeLink)"""
+
+    __slots__ = (
+        "name",
+        "local_router_id",
+        "local_router_id_v6",
+        "remote_router_id",
+        "remote_router_id_v6",
+        "admin_group",
+        "default_te_metric",
+        "igp_metric",
+        "opaque",
+        "bandwidth",
+        "reservable_bandwidth",
+        "unreserved_bandwidth",
+        "sr_adjacency_sid",
+        "srlgs",
+    )
+    _keys = _json_keys(__slots__)
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self.local_router_id = _intern(self.local_router_id)
+        self.remote_router_id = _intern(self.remote_router_id)
+        self.unreserved_bandwidth = _intern_tuple(self.unreserved_bandwidth)
+        self.srlgs = _intern_tuple(self.srlgs)
+
+
+class PrefixAttribute(Record):
+    """Prefix attribute TLVs of the BGP-LS attribute (attribute.proto: LsAttributePrefix)"""
+
+    __slots__ = ("igp_flags", "opaque", "sr_prefix_sid")
+    _keys = _json_keys(__slots__)
+
+
+class LsAttribute(Record):
+    """The BGP-LS attribute; node, link and prefix are None when the NLRI carried none"""
+
+    __slots__ = ("node", "link", "prefix")
+    _keys = _json_keys(__slots__)
+    _sparse = False
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            node=NodeAttribute.from_dict(data["node"])
+            if data["node"] is not None
+            else None,
+            link=LinkAttribute.from_dict(data["link"])
+            if data["link"] is not None
+            else None,
+            prefix=PrefixAttribute.from_dict(data["prefix"])
+            if data["prefix"] is not None
+            else None,
+        )
+
+
+class NodeLSA(Record):
+    """Node LSA, from an LsNodeNLRI"""
+
+    __slots__ = ("local_node", "lsattribute", "protocol_id")
+    _keys = {"type": "type", **_json_keys(__slots__, lsattribute="lsattribute")}
+    type = "Node"
+
+    def __init__(
+        self,
+        local_node: NodeDescriptor,
+        lsattribute: LsAttribute,
+        protocol_id: str = None,
+    ):
+        # pylint: disable=super-init-not-called
+        self.local_node = local_node
+        self.lsattribute = lsattribute
+        self.protocol_id = protocol_id
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            NodeDescriptor.from_dict(data["localNode"]),
+            LsAttribute.from_dict(data["lsattribute"]),
+            data.get("protocolId"),
+        )
+
+
+class LinkLSA(Record):
+    """Link LSA, from an LsLinkNLRI"""
+
+    __slots__ = (
+        "local_node",
+        "remote_node",
+        "link_descriptor",
+        "lsattribute",
+        "protocol_id",
+    )
+    _keys = {"type": "type", **_json_keys(__slots__, lsattribute="lsattribute")}
+    type = "Link"
+
+    def __init__(
+        self,
+        local_node: NodeDescriptor,
+        remote_node: NodeDescriptor,
+        link_descriptor: LinkDescriptor,
+        lsattribute: LsAttribute,
+        protocol_id: str = None,
+    ):
+        # pylint: disable=super-init-not-called,too-many-arguments
+        self.local_node = local_node
+        self.remote_node = remote_node
+        self.link_descriptor = link_descriptor
+        self.lsattribute = lsattribute
+        self.protocol_id = protocol_id
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            NodeDescriptor.from_dict(data["localNode"]),
+            NodeDescriptor.from_dict(data["remoteNode"]),
+            LinkDescriptor.from_dict(data["linkDescriptor"]),
+            LsAttribute.from_dict(data["lsattribute"]),
+            data.get("protocolId"),
+        )
+
+
+class PrefixLSA(Record):
+    """Prefix LSA, from an LsPrefixV4NLRI"""
+
+    __slots__ = ("local_node", "prefix_descriptor", "protocol_id")
+    _keys = {"type": "type", **_json_keys(__slots__)}
+    type = "Prefix"
+
+    def __init__(
+        self,
+        local_node: NodeDescriptor,
+        prefix_descriptor: PrefixDescriptor,
+        protocol_id: str = None,
+    ):
+        # pylint: disable=super-init-not-called
+        self.local_node = local_node
+        self.prefix_descriptor = prefix_descriptor
+        self.protocol_id = protocol_id
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            NodeDescriptor.from_dict(data["localNode"]),
+            PrefixDescriptor.from_dict(data["prefixDescriptor"]),
+            data.get("protocolId"),
+        )
+
+
+LSA_TYPES = {"Node": NodeLSA, "Link": LinkLSA, "Prefix": PrefixLSA}
+
+
+def lsa_from_dict(data: dict) -> Record:
+    """Builds the matching LSA record for an LSA in its dict form
+
+    Args:
+        data: LSA dict, as get_lsdb returned before LSA records were introduced
+
+    Returns:
+        NodeLSA, LinkLSA or PrefixLSA
+    """
+    return LSA_TYPES[data["type"]].from_dict(data)
+
+
+class LsdbDelta(NamedTuple):
+    """A single change to the LSDB, as streamed by GoBGPQueryWrapper.watch_lsdb
+
+    withdraw is False when lsa was added or updated, and True when it was withdrawn. A withdrawn
+    LSA carries its NLRI (type and descriptors), but its lsattribute may be empty.
+    """
+
+    withdraw: bool
+    lsa: Record
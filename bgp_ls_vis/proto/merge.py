@@ -0,0 +1,144 @@
+"""Merging the LSDBs of several BGP-LS collectors into one
+
+Collectors peering with the same IGP domain mostly report the same LSAs, so concatenating their
+tables (e.g. from proto.aio.fetch_lsdbs) gives one copy of every link per collector, which
+build_nx_from_lsdb turns into parallel edges. merge_lsdbs keeps one LSA per BGP-LS NLRI instead,
+in a single pass: each LSA is reduced to a hashable key (nlri_key) built from its Protocol-ID
+and descriptors, which is what identifies an NLRI in BGP-LS (RFC 7752 s3.2), and looked up in a
+dict. Which collectors reported each LSA is kept alongside.
+
+The BGP-LS Identifier is not part of the key, as LSA records do not keep it.
+"""
+# Standard Imports
+from operator import attrgetter
+from typing import NamedTuple
+
+# Project internal imports
+from .lsa import LinkDescriptor, NodeDescriptor, lsa_from_dict
+
+# Node/Link Descriptor record -> tuple of its field values
+_node_key = attrgetter(*NodeDescriptor.__slots__)
+_link_key = attrgetter(*LinkDescriptor.__slots__)
+
+
+class LsdbDiff(NamedTuple):
+    """Differences between two LSDBs, NLRI by NLRI (See: diff_lsdbs)
+
+    Attributes:
+        added: LSAs only in the new LSDB
+        removed: LSAs only in the old LSDB
+        changed: Tuples of (old, new) LSA, for NLRI in both whose attributes differ
+    """
+
+    added: list
+    removed: list
+    changed: list
+
+
+class MergedLsdb(NamedTuple):
+    """LSDB merged from several collectors
+
+    Attributes:
+        lsdb: List of LSA records, one per NLRI
+        sources: Collectors that reported each LSA of lsdb (tuple per LSA, in feed order)
+        errors: Dict of collector -> exception, for the feeds that failed and were skipped
+    """
+
+    lsdb: list
+    sources: list
+    errors: dict
+
+
+def nlri_key(lsa) -> tuple:
+    """Hashable key identifying the NLRI of an LSA, equal for the same LSA from any collector
+
+    Args:
+        lsa: NodeLSA, LinkLSA or PrefixLSA record, or its dict form
+
+    Returns:
+        Tuple of (type, protocolId, local node descriptor, then the remote node and link
+        descriptors of a Link LSA, or the prefix descriptor of a Prefix LSA)
+    """
+    if isinstance(lsa, dict):
+        lsa = lsa_from_dict(lsa)
+    if lsa.type == "Link":
+        return (
+            "Link",
+            lsa.protocol_id,
+            _node_key(lsa.local_node),
+            _node_key(lsa.remote_node),
+            _link_key(lsa.link_descriptor),
+        )
+    if lsa.type == "Prefix":
+        descriptor = lsa.prefix_descriptor
+        return (
+            "Prefix",
+            lsa.protocol_id,
+            _node_key(lsa.local_node),
+            tuple(descriptor.ip_reachability or ()),
+            descriptor.ospf_route_type,
+        )
+    return ("Node", lsa.protocol_id, _node_key(lsa.local_node))
+
+
+def merge_lsdbs(feeds: dict) -> MergedLsdb:
+    """Merges the LSDBs of several collectors, keeping one LSA per NLRI
+
+    Where collectors disagree on the attributes of an NLRI (e.g. one has not yet seen an
+    update), the LSA from the first feed to report it is kept.
+
+    Args:
+        feeds: Dict of collector -> iterable of LSAs (records or dicts), in order of
+            preference. A value that is an exception, as fetch_lsdbs gives for a target it
+            could not reach, is skipped and reported in errors.
+
+    Returns:
+        MergedLsdb
+    """
+    index, lsdb, sources, errors = {}, [], [], {}
+    for collector, feed in feeds.items():
+        if isinstance(feed, BaseException):
+            errors[collector] = feed
+            continue
+        for lsa in feed:
+            if isinstance(lsa, dict):
+                lsa = lsa_from_dict(lsa)
+            key = nlri_key(lsa)
+            position = index.get(key)
+            if position is None:
+                index[key] = len(lsdb)
+                lsdb.append(lsa)
+                sources.append([collector])
+            elif sources[position][-1] != collector:
+                sources[position].append(collector)
+    return MergedLsdb(lsdb, [tuple(seen_by) for seen_by in sources], errors)
+
+
+def diff_lsdbs(old, new) -> LsdbDiff:
+    """Compares two LSDBs of one domain, e.g. snapshots taken an hour apart
+
+    LSAs are matched by nlri_key, so each LSDB should hold one LSA per NLRI, as a single
+    collector's table or the output of merge_lsdbs does.
+
+    Args:
+        old: Iterable of LSAs (records or dicts)
+        new: Iterable of LSAs (records or dicts)
+
+    Returns:
+        LsdbDiff, its lists in the order of the LSDB each LSA came from
+    """
+    before = {}
+    for lsa in old:
+        if isinstance(lsa, dict):
+            lsa = lsa_from_dict(lsa)
+        before[nlri_key(lsa)] = lsa
+    added, changed = [], []
+    for lsa in new:
+        if isinstance(lsa, dict):
+            lsa = lsa_from_dict(lsa)
+        previous = before.pop(nlri_key(lsa), None)
+        if previous is None:
+            added.append(lsa)
+        elif previous != lsa:
+            changed.append((previous, lsa))
+    return LsdbDiff(added, list(before.values()), changed)
@@ -0,0 +1,144 @@
+"""Compact binary snapshots of the BGP-LS table, replacing YAML dumps of GoBGPQueryWrapper.debug()
+
+A snapshot file is an 8 byte magic (MAGIC), a 1 byte format version, then each ListPath response
+of the table as a length-delimited serialized ListPathResponse protobuf (a varint byte length
+followed by the message, as written by protobuf's writeDelimitedTo). Responses are stored exactly
+as GoBGP streams them, so saving costs no conversion and loading reuses the RPC decoders; when the
+responses carry nlri_binary/pattrs_binary (binary fetch mode, or convert_yaml_dump), loading uses
+the fast TLV decoder of proto.binary.
+
+Unlike the YAML dumps, loading a snapshot never constructs arbitrary Python objects, so it is safe
+for files of unknown origin.
+
+Existing YAML dumps are converted with convert_yaml_dump.
+"""
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+from .binary import _varint, add_binary_fields, decode_raw_response
+from .decode import load_message_types
+
+yaml = lazy_import("yaml")
+json_format = lazy_import("google.protobuf.json_format")
+gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+
+MAGIC = b"BGPLSSNP"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+
+def _encode_varint(value: int) -> bytes:
+    """Encodes a protobuf varint"""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def is_snapshot(filename: str) -> bool:
+    """Checks whether a file starts with the snapshot magic (i.e. is not a YAML dump)"""
+    with open(filename, "rb") as snapshot:
+        return snapshot.read(len(MAGIC)) == MAGIC
+
+
+def write_snapshot(filename: str, responses) -> int:
+    """Writes a snapshot file from a stream of ListPath responses
+
+    Args:
+        filename: Path of the snapshot file to write
+        responses: Iterable of gobgp.ListPathResponse messages, or their serialized bytes (e.g.
+            from proto.binary.RawGobgpApiStub)
+
+    Returns:
+        Number of responses written
+    """
+    count = 0
+    with open(filename, "wb") as snapshot:
+        snapshot.write(HEADER)
+        for response in responses:
+            if not isinstance(response, (bytes, bytearray, memoryview)):
+                response = response.SerializeToString()
+            snapshot.write(_encode_varint(len(response)))
+            snapshot.write(response)
+            count += 1
+    return count
+
+
+def iter_snapshot(filename: str):
+    """Yields each serialized ListPathResponse stored in a snapshot file
+
+    Args:
+        filename: Path of the snapshot file
+
+    Yields:
+        memoryview of each serialized gobgp.ListPathResponse, in the order written
+
+    Raises:
+        ValueError: If the file is not a snapshot, or of an unsupported version
+    """
+    with open(filename, "rb") as snapshot:
+        data = memoryview(snapshot.read())
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{filename} is not a BGP-LS snapshot")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(
+            f"{filename} is snapshot version {data[len(MAGIC)]}, not {VERSION}"
+        )
+
+    pos = len(HEADER)
+    while pos < len(data):
+        length, pos = _varint(data, pos)
+        yield data[pos : pos + length]
+        pos += length
+
+
+def iter_snapshot_lsdb(filename: str):
+    """Yields the LSA records of a snapshot file, as GoBGPQueryWrapper.iter_lsdb would
+
+    Responses carrying binary NLRI/attributes are decoded by proto.binary, others by proto.decode.
+
+    Args:
+        filename: Path of the snapshot file
+
+    Yields:
+        LSA records (See: proto.lsa)
+    """
+    for raw in iter_snapshot(filename):
+        lsa = decode_raw_response(raw)
+        if lsa is not None:
+            yield lsa
+
+
+def responses_from_dump(table: list) -> list:
+    """Converts a table dumped from GoBGPQueryWrapper.debug() back to ListPathResponse messages
+
+    Args:
+        table: List of dicts, as given by GoBGPQueryWrapper.debug() or loaded from a YAML dump
+
+    Returns:
+        List of gobgp.ListPathResponse
+    """
+    load_message_types()
+    return [json_format.ParseDict(nlri, gobgp.ListPathResponse()) for nlri in table]
+
+
+def convert_yaml_dump(yaml_filename: str, filename: str, binary: bool = True) -> int:
+    """Converts a YAML dump of GoBGPQueryWrapper.debug() to a snapshot file
+
+    Args:
+        yaml_filename: Path of the YAML dump to read
+        filename: Path of the snapshot file to write
+        binary: When set, binary NLRI/attributes are added to each response, as a binary
+            fetch mode query would return them, so the snapshot loads with the TLV decoder
+
+    Returns:
+        Number of responses written
+    """
+    with open(yaml_filename, "r") as dump:
+        responses = responses_from_dump(yaml.load(dump, Loader=yaml.Loader))
+    if binary:
+        responses = [add_binary_fields(response) for response in responses]
+    return write_snapshot(filename, responses)
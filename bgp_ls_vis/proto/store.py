@@ -0,0 +1,320 @@
+"""Indexed, memory-mapped LSDB snapshot store, for reading parts of large archived tables
+
+A snapshot file (See: proto.snapshot) has to be read front to back. A store file instead groups
+the records of each router together and indexes them, so that one router's Node LSA, Link LSAs
+or Prefix LSAs can be read on their own. The file is memory-mapped on open and only the index
+entries and records that are asked for are ever touched.
+
+Layout (all integers little-endian):
+
+    HEADER      magic, version, router and record counts, section offsets
+    data        serialized ListPathResponse per LSA, with nlri_binary/pattrs_binary set, grouped
+                by local router: its Node LSA, then its Link LSAs, then its Prefix LSAs
+    records     fixed-size RECORD entries (offset, length) of each response in data
+    routers     fixed-size ROUTER entries, sorted by IGP router ID, each giving its name in the
+                names section, its Node LSA record (or -1) and the ranges of its link and prefix
+                records
+    names       IGP router IDs, UTF-8
+
+Routers are found by binary search over the sorted ROUTER entries, so opening a store and looking
+up a router costs O(log routers) regardless of table size.
+"""
+# Standard Imports
+import bisect
+import mmap
+import struct
+from collections import deque
+
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+from .binary import BinaryDecodeError, add_binary_fields, decode_list_path_response
+
+gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+
+MAGIC = b"BGPLSIDX"
+VERSION = 1
+
+# magic, version, router count, record count, records offset, routers offset, names offset
+HEADER = struct.Struct("<8sB3xIIQQQ")
+# offset, length of one serialized ListPathResponse
+RECORD = struct.Struct("<QI")
+# name offset, name length, node record, first link record, link count, first prefix record,
+# prefix count
+ROUTER = struct.Struct("<IIiIIII")
+
+
+def is_store(filename: str) -> bool:
+    """Checks whether a file starts with the store magic"""
+    with open(filename, "rb") as store:
+        return store.read(len(MAGIC)) == MAGIC
+
+
+def _binary_record(response):
+    """Serializes a ListPath response with binary fields set, decoding its LSA
+
+    Args:
+        response: gobgp.ListPathResponse, or its serialized bytes
+
+    Returns:
+        Tuple of (serialized response, LSA record or None)
+    """
+    if isinstance(response, (bytes, bytearray, memoryview)):
+        raw = bytes(response)
+        try:
+            return raw, decode_list_path_response(raw)
+        except BinaryDecodeError:
+            response = gobgp.ListPathResponse.FromString(raw)
+    raw = add_binary_fields(response).SerializeToString()
+    return raw, decode_list_path_response(raw)
+
+
+def write_store(filename: str, responses) -> int:
+    """Writes a store file from a stream of ListPath responses
+
+    Responses without binary NLRI/attributes have them added, so every record in the store can
+    be read with the binary TLV decoder. The table is grouped by router in memory before writing.
+
+    Args:
+        filename: Path of the store file to write
+        responses: Iterable of gobgp.ListPathResponse messages or their serialized bytes, e.g.
+            from proto.snapshot.iter_snapshot or proto.snapshot.responses_from_dump
+
+    Returns:
+        Number of LSAs written
+    """
+    # IGP RID -> [node record, link records, prefix records]
+    routers = {}
+    for response in responses:
+        raw, lsa = _binary_record(response)
+        if lsa is None:
+            continue
+        igp_rid = lsa["localNode"]["igpRouterId"]
+        node, links, prefixes = routers.setdefault(igp_rid, [None, [], []])
+        if lsa["type"] == "Node":
+            routers[igp_rid][0] = raw
+        elif lsa["type"] == "Link":
+            links.append(raw)
+        else:
+            prefixes.append(raw)
+
+    records, router_entries, names = [], [], bytearray()
+    data_size = 0
+
+    def add_record(raw: bytes) -> int:
+        nonlocal data_size
+        records.append(RECORD.pack(HEADER.size + data_size, len(raw)))
+        data_size += len(raw)
+        return len(records) - 1
+
+    data = []
+    for igp_rid in sorted(routers, key=lambda rid: rid.encode("utf-8")):
+        node, links, prefixes = routers[igp_rid]
+        name = igp_rid.encode("utf-8")
+        node_record = add_record(node) if node is not None else -1
+        first_link = len(records)
+        for raw in links:
+            add_record(raw)
+        first_prefix = len(records)
+        for raw in prefixes:
+            add_record(raw)
+        router_entries.append(
+            ROUTER.pack(
+                len(names),
+                len(name),
+                node_record,
+                first_link,
+                len(links),
+                first_prefix,
+                len(prefixes),
+            )
+        )
+        names += name
+        data.extend(raw for raw in (node, *links, *prefixes) if raw is not None)
+
+    records_offset = HEADER.size + data_size
+    routers_offset = records_offset + RECORD.size * len(records)
+    names_offset = routers_offset + ROUTER.size * len(router_entries)
+    with open(filename, "wb") as store:
+        store.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(router_entries),
+                len(records),
+                records_offset,
+                routers_offset,
+                names_offset,
+            )
+        )
+        store.writelines(data)
+        store.writelines(records)
+        store.writelines(router_entries)
+        store.write(names)
+    return len(records)
+
+
+class _RouterIds:
+    """Sorted sequence view of the IGP router IDs in a store, for bisect"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.router_count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.store._router_id(index)  # pylint: disable=protected-access
+
+
+class SnapshotStore:
+    """Read access to a store file, memory-mapped for the lifetime of the object
+
+    Iterating over a store yields every LSA, so `graphing.build_nx_from_lsdb(store)` builds the
+    full graph; `graphing.build_nx_from_lsdb(store.neighbourhood(...))` builds only part of it.
+    """
+
+    def __init__(self, filename: str):
+        """Opens and memory-maps a store file
+
+        Args:
+            filename: Path of a store file, as written by write_store
+
+        Raises:
+            ValueError: If the file is not a store, or of an unsupported version
+        """
+        with open(filename, "rb") as store:
+            self._map = mmap.mmap(store.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.router_count,
+            self.record_count,
+            self._records_offset,
+            self._routers_offset,
+            self._names_offset,
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{filename} is not a BGP-LS snapshot store")
+        if version != VERSION:
+            self._map.close()
+            raise ValueError(f"{filename} is store version {version}, not {VERSION}")
+        self._router_ids = _RouterIds(self)
+
+    def close(self):
+        """Unmaps the store file"""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _router(self, index: int) -> tuple:
+        return ROUTER.unpack_from(self._map, self._routers_offset + ROUTER.size * index)
+
+    def _router_id(self, index: int) -> bytes:
+        name_offset, name_length = self._router(index)[:2]
+        start = self._names_offset + name_offset
+        return self._map[start : start + name_length]
+
+    def _find(self, igp_rid: str):
+        """ROUTER entry for an IGP router ID, or None if the store has no LSAs from it"""
+        key = igp_rid.encode("utf-8")
+        index = bisect.bisect_left(self._router_ids, key)
+        if index < self.router_count and self._router_ids[index] == key:
+            return self._router(index)
+        return None
+
+    def _read(self, record: int):
+        """Decodes a single record to its LSA"""
+        offset, length = RECORD.unpack_from(
+            self._map, self._records_offset + RECORD.size * record
+        )
+        return decode_list_path_response(self._map[offset : offset + length])
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def __iter__(self):
+        for record in range(self.record_count):
+            yield self._read(record)
+
+    def __contains__(self, igp_rid: str) -> bool:
+        return self._find(igp_rid) is not None
+
+    def routers(self):
+        """Yields the IGP router ID of each router with LSAs in the store, in sorted order"""
+        for index in range(self.router_count):
+            yield self._router_id(index).decode("utf-8")
+
+    def node(self, igp_rid: str):
+        """Node LSA of a router
+
+        Returns:
+            NodeLSA record, or None if the store holds no Node LSA for igp_rid
+        """
+        router = self._find(igp_rid)
+        if router is None or router[2] < 0:
+            return None
+        return self._read(router[2])
+
+    def links(self, igp_rid: str) -> list:
+        """Link LSAs advertised by a router (i.e. with igp_rid as their local node)"""
+        router = self._find(igp_rid)
+        if router is None:
+            return []
+        return [
+            self._read(record) for record in range(router[3], router[3] + router[4])
+        ]
+
+    def prefixes(self, igp_rid: str) -> list:
+        """Prefix LSAs advertised by a router"""
+        router = self._find(igp_rid)
+        if router is None:
+            return []
+        return [
+            self._read(record) for record in range(router[5], router[5] + router[6])
+        ]
+
+    def neighbourhood(self, igp_rids, depth: int = 1):
+        """Yields the LSAs of the routers within `depth` hops of any of igp_rids
+
+        Routers are found by breadth-first search along Link LSAs, reading only the records of
+        the routers visited. Link LSAs are yielded when both ends are within range, so
+        graphing.build_nx_from_lsdb on the result gives the induced subgraph.
+
+        Args:
+            igp_rids: IGP router IDs to start from
+            depth: Number of hops to search out to; 0 yields only the starting routers
+
+        Yields:
+            LSA records
+        """
+        seen = set(igp_rids)
+        queue = deque((igp_rid, 0) for igp_rid in seen)
+        links = []
+        while queue:
+            igp_rid, hops = queue.popleft()
+            node = self.node(igp_rid)
+            if node is not None:
+                yield node
+            yield from self.prefixes(igp_rid)
+            for link in self.links(igp_rid):
+                remote = link["remoteNode"]["igpRouterId"]
+                if remote not in seen and hops < depth:
+                    seen.add(remote)
+                    queue.append((remote, hops + 1))
+                links.append(link)
+        for link in links:
+            if link["remoteNode"]["igpRouterId"] in seen:
+                yield link
+
+
+def iter_store_lsdb(filename: str):
+    """Yields every LSA record of a store file, as GoBGPQueryWrapper.iter_lsdb would"""
+    with SnapshotStore(filename) as store:
+        yield from store
@@ -0,0 +1,478 @@
+"""Synthetic BGP-LS tables, from the lab topology definitions or generated topologies of any size
+
+The LSAs are shaped like those of the captured IS-IS dumps under tests/ (18-node-isis-w-bcast-
+segment.yaml): every router has a Node LSA, a Prefix LSA for its loopback and one Link LSA per
+direction of each point-to-point link, with TE attributes. Broadcast segments get a pseudonode,
+with Link LSAs to and from each attached router, and their subnet advertised by every member.
+
+A Topology comes from a lab topology definition (load_topology_definition), or from one of the
+random_topology, fat_tree_topology and ring_topology generators, optionally with broadcast
+segments (with_segments) and shared risk link groups (with_srlgs) added. generate_lsdb turns it
+into LSA records, and write_table into any of the file formats get_lsdb loads:
+
+    topology = with_segments(fat_tree_topology(32), count=100)
+    write_table("fat-tree.bgpls", generate_lsdb(topology))
+
+It can also be run stand-alone: `python -m bgp_ls_vis.proto.synthetic --help`.
+
+Addressing: router N (counting from 0) has loopback 10.0.0.0 + N + 1, unless a definition sets
+Loopback_Prefix, and an IS-IS system ID of the loopback's octets as 12 decimal digits (2.90.0.8 ->
+0020.9000.0008), as in the lab. Link K is numbered from 100.64.0.0 + 2K/31, and segment K is
+10.128.0.0 + K/24.
+"""
+# Standard Imports
+import argparse
+import ipaddress
+import random
+from typing import NamedTuple
+
+# Project internal imports
+from ..lazy import lazy_import
+
+# RPC & GoBGP imports
+from .binary import encode_nlri, encode_path_attributes
+from .decode import load_message_types
+from .lsa import lsa_from_dict
+
+yaml = lazy_import("yaml")
+json_format = lazy_import("google.protobuf.json_format")
+gobgp = lazy_import("bgp_ls_vis.proto.gobgp_pb2")
+
+ASN = 65001
+PROTOCOL_ID = "LS_PROTOCOL_ISIS_L2"
+# 49.0001, base64 encoded as MessageToDict renders bytes fields
+ISIS_AREA = "SQAB"
+# 1 Gbit/s, in bytes per second as BGP-LS carries bandwidth
+BANDWIDTH = 125000000.0
+METRIC = 10
+
+LOOPBACK_BASE = int(ipaddress.IPv4Address("10.0.0.0"))
+LINK_BASE = int(ipaddress.IPv4Address("100.64.0.0"))
+SEGMENT_BASE = int(ipaddress.IPv4Address("10.128.0.0"))
+
+FORMATS = ("snapshot", "store", "mrt", "yaml")
+
+
+class SyntheticLink(NamedTuple):
+    """A point-to-point link between two routers (by position in Topology.names)"""
+
+    a: int
+    b: int
+    metric: int = METRIC
+    bandwidth: float = BANDWIDTH
+    admin_group: int = None
+    srlgs: tuple = None
+
+
+class Topology(NamedTuple):
+    """Routers, point-to-point links and broadcast segments of a synthetic network
+
+    names and loopbacks hold the hostname and loopback address of each router; links are
+    SyntheticLinks and segments are tuples of the routers attached to each broadcast segment.
+    """
+
+    names: list
+    loopbacks: list
+    links: list
+    segments: list = []
+
+
+def _loopbacks(count: int) -> list:
+    return [str(ipaddress.IPv4Address(LOOPBACK_BASE + n + 1)) for n in range(count)]
+
+
+def system_id(loopback: str) -> str:
+    """IS-IS system ID of a router, from its loopback address (2.90.0.8 -> 0020.9000.0008)"""
+    digits = "".join(f"{int(octet):03}" for octet in loopback.split("."))
+    return f"{digits[0:4]}.{digits[4:8]}.{digits[8:12]}"
+
+
+def load_topology_definition(filename: str) -> Topology:
+    """Loads a lab topology definition, as under tests/lab_topology_definitions/
+
+    Each node's Interfaces list the IDs of the nodes they attach to; a pair of nodes gets as many
+    links as the side with more interfaces towards the other has. Routers are named P<ID>.
+
+    Args:
+        filename: Path of the YAML definition
+
+    Returns:
+        Topology, with routers in the order of their IDs
+    """
+    with open(filename, "r") as definition:
+        data = yaml.safe_load(definition)
+    prefix = data.get("Config", {}).get("Loopback_Prefix")
+    ids = sorted(node["ID"] for node in data["Nodes"])
+    position = {node_id: n for n, node_id in enumerate(ids)}
+
+    # (node ID, attached node ID) -> number of interfaces
+    interfaces = {}
+    for node in data["Nodes"]:
+        for interface in node.get("Interfaces") or ():
+            key = (node["ID"], interface["Attaches_ID"])
+            interfaces[key] = interfaces.get(key, 0) + 1
+    links = []
+    for (a, b), count in sorted(interfaces.items()):
+        if a < b or (b, a) not in interfaces:
+            count = max(count, interfaces.get((b, a), 0))
+            low, high = sorted((position[a], position[b]))
+            links.extend(SyntheticLink(low, high) for _ in range(count))
+
+    loopbacks = (
+        [f"{prefix}{node_id}" for node_id in ids] if prefix else _loopbacks(len(ids))
+    )
+    return Topology([f"P{node_id}" for node_id in ids], loopbacks, links)
+
+
+def random_topology(
+    routers: int, degree: float = 4.0, metrics: tuple = (METRIC, METRIC), seed: int = 0
+) -> Topology:
+    """A random connected topology: a random spanning tree, plus random extra links
+
+    Args:
+        routers: Number of routers
+        degree: Average number of links per router (at least 2, for the tree)
+        metrics: Range (inclusive) of IGP metrics to draw each link's from
+        seed: Seed of the random choices
+
+    Returns:
+        Topology, with routers named R<n>
+    """
+    rng = random.Random(seed)
+    pairs = {(rng.randrange(n), n) for n in range(1, routers)}
+    target = max(len(pairs), int(routers * degree / 2))
+    while len(pairs) < target:
+        a, b = rng.sample(range(routers), 2)
+        pairs.add((min(a, b), max(a, b)))
+    links = [SyntheticLink(a, b, rng.randint(*metrics)) for a, b in sorted(pairs)]
+    return Topology([f"R{n}" for n in range(routers)], _loopbacks(routers), links)
+
+
+def fat_tree_topology(k: int, core_bandwidth: float = BANDWIDTH * 10) -> Topology:
+    """A k-ary fat-tree: k pods of k/2 edge and k/2 aggregation routers, and (k/2)^2 cores
+
+    Has 5k^2/4 routers (k=90 gives 10125) and k^3/2 links.
+
+    Args:
+        k: Number of ports per router, even
+        core_bandwidth: Bandwidth of the aggregation to core links; edge links get BANDWIDTH
+
+    Returns:
+        Topology, with routers named core-<n>, agg-<pod>-<n> and edge-<pod>-<n>
+    """
+    if k % 2:
+        raise ValueError(f"fat-tree k must be even, not {k}")
+    half = k // 2
+    names = [f"core-{n}" for n in range(half * half)]
+    links = []
+    for pod in range(k):
+        aggs = range(len(names), len(names) + half)
+        names.extend(f"agg-{pod}-{n}" for n in range(half))
+        edges = range(len(names), len(names) + half)
+        names.extend(f"edge-{pod}-{n}" for n in range(half))
+        for n, agg in enumerate(aggs):
+            links.extend(
+                SyntheticLink(core, agg, bandwidth=core_bandwidth)
+                for core in range(n * half, (n + 1) * half)
+            )
+            links.extend(SyntheticLink(agg, edge) for edge in edges)
+    return Topology(names, _loopbacks(len(names)), links)
+
+
+def ring_topology(routers: int) -> Topology:
+    """A ring of routers, each linked to the next
+
+    Returns:
+        Topology, with routers named R<n>
+    """
+    links = [SyntheticLink(n, n + 1) for n in range(routers - 1)]
+    links.append(SyntheticLink(0, routers - 1))
+    return Topology([f"R{n}" for n in range(routers)], _loopbacks(routers), links)
+
+
+def with_segments(
+    topology: Topology, count: int, size: int = 3, seed: int = 0
+) -> Topology:
+    """Adds broadcast segments, each attaching a random set of routers
+
+    Args:
+        topology: Topology to add to
+        count: Number of segments to add
+        size: Number of routers on each segment
+        seed: Seed of the random choices
+
+    Returns:
+        New Topology
+    """
+    rng = random.Random(seed)
+    routers = range(len(topology.names))
+    segments = [tuple(sorted(rng.sample(routers, size))) for _ in range(count)]
+    return topology._replace(segments=list(topology.segments) + segments)
+
+
+def with_srlgs(topology: Topology, groups: int, seed: int = 0) -> Topology:
+    """Puts each link into one of a number of shared risk link groups, at random
+
+    Args:
+        topology: Topology to add to
+        groups: Number of SRLGs, numbered from 1
+        seed: Seed of the random choices
+
+    Returns:
+        New Topology
+    """
+    rng = random.Random(seed)
+    links = [link._replace(srlgs=(rng.randint(1, groups),)) for link in topology.links]
+    return topology._replace(links=links)
+
+
+def _node(igp_router_id: str, pseudonode: bool = False) -> dict:
+    node = {"asn": ASN, "igpRouterId": igp_router_id}
+    if pseudonode:
+        node["pseudonode"] = True
+    return node
+
+
+def _link_lsa(topology, router_ids, link, number, reverse: bool) -> dict:
+    """Link LSA of one direction of a point-to-point link"""
+    local, remote = (link.b, link.a) if reverse else (link.a, link.b)
+    addresses = [
+        str(ipaddress.IPv4Address(LINK_BASE + 2 * number + side)) for side in (0, 1)
+    ]
+    if reverse:
+        addresses.reverse()
+    attribute = {
+        "localRouterId": topology.loopbacks[local],
+        "remoteRouterId": topology.loopbacks[remote],
+        "igpMetric": link.metric,
+        "bandwidth": link.bandwidth,
+        "reservableBandwidth": link.bandwidth,
+        "unreservedBandwidth": [link.bandwidth] * 8,
+    }
+    if link.admin_group is not None:
+        attribute["adminGroup"] = link.admin_group
+    if link.srlgs:
+        attribute["srlgs"] = list(link.srlgs)
+    return {
+        "type": "Link",
+        "localNode": _node(router_ids[local]),
+        "remoteNode": _node(router_ids[remote]),
+        "linkDescriptor": {
+            "interfaceAddrIpv4": addresses[0],
+            "neighborAddrIpv4": addresses[1],
+        },
+        "lsattribute": {
+            "node": {"localRouterId": topology.loopbacks[local]},
+            "link": attribute,
+            "prefix": {},
+        },
+        "protocolId": PROTOCOL_ID,
+    }
+
+
+def _prefix_lsa(igp_router_id: str, prefix: str) -> dict:
+    return {
+        "type": "Prefix",
+        "localNode": _node(igp_router_id),
+        "prefixDescriptor": {
+            "ipReachability": [prefix],
+            "ospfRouteType": "LsOspfRouteType(0)",
+        },
+        "protocolId": PROTOCOL_ID,
+    }
+
+
+def _segment_lsas(topology, router_ids, members, number, circuit) -> list:
+    """Pseudonode Node LSA, Link LSAs to and from it, and prefixes of a broadcast segment
+
+    The segment's DIS, which owns the pseudonode, is its first member; circuit numbers the
+    DIS's segments from 1.
+    """
+    pseudonode = f"{router_ids[members[0]]}-{circuit:02x}"
+    prefix = f"{ipaddress.IPv4Address(SEGMENT_BASE + 256 * number)}/24"
+    lsas = [
+        {
+            "type": "Node",
+            "localNode": _node(pseudonode, True),
+            "lsattribute": {"node": None, "link": None, "prefix": None},
+            "protocolId": PROTOCOL_ID,
+        }
+    ]
+    for member in members:
+        igp_router_id = router_ids[member]
+        loopback = topology.loopbacks[member]
+        lsas.append(
+            {
+                "type": "Link",
+                "localNode": _node(igp_router_id),
+                "remoteNode": _node(pseudonode, True),
+                "linkDescriptor": {},
+                "lsattribute": {
+                    "node": {"localRouterId": loopback},
+                    "link": {"localRouterId": loopback, "igpMetric": METRIC},
+                    "prefix": {},
+                },
+                "protocolId": PROTOCOL_ID,
+            }
+        )
+        lsas.append(
+            {
+                "type": "Link",
+                "localNode": _node(pseudonode, True),
+                "remoteNode": _node(igp_router_id),
+                "linkDescriptor": {},
+                "lsattribute": {
+                    "node": {},
+                    "link": {"remoteRouterId": loopback},
+                    "prefix": {},
+                },
+                "protocolId": PROTOCOL_ID,
+            }
+        )
+        lsas.append(_prefix_lsa(igp_router_id, prefix))
+    return lsas
+
+
+def generate_lsdb(topology: Topology):
+    """Generates the BGP-LS LSDB of a topology
+
+    Args:
+        topology: Topology, e.g. from load_topology_definition or fat_tree_topology
+
+    Yields:
+        LSA records (See: proto.lsa), as GoBGPQueryWrapper.get_lsdb would return them
+    """
+    router_ids = [system_id(loopback) for loopback in topology.loopbacks]
+    for name, loopback, igp_router_id in zip(
+        topology.names, topology.loopbacks, router_ids
+    ):
+        yield lsa_from_dict(
+            {
+                "type": "Node",
+                "localNode": _node(igp_router_id),
+                "lsattribute": {
+                    "node": {
+                        "name": name,
+                        "localRouterId": loopback,
+                        "isisArea": ISIS_AREA,
+                    },
+                    "link": {"localRouterId": loopback},
+                    "prefix": {},
+                },
+                "protocolId": PROTOCOL_ID,
+            }
+        )
+        yield lsa_from_dict(_prefix_lsa(igp_router_id, f"{loopback}/32"))
+    for number, link in enumerate(topology.links):
+        yield lsa_from_dict(_link_lsa(topology, router_ids, link, number, False))
+        yield lsa_from_dict(_link_lsa(topology, router_ids, link, number, True))
+    circuits = {}
+    for number, members in enumerate(topology.segments):
+        circuits[members[0]] = circuits.get(members[0], 0) + 1
+        for lsa in _segment_lsas(
+            topology, router_ids, members, number, circuits[members[0]]
+        ):
+            yield lsa_from_dict(lsa)
+
+
+def list_path_responses(lsdb, full: bool = False):
+    """Encodes LSAs as the ListPath responses of a binary mode query (See: proto.binary)
+
+    Args:
+        lsdb: Iterable of LSA records or dicts
+        full: When set, paths also carry the NLRI and attributes as protobuf messages, as GoBGP
+            sends them, rather than the binary fields alone (which is all binary decoding needs)
+
+    Yields:
+        gobgp.ListPathResponse, each with one best path
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from .fake_server import path_from_lsa
+
+    for lsa in lsdb:
+        if full:
+            path = path_from_lsa(lsa, binary=True)
+        else:
+            path = gobgp.Path(
+                best=True,
+                nlri_binary=encode_nlri(lsa),
+                pattrs_binary=encode_path_attributes(lsa),
+            )
+        yield gobgp.ListPathResponse(destination=gobgp.Destination(paths=[path]))
+
+
+def write_table(filename: str, lsdb, fmt: str = "snapshot") -> int:
+    """Writes LSAs as a BGP-LS table file that GoBGPQueryWrapper.get_lsdb can load
+
+    Args:
+        filename: Path of the file to write
+        lsdb: Iterable of LSA records, e.g. from generate_lsdb
+        fmt: One of FORMATS: a snapshot file (See: proto.snapshot), a snapshot store (See:
+            proto.store), an MRT table dump (See: proto.mrt, loaded with iter_mrt_lsdb) or a YAML
+            dump as of GoBGPQueryWrapper.debug()
+
+    Returns:
+        Number of LSAs written
+    """
+    # pylint: disable=import-outside-toplevel
+    from .mrt import write_mrt_table_dump
+    from .snapshot import write_snapshot
+    from .store import write_store
+
+    if fmt == "snapshot":
+        return write_snapshot(filename, list_path_responses(lsdb))
+    if fmt == "store":
+        return write_store(filename, list_path_responses(lsdb))
+    if fmt == "mrt":
+        return write_mrt_table_dump(filename, lsdb)
+    if fmt == "yaml":
+        load_message_types()
+        table = [
+            json_format.MessageToDict(response)
+            for response in list_path_responses(lsdb, True)
+        ]
+        with open(filename, "w") as dump:
+            yaml.dump(table, dump)
+        return len(table)
+    raise ValueError(f"Unknown table format {fmt}, not one of {FORMATS}")
+
+
+def main():
+    """Writes a synthetic BGP-LS table file"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "topology",
+        help="A lab topology definition file, or one of random:<routers>, fat-tree:<k>"
+        " or ring:<routers>",
+    )
+    parser.add_argument("output", help="Table file to write")
+    parser.add_argument("--format", choices=FORMATS, default="snapshot")
+    parser.add_argument("--degree", type=float, default=4.0, help="For random")
+    parser.add_argument("--segments", type=int, default=0, help="Broadcast segments")
+    parser.add_argument("--srlgs", type=int, default=0, help="Shared risk link groups")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    kind, _, size = args.topology.partition(":")
+    if kind == "random":
+        topology = random_topology(int(size), args.degree, seed=args.seed)
+    elif kind == "fat-tree":
+        topology = fat_tree_topology(int(size))
+    elif kind == "ring":
+        topology = ring_topology(int(size))
+    else:
+        topology = load_topology_definition(args.topology)
+    if args.segments:
+        topology = with_segments(topology, args.segments, seed=args.seed)
+    if args.srlgs:
+        topology = with_srlgs(topology, args.srlgs, seed=args.seed)
+
+    count = write_table(args.output, generate_lsdb(topology), args.format)
+    print(
+        f"Wrote {count} LSAs ({len(topology.names)} routers, {len(topology.links)} links,"
+        f" {len(topology.segments)} segments) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
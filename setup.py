@@ -0,0 +1,24 @@
+"""Packaging for bgp_ls_vis, installing the bgp-ls-vis command (See: bgp_ls_vis.cli)"""
+# Standard Imports
+from setuptools import find_packages, setup
+
+setup(
+    name="bgp-ls-vis",
+    version="0.1.0",
+    description="BGP Link-State AFI Visualiser",
+    packages=find_packages(include=["bgp_ls_vis", "bgp_ls_vis.*"]),
+    python_requires=">=3.9",
+    install_requires=[
+        "networkx~=2.5",
+        "matplotlib~=3.3.3",
+        "PyYAML~=5.3.1",
+        "numpy>=1.19",
+        "grpcio",
+        # The generated GoBGP modules predate protobuf 4's runtime
+        "protobuf<4",
+    ],
+    extras_require={
+        "dashboard": ["dash~=1.18.1", "dash-cytoscape", "plotly~=4.14.1"],
+    },
+    entry_points={"console_scripts": ["bgp-ls-vis = bgp_ls_vis.cli:main"]},
+)
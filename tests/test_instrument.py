@@ -0,0 +1,26 @@
+"""Regression tests for the tracemalloc handling of instrument.enable/disable"""
+# Standard Imports
+import tracemalloc
+
+# Project internal imports
+from bgp_ls_vis import instrument
+
+
+def test_disable_leaves_callers_tracemalloc_running():
+    """tracemalloc started before enable keeps running after disable"""
+    tracemalloc.start()
+    try:
+        instrument.enable(lambda span: None, memory=True)
+        instrument.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_disable_stops_tracemalloc_enable_started():
+    """tracemalloc started by enable stops with disable"""
+    assert not tracemalloc.is_tracing()
+    instrument.enable(lambda span: None, memory=True)
+    assert tracemalloc.is_tracing()
+    instrument.disable()
+    assert not tracemalloc.is_tracing()
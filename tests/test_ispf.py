@@ -0,0 +1,47 @@
+"""Regression tests for parallel links in incremental SPF (graphing.ispf)"""
+# Standard Imports
+import networkx as nx
+import numpy as np
+
+# Project internal imports
+from bgp_ls_vis.graphing import build_nx_from_lsdb
+from bgp_ls_vis.graphing.csr import CsrTopology
+from bgp_ls_vis.graphing.ispf import IncrementalSpf
+from bgp_ls_vis.graphing.spf import AllPairsSpf
+from bgp_ls_vis.proto import LsdbDelta
+from bgp_ls_vis.proto.synthetic import generate_lsdb, ring_topology
+
+
+def assert_matches_spf(ispf: IncrementalSpf, lsdb: list):
+    """Router to router costs of ispf equal those of AllPairsSpf over lsdb"""
+    spf = AllPairsSpf(CsrTopology.from_lsdb(lsdb))
+    positions = [ispf.index[name] for name in spf.names]
+    assert np.array_equal(ispf.costs[np.ix_(positions, positions)], spf.costs)
+
+
+def test_parallel_edges_use_the_cheapest():
+    """An adjacency costs its cheapest parallel edge, whatever their order"""
+    graph = nx.MultiDiGraph()
+    graph.add_edge("A", "B", cost=1, pseudonode=False)
+    graph.add_edge("A", "B", cost=100, pseudonode=False)
+    assert IncrementalSpf(graph).cost("A", "B") == 1
+
+
+def test_parallel_links_match_all_pairs_spf():
+    """A dearer second link between two routers agrees with AllPairsSpf, before and after a delta"""
+    topology = ring_topology(10)
+    topology = topology._replace(
+        links=topology.links + [topology.links[0]._replace(metric=100)]
+    )
+    lsdb = list(generate_lsdb(topology))
+    ispf = IncrementalSpf(build_nx_from_lsdb(lsdb), lsdb)
+    assert_matches_spf(ispf, lsdb)
+
+    # Withdrawing the cheaper link leaves the dearer one
+    cheaper = next(
+        lsa
+        for lsa in lsdb
+        if lsa["type"] == "Link" and lsa["lsattribute"]["link"]["igpMetric"] != 100
+    )
+    ispf.apply(LsdbDelta(True, cheaper))
+    assert_matches_spf(ispf, [lsa for lsa in lsdb if lsa is not cheaper])
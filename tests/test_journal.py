@@ -0,0 +1,58 @@
+"""Regression tests for reopening a journal (proto.journal) after losing its index or a crash"""
+# Standard Imports
+import os
+
+# Project internal imports
+from bgp_ls_vis.proto import LsdbDelta
+from bgp_ls_vis.proto.journal import (
+    INDEX_ENTRY,
+    INDEX_SUFFIX,
+    JournalReader,
+    JournalWriter,
+)
+from bgp_ls_vis.proto.snapshot import _encode_varint
+from bgp_ls_vis.proto.synthetic import generate_lsdb, ring_topology
+
+
+def test_reopen_without_index_keeps_checkpoints(tmp_path):
+    """Checkpoints written before the index was lost stay visible after appending"""
+    path = str(tmp_path / "lsdb.journal")
+    lsdb = list(generate_lsdb(ring_topology(10)))
+    with JournalWriter(path, checkpoint_interval=100) as journal:
+        journal.record_table(lsdb, timestamp=100.0)
+        journal.record(LsdbDelta(True, lsdb[0]), timestamp=150.0)
+        journal.record(LsdbDelta(False, lsdb[0]), timestamp=200.0)
+    os.remove(path + INDEX_SUFFIX)
+
+    with JournalWriter(path, checkpoint_interval=100) as journal:
+        journal.record(LsdbDelta(True, lsdb[1]), timestamp=300.0)
+
+    with JournalReader(path) as reader:
+        assert reader.checkpoints == [100.0, 200.0, 300.0]
+        assert len(reader.lsdb_at(100.0)) == len(lsdb)
+        assert len(reader.lsdb_at(150.0)) == len(lsdb) - 1
+        assert len(reader.lsdb_at()) == len(lsdb) - 1
+    with open(path + INDEX_SUFFIX, "rb") as index:
+        assert len(index.read()) == 3 * INDEX_ENTRY.size
+
+
+def test_reopen_after_torn_frame_truncates_it(tmp_path):
+    """Frames appended after a crash mid-write follow the last complete frame"""
+    path = str(tmp_path / "lsdb.journal")
+    lsdb = list(generate_lsdb(ring_topology(10)))
+    with JournalWriter(path) as journal:
+        journal.record_table(lsdb, timestamp=100.0)
+        journal.record(LsdbDelta(True, lsdb[0]), timestamp=110.0)
+    size = os.path.getsize(path)
+    with open(path, "ab") as journal:
+        # The start of a 1000 byte frame, cut short
+        journal.write(_encode_varint(1000) + b"A")
+
+    with JournalWriter(path) as journal:
+        assert os.path.getsize(path) == size
+        journal.record(LsdbDelta(True, lsdb[1]), timestamp=120.0)
+
+    with JournalReader(path) as reader:
+        assert [timestamp for timestamp, _ in reader.deltas()] == [110.0, 120.0]
+        assert len(reader.lsdb_at()) == len(lsdb) - 2
+        assert reader.end == os.path.getsize(path)
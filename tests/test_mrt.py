@@ -0,0 +1,53 @@
+"""Regression tests for reading MRT files (proto.mrt) with malformed records"""
+# Standard Imports
+import logging
+
+import pytest
+
+# Project internal imports
+from bgp_ls_vis.proto import LsdbDelta
+from bgp_ls_vis.proto.binary import BinaryDecodeError
+from bgp_ls_vis.proto.mrt import (
+    MRT_HEADER,
+    iter_mrt_deltas,
+    iter_mrt_lsdb,
+    write_mrt_updates,
+)
+from bgp_ls_vis.proto.synthetic import generate_lsdb, ring_topology
+
+
+@pytest.fixture(name="updates")
+def fixture_updates(tmp_path):
+    """MRT file of three BGP4MP updates, the second cut short within its BGP message"""
+    lsdb = list(generate_lsdb(ring_topology(5)))[:3]
+    records = []
+    for position, lsa in enumerate(lsdb):
+        path = tmp_path / f"{position}.mrt"
+        write_mrt_updates(str(path), [(100 + position, LsdbDelta(False, lsa))])
+        records.append(path.read_bytes())
+    timestamp, mrt_type, subtype, _ = MRT_HEADER.unpack_from(records[1])
+    body = records[1][MRT_HEADER.size : MRT_HEADER.size + 30]
+    records[1] = MRT_HEADER.pack(timestamp, mrt_type, subtype, len(body)) + body
+    path = tmp_path / "updates.mrt"
+    path.write_bytes(b"".join(records))
+    return str(path), lsdb, len(records[0])
+
+
+def test_malformed_record_is_skipped(updates, caplog):
+    """The records around a malformed one are still read, and the bad one is logged"""
+    path, lsdb, offset = updates
+    with caplog.at_level(logging.WARNING, logger="bgp_ls_vis.proto.mrt"):
+        deltas = list(iter_mrt_deltas(path))
+    assert [(timestamp, delta.lsa) for timestamp, delta in deltas] == [
+        (100, lsdb[0]),
+        (102, lsdb[2]),
+    ]
+    assert f"offset {offset} (timestamp 101)" in caplog.text
+    assert len(list(iter_mrt_lsdb(path))) == 2
+
+
+def test_malformed_record_raises_when_strict(updates):
+    """strict turns the skip into a BinaryDecodeError"""
+    path, _, offset = updates
+    with pytest.raises(BinaryDecodeError, match=f"offset {offset}"):
+        list(iter_mrt_deltas(path, strict=True))